@@ -0,0 +1,7 @@
+#!/bin/bash
+
+DIR=$( cd "$( dirname "${BASH_SOURCE[0]}" )" && pwd )
+echo $DIR
+cd $DIR/..
+export PYTHONPATH=$(pwd)
+python zombiesim/benchmark.py "$@"
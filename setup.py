@@ -9,6 +9,7 @@ config = {
     'author_email': 'btbuxton@gmail.com',
     'version': '0.1',
     'install_requires': ['pygame'],
+    'extras_require': {'numpy': ['numpy'], 'numba': ['numba', 'numpy']},
     'packages': find_packages(),
     'scripts': [],
     'name': 'zombie-sim'
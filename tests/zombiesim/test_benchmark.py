@@ -0,0 +1,26 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from zombiesim import benchmark
+
+
+class BenchmarkTest(TestCase):
+    def test_writes_results(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "bench.json")
+            benchmark.main(["--sizes", "25", "--ticks", "3", "--output", output])
+            with open(output) as written:
+                report = json.load(written)
+        (result,) = report["results"]
+        self.assertEqual(25, result["humans"])
+        self.assertEqual(3, result["ticks"])
+        self.assertIn("update_humans_to_zombies", result["phases"])
+        self.assertIn("draw", result["phases"])
+
+    def test_density_matches_default_window(self):
+        rect, zombies, food = benchmark.world_shape(benchmark.INITIAL_HUMANS * 4)
+        self.assertEqual((2880, 1800), rect.size)
+        self.assertEqual(benchmark.INITIAL_ZOMBIES * 4, zombies)
+        self.assertEqual(benchmark.MAX_FOOD * 4, food)
@@ -0,0 +1,49 @@
+from unittest import TestCase
+
+import pygame
+from zombiesim.camera import MAX_ZOOM, Camera
+from zombiesim.type_def import Point
+
+
+class CameraTest(TestCase):
+    def setUp(self):
+        self.camera = Camera(pygame.Rect(0, 0, 2000, 1000), (400, 300))
+
+    def test_screen_and_world_positions(self):
+        self.camera.pan(100, 50)
+        self.camera.set_zoom(2.0)
+        self.assertEqual(pygame.Rect(200, 125, 201, 151), self.camera.area())
+        x, y = self.camera.to_screen(250, 150)
+        self.assertEqual((100, 50), (x, y))
+        self.assertEqual(Point(250, 150), self.camera.to_world(Point(x, y)))
+
+    def test_stays_over_the_world(self):
+        self.camera.pan(-100, -100)
+        self.assertEqual((0, 0), self.camera.area().topleft)
+        self.camera.pan(10000, 10000)
+        self.assertEqual((1600, 700), self.camera.area().topleft)
+
+    def test_zooms_around_a_point(self):
+        self.camera.pan(700, 300)
+        under = self.camera.to_world(Point(100, 100))
+        self.camera.zoom_in((100, 100))
+        self.assertEqual(under, self.camera.to_world(Point(100, 100)))
+        for _ in range(20):
+            self.camera.zoom_in()
+        self.assertEqual(MAX_ZOOM, self.camera.zoom)
+
+    def test_shows_all_of_the_world(self):
+        self.camera.show_all()
+        self.assertEqual(0.2, self.camera.zoom)
+        # centered top to bottom
+        self.assertEqual((0, 50), self.camera.to_screen(0, 0))
+        self.assertEqual((400, 250), self.camera.to_screen(2000, 1000))
+        self.assertTrue(self.camera.area().contains(self.camera.world))
+
+    def test_scales_images_once_per_zoom(self):
+        image = pygame.Surface((10, 10))
+        self.assertIs(image, self.camera.scaled(image))
+        self.camera.set_zoom(1.5)
+        scaled = self.camera.scaled(image)
+        self.assertEqual((15, 15), scaled.get_size())
+        self.assertIs(scaled, self.camera.scaled(image))
@@ -0,0 +1,130 @@
+from unittest import TestCase
+
+import pygame
+from zombiesim.field import field_creator
+from zombiesim.type_def import MutablePoint, Point
+from zombiesim.util import RandomStreams
+from zombiesim.entities import (
+    ATLAS,
+    DEFAULT_FOOD_AMOUNT,
+    HUMAN_COLOR,
+    EntityGroup,
+    FoodSprite,
+    HumanSprite,
+    ImageAtlas,
+    ZombieSprite,
+    draw_ellipse,
+)
+
+
+class ImageAtlasTest(TestCase):
+    def test_level_for(self):
+        atlas = ImageAtlas(levels=5)
+        self.assertEqual(0, atlas.level_for(-1))
+        self.assertEqual(0, atlas.level_for(0))
+        self.assertEqual(2, atlas.level_for(0.5))
+        self.assertEqual(4, atlas.level_for(1))
+        self.assertEqual(4, atlas.level_for(3))
+
+    def test_images_are_shared(self):
+        atlas = ImageAtlas(levels=4)
+        red = pygame.Color("red")
+        first = atlas.image(draw_ellipse, red, 2)
+        self.assertIs(first, atlas.image(draw_ellipse, pygame.Color("red"), 2))
+        self.assertIsNot(first, atlas.image(draw_ellipse, red, 1))
+        self.assertEqual(4, len(atlas))
+
+    def test_alpha_levels_are_drawn(self):
+        atlas = ImageAtlas(levels=3)
+        green = pygame.Color("green")
+        alphas = [
+            atlas.image(draw_ellipse, green, level).get_at((5, 5)).a
+            for level in range(3)
+        ]
+        self.assertEqual([0, 128, 255], alphas)
+
+    def test_sprites_do_not_own_images(self):
+        first, second = HumanSprite(), HumanSprite()
+        self.assertIs(first.image, second.image)
+        self.assertIs(ZombieSprite().image, ZombieSprite().image)
+        self.assertIs(FoodSprite().image, FoodSprite().image)
+        self.assertIsNot(first.image, FoodSprite().image)
+
+    def test_fading_human_switches_image(self):
+        field = field_creator(start_zombies=0, start_humans=1, max_food=0)(
+            pygame.Rect(0, 0, 400, 300)
+        )
+        (human,) = field.humans
+        full = human.image
+        human.feed(0.5, field.tick)
+        field.tick += 1
+        human.update(field)
+        self.assertIsNot(full, human.image)
+        self.assertIs(ATLAS.image(HumanSprite.shape, HUMAN_COLOR, 8), human.image)
+        self.assertEqual(255, HUMAN_COLOR.a)
+
+
+class EntityPoolTest(TestCase):
+    def test_released_entities_are_reused(self):
+        group = EntityGroup(FoodSprite)
+        food = group.create_one()
+        food.rect.center = 50, 60
+        food.amount = 0
+        group.release(food)
+        self.assertNotIn(food, group)
+        again = group.create_one()
+        self.assertIs(food, again)
+        self.assertIn(again, group)
+        self.assertEqual(DEFAULT_FOOD_AMOUNT, again.amount)
+        self.assertEqual((0, 0), again.rect.topleft)
+        stats = group.pool_stats
+        self.assertEqual((1, 1, 1), (stats.created, stats.reused, stats.released))
+
+    def test_reset_draws_what_a_new_entity_would(self):
+        group = EntityGroup(ZombieSprite, RandomStreams(3))
+        zombie = group.create_one()
+        zombie.attack_wait = 0
+        zombie.energy = 0
+        group.release(zombie)
+        expected = EntityGroup(ZombieSprite, RandomStreams(3))
+        expected.create_one()
+        fresh = expected.create_one()
+        reused = group.create_one()
+        self.assertIs(zombie, reused)
+        self.assertEqual(
+            (fresh.angle, fresh.current_dir, fresh.attack_wait, fresh.energy),
+            (reused.angle, reused.current_dir, reused.attack_wait, reused.energy),
+        )
+
+    def test_eaten_food_goes_back_to_the_pool(self):
+        field = field_creator(start_zombies=0, start_humans=1, max_food=1, seed=2)(
+            pygame.Rect(0, 0, 400, 300)
+        )
+        (human,) = field.humans
+        (food,) = field.food
+        food.amount = 1
+        human.rect.center = food.rect.center
+        human.energy = 1.0
+        field.update_eaten_food()
+        field.check_food()
+        self.assertEqual([food], list(field.food))
+        self.assertEqual(DEFAULT_FOOD_AMOUNT, food.amount)
+        self.assertEqual(1, field.food.pool_stats.reused)
+
+
+class SteeringTest(TestCase):
+    def test_targets_across_the_edge(self):
+        field = field_creator(start_zombies=1, start_humans=1, max_food=0, seed=2)(
+            pygame.Rect(0, 0, 1440, 900)
+        )
+        (zombie,) = field.zombies
+        (human,) = field.humans
+        zombie.rect.center = 5, 450
+        human.rect.center = 1435, 450
+        field.human_grid.rebuild(field.humans, field.rect)
+        field.zombie_grid.rebuild(field.zombies, field.rect)
+        # 10 apart through the left edge, the way the grids see it
+        self.assertEqual(Point(5 - 90, 450), zombie.run_to_humans(field, Point(5, 450)))
+        goto = MutablePoint(1435, 450)
+        human.run_from_zombies(field, Point(1435, 450), goto)
+        self.assertEqual((1435 - 40**2, 450), (goto.x, goto.y))
@@ -0,0 +1,92 @@
+from unittest import TestCase
+
+import pygame
+from zombiesim.event import EventLookup
+from zombiesim.field import field_creator
+
+
+def post(event_type: int, **attributes) -> None:
+    pygame.event.post(pygame.event.Event(event_type, **attributes))
+
+
+class EventLookupTest(TestCase):
+    def setUp(self):
+        pygame.init()
+        self.addCleanup(pygame.quit)
+        pygame.event.clear()
+        self.events = EventLookup()
+
+    def test_every_handler_is_called(self):
+        seen: list[str] = []
+        first = self.events.add(pygame.USEREVENT, lambda _: seen.append("first"))
+        self.events.add(pygame.USEREVENT, lambda _: seen.append("second"))
+        post(pygame.USEREVENT)
+        self.events.process_events()
+        self.assertEqual(["first", "second"], seen)
+        self.events.remove_handler(first)
+        post(pygame.USEREVENT)
+        self.events.process_events()
+        self.assertEqual(["first", "second", "second"], seen)
+        self.assertEqual(2, self.events.stats.dispatched)
+
+    def test_key_presses(self):
+        seen: list[int] = []
+        self.events.add_key_press(pygame.K_a, lambda event: seen.append(event.key))
+        handle = self.events.add_key_press(pygame.K_a, lambda _: seen.append(0))
+        self.events.add_key_press(pygame.K_b, lambda event: seen.append(event.key))
+        self.assertEqual(1, len(self.events._mapping[pygame.KEYDOWN]))
+        for key in (pygame.K_a, pygame.K_c, pygame.K_b):
+            post(pygame.KEYDOWN, key=key)
+        self.events.process_events()
+        self.assertEqual([pygame.K_a, 0, pygame.K_b], seen)
+        self.events.remove_handler(handle)
+        post(pygame.KEYDOWN, key=pygame.K_a)
+        self.events.process_events()
+        self.assertEqual([pygame.K_a, 0, pygame.K_b, pygame.K_a], seen)
+
+    def test_key_presses_after_other_key_handlers(self):
+        seen: list[int] = []
+        self.events.add(pygame.KEYDOWN, lambda _: seen.append(0))
+        self.events.add_key_press(pygame.K_a, lambda event: seen.append(event.key))
+        post(pygame.KEYDOWN, key=pygame.K_a)
+        self.events.process_events()
+        self.assertEqual([0, pygame.K_a], seen)
+        self.events.remove(pygame.KEYDOWN)
+        self.events.add_key_press(pygame.K_b, lambda event: seen.append(event.key))
+        post(pygame.KEYDOWN, key=pygame.K_b)
+        self.events.process_events()
+        self.assertEqual([0, pygame.K_a, pygame.K_b], seen)
+
+    def test_timer_backlog_is_merged(self):
+        ticks = self.events.every_do(60 * 1000)
+        counts: list[int] = []
+        clicks: list[int] = []
+        self.events.add(ticks, lambda event: counts.append(event.count))
+        self.events.add(pygame.MOUSEBUTTONDOWN, lambda event: clicks.append(1))
+        for _ in range(3):
+            post(ticks)
+            post(pygame.MOUSEBUTTONDOWN, button=1, pos=(0, 0))
+        self.events.process_events()
+        self.assertEqual([3], counts)
+        self.assertEqual(3, len(clicks))
+        post(ticks)
+        self.events.process_events()
+        self.assertEqual([3, 1], counts)
+        stats = self.events.stats
+        self.assertEqual(
+            (2, 1, 2), (stats.merged, stats.backlogged_frames, stats.worst_backlog)
+        )
+        self.events.remove(ticks)
+        post(ticks)
+        self.events.process_events()
+        self.assertEqual([3, 1], counts)
+
+    def test_stopped_field_lets_go_of_the_mouse(self):
+        field = field_creator(start_zombies=1, start_humans=1, max_food=1)(
+            pygame.Rect(0, 0, 400, 300)
+        )
+        field.start(self.events)
+        self.assertEqual(1, len(self.events._mapping[pygame.MOUSEBUTTONDOWN]))
+        field.stop(self.events)
+        self.assertEqual({}, self.events._mapping[pygame.MOUSEBUTTONDOWN])
+        self.assertEqual([], field.registered_ids)
@@ -0,0 +1,95 @@
+import os
+import sys
+import tempfile
+import time
+from unittest import TestCase
+
+import pygame
+from zombiesim.export import FrameExporter, PipeWriter, PngWriter, export_run
+from zombiesim.field import field_creator
+
+
+class SlowWriter:
+    """Takes half a second over each frame, leaving an empty file named
+    after its number in directory"""
+
+    def __init__(self, directory: str):
+        self.directory: str = directory
+
+    def open(self, size: tuple[int, int]) -> None:
+        pass
+
+    def write(self, frame: int, pixels: memoryview) -> None:
+        time.sleep(0.5)
+        open(os.path.join(self.directory, str(frame)), "w").close()
+
+    def close(self) -> None:
+        pass
+
+
+class FrameExporterTest(TestCase):
+    def setUp(self):
+        self.field = field_creator(
+            start_zombies=3, start_humans=30, max_food=2, seed=6
+        )(pygame.Rect(0, 0, 320, 240))
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_png_frames_are_what_was_drawn(self):
+        pattern = os.path.join(self.directory.name, "frames", "%03d.png")
+        expected = []
+
+        def drawn() -> None:
+            screen = pygame.Surface((320, 240))
+            self.field.draw(screen)
+            expected.append(pygame.image.tobytes(screen, "RGB"))
+
+        def draw(surface: pygame.Surface) -> None:
+            surface.fill(pygame.Color("black"))
+            self.field.draw(surface)
+
+        with FrameExporter((320, 240), PngWriter(pattern), writers=2) as exporter:
+            for frame in range(3):
+                drawn()
+                exporter.export(draw)
+                self.field.simulation.run(5)
+        self.assertEqual((3, 0), (exporter.stats.exported, exporter.stats.dropped))
+        for frame, pixels in enumerate(expected):
+            written = pygame.image.load(pattern % frame)
+            self.assertEqual(pixels, pygame.image.tobytes(written, "RGB"))
+
+    def test_pipes_raw_frames_to_a_command(self):
+        path = os.path.join(self.directory.name, "raw")
+        command = [
+            sys.executable,
+            "-c",
+            "import shutil, sys; shutil.copyfileobj(sys.stdin.buffer, open(sys.argv[1], 'wb'))",
+            path,
+        ]
+        with FrameExporter((160, 120), PipeWriter(command), slots=2) as exporter:
+            ran = export_run(self.field, exporter, 10, every=2)
+        self.assertEqual(10, ran)
+        self.assertEqual((5, 0), (exporter.stats.exported, exporter.stats.dropped))
+        self.assertEqual(5 * 160 * 120 * 4, os.path.getsize(path))
+
+    def test_waits_to_write_every_frame(self):
+        writer = SlowWriter(self.directory.name)
+        with FrameExporter((32, 24), writer, slots=1) as exporter:
+            for _ in range(3):
+                self.assertTrue(exporter.export(lambda surface: None))
+            self.assertGreater(exporter.stats.waited, 0.5)
+        self.assertEqual((3, 0), (exporter.stats.exported, exporter.stats.dropped))
+        self.assertEqual(["0", "1", "2"], sorted(os.listdir(self.directory.name)))
+
+    def test_drops_frames_when_asked(self):
+        writer = SlowWriter(self.directory.name)
+        with FrameExporter((32, 24), writer, slots=1, drop=True) as exporter:
+            begin = time.monotonic()
+            for _ in range(3):
+                exporter.export(lambda surface: None)
+            self.assertLess(time.monotonic() - begin, 0.5)
+            time.sleep(0.7)
+            self.assertTrue(exporter.export(lambda surface: None))
+        self.assertEqual((2, 2), (exporter.stats.exported, exporter.stats.dropped))
+        # numbered without the gap the dropped frames left
+        self.assertEqual(["0", "1"], sorted(os.listdir(self.directory.name)))
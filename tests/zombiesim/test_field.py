@@ -0,0 +1,171 @@
+from collections.abc import Iterable
+from unittest import TestCase
+
+import pygame
+from zombiesim.entities import Entity
+from zombiesim.field import field_creator
+from zombiesim.type_def import Direction, Point
+
+
+class FieldTest(TestCase):
+    def test_runs_headless(self):
+        field = field_creator(start_zombies=2, start_humans=20, max_food=2)(
+            pygame.Rect(0, 0, 400, 300)
+        )
+        ran = field.simulation.run(20)
+        self.assertEqual(20, ran)
+        self.assertEqual(22, len(field.humans) + len(field.zombies))
+        for each in list(field.humans) + list(field.zombies):
+            self.assertTrue(field.rect.contains(each.rect))
+
+    def test_human_bitten_twice_turns_once(self):
+        field = field_creator(start_zombies=2, start_humans=1, max_food=0)(
+            pygame.Rect(0, 0, 400, 300)
+        )
+        first, second = field.zombies
+        first.rect.center = (100, 100)
+        second.rect.center = (104, 100)
+        (human,) = field.humans
+        human.rect.center = (102, 102)
+        field.update_humans_to_zombies()
+        self.assertFalse(human.alive())
+        self.assertEqual(3, len(field.zombies))
+
+    def test_bites_and_meals_share_one_grid(self):
+        field = field_creator(start_zombies=1, start_humans=2, max_food=1)(
+            pygame.Rect(0, 0, 400, 300)
+        )
+        (zombie,) = field.zombies
+        (food,) = field.food
+        bitten, fed = field.humans
+        food.rect.center = (100, 100)
+        zombie.rect.center = (300, 200)
+        bitten.rect.center = (300, 202)
+        fed.rect.center = (100, 100)
+        grids = field.contact_grid.rebuild
+        rebuilt = []
+
+        def rebuild(*args):
+            rebuilt.append(field.tick)
+            grids(*args)
+
+        field.contact_grid.rebuild = rebuild  # type: ignore[method-assign]
+        field.tick = 1
+        field.update_humans_to_zombies()
+        bitten.rect.center = food.rect.center
+        self.assertEqual([(food, fed)], field.find_who_can_eat())
+        self.assertEqual([1], rebuilt)
+
+    def test_same_seed_same_run(self):
+        def trajectory(seed: int) -> list[tuple[int, int]]:
+            field = field_creator(
+                start_zombies=3, start_humans=30, max_food=2, seed=seed
+            )(pygame.Rect(0, 0, 300, 200))
+            field.simulation.run(60)
+            return [
+                each.rect.center for each in list(field.humans) + list(field.zombies)
+            ]
+
+        self.assertEqual(trajectory(11), trajectory(11))
+        self.assertNotEqual(trajectory(11), trajectory(12))
+
+    def test_food_tree_rebuilt_when_food_changes(self):
+        field = field_creator(start_zombies=0, start_humans=0, max_food=2)(
+            pygame.Rect(0, 0, 400, 300)
+        )
+        near, far = field.food
+        near.rect.center = (10, 10)
+        far.rect.center = (200, 150)
+        self.assertIs(near, field.closest_food(Point(20, 20))[0])
+        tree = field.food_tree.nodes
+        self.assertIs(near, field.closest_food(Point(30, 30))[0])
+        self.assertIs(tree, field.food_tree.nodes)
+        field.food.release(near)
+        self.assertIs(far, field.closest_food(Point(20, 20))[0])
+
+    def test_layers_of_an_area(self):
+        field = field_creator(start_zombies=10, start_humans=200, max_food=4, seed=3)(
+            pygame.Rect(0, 0, 2000, 1500)
+        )
+        area = pygame.Rect(500, 400, 600, 300)
+        groups: tuple[Iterable[Entity], ...] = (
+            field.food,
+            field.humans,
+            field.zombies,
+        )
+        for _ in range(3):
+            seen = area.inflate(20, 20)
+            for layer, group in zip(field.layers(area), groups):
+                self.assertEqual(
+                    [each for each in group if seen.collidepoint(each.rect.center)],
+                    list(layer),
+                )
+            field.simulation.run(5)
+
+    def test_layers_find_what_moved_after_the_grids(self):
+        field = field_creator(start_zombies=1, start_humans=2, max_food=0)(
+            pygame.Rect(0, 0, 400, 300)
+        )
+        (zombie,) = field.zombies
+        zombie.rect.center = (100, 100)
+        zombie.attack_wait = 100
+        bitten, walker = field.humans
+        bitten.rect.center = (102, 102)
+        bitten.current_dir = Direction(0, 0)
+        walker.rect.center = (396, 150)
+        walker.current_dir = Direction(1, 0)
+        field.layers(field.rect)
+        field.step()
+        _, humans, zombies = field.visible(pygame.Rect(0, 0, 200, 300))
+        self.assertEqual([walker], humans)
+        self.assertEqual(list(field.zombies), zombies)
+        self.assertEqual(2, len(zombies))
+
+    def test_entities_under(self):
+        field = field_creator(start_zombies=1, start_humans=1, max_food=0)(
+            pygame.Rect(0, 0, 400, 300)
+        )
+        (zombie,) = field.zombies
+        (human,) = field.humans
+        zombie.rect.center = (100, 100)
+        human.rect.center = (300, 200)
+        self.assertEqual([zombie], field.entities_under(Point(100, 100)))
+        human.rect.center = (102, 102)
+        # only the simulation moves things between ticks
+        field.tick += 1
+        self.assertEqual([human, zombie], field.entities_under(Point(101, 101)))
+        self.assertEqual([], field.entities_under(Point(300, 200)))
+
+    def test_humans_starve_when_due(self):
+        field = field_creator(start_zombies=0, start_humans=2, max_food=0)(
+            pygame.Rect(0, 0, 400, 300)
+        )
+        hungry, fed = field.humans
+        hungry.feed(0.001, 0)
+        field.schedule_starvation(hungry)
+        self.assertEqual(3, hungry.starves_at)
+        field.simulation.run(2)
+        self.assertTrue(hungry.alive())
+        self.assertAlmostEqual(0.0005, hungry.energy)
+        field.simulation.run(1)
+        self.assertFalse(hungry.alive())
+        self.assertEqual(1, field.counts.starved)
+        self.assertEqual(fed.full_energy - 0.001, fed.energy)
+
+    def test_eating_puts_off_starving(self):
+        field = field_creator(start_zombies=0, start_humans=1, max_food=1)(
+            pygame.Rect(0, 0, 400, 300)
+        )
+        (human,) = field.humans
+        (food,) = field.food
+        human.feed(0.001, 0)
+        field.schedule_starvation(human)
+        human.rect.center = food.rect.center
+        human.energy = 1.0
+        field.tick = 2
+        field.update_eaten_food()
+        self.assertEqual(2, human.fed_at)
+        field.tick = 3
+        field.starve()
+        self.assertTrue(human.alive())
+        self.assertEqual(human.full_energy, human.energy_at(3))
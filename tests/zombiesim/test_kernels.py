@@ -0,0 +1,136 @@
+import math
+from unittest import TestCase
+
+import pygame
+from zombiesim import kernels, snapshot
+from zombiesim.entities import HumanSprite, ZombieSprite
+from zombiesim.field import Field, field_creator
+from zombiesim.kernels import as_column, as_offsets
+from zombiesim.type_def import Direction
+
+
+def state(field: Field) -> list[tuple]:
+    return [
+        (each.rect.topleft, each.angle, each.current_dir, each.attack_wait)
+        for each in field.zombies
+    ] + [(each.rect.topleft, each.current_dir, each.energy) for each in field.humans]
+
+
+def one_at_a_time(field: Field) -> None:
+    """Update every sprite through its own update_state, as before batching"""
+    field.human_grid.rebuild(field.humans, field.rect)
+    field.zombies.update(field)
+    field.zombie_grid.rebuild(field.zombies, field.rect)
+    field.humans.update(field)
+
+
+def batched(field: Field) -> None:
+    field.update_zombies()
+    field.update_humans()
+
+
+class KernelsTest(TestCase):
+    def assert_batches_match(self, field: Field, ticks: int) -> None:
+        reference = snapshot.loads(snapshot.dumps(field))
+        for _ in range(ticks):
+            for each, update in ((field, batched), (reference, one_at_a_time)):
+                update(each)
+                each.update_humans_to_zombies()
+                each.update_eaten_food()
+                each.check_and_fix_edges()
+                each.check_food()
+                each.tick += 1
+        self.assertEqual(len(reference.humans), len(field.humans))
+        for mine, theirs in zip(state(field), state(reference)):
+            self.assertEqual(mine[0], theirs[0])
+            for got, expected in zip(mine[1:], theirs[1:]):
+                if isinstance(got, Direction):
+                    self.assertAlmostEqual(expected.x, got.x, places=9)
+                    self.assertAlmostEqual(expected.y, got.y, places=9)
+                else:
+                    self.assertAlmostEqual(expected, got, places=9)
+
+    def test_batches_match_sprite_updates(self):
+        field = field_creator(start_zombies=6, start_humans=80, max_food=4, seed=5)(
+            pygame.Rect(0, 0, 400, 300)
+        )
+        self.assert_batches_match(field, 150)
+
+    def test_idle_agents_match_sprite_updates(self):
+        activity = (ZombieSprite.activity_stats, HumanSprite.activity_stats)
+        for stats in activity:
+            stats.reset()
+        field = field_creator(start_zombies=4, start_humans=60, max_food=4, seed=8)(
+            pygame.Rect(0, 0, 2000, 1500)
+        )
+        self.assert_batches_match(field, 150)
+        for stats in activity:
+            self.assertGreater(stats.idle, 0)
+            self.assertGreater(stats.active, 0)
+
+    def test_zombies_chase_the_short_way_round(self):
+        angles = as_column([1.0])
+        kernels.zombie_headings(
+            as_column([5.0]),
+            as_column([450.0]),
+            as_column([0.0]),
+            as_column([0.0]),
+            as_offsets([0, 2]),
+            as_column([150.0, 1435.0]),
+            as_column([450.0, 450.0]),
+            1440.0,
+            900.0,
+            100.0,
+            angles,
+        )
+        self.assertAlmostEqual(math.pi, float(angles[0]))
+
+    def test_humans_run_away_the_short_way_round(self):
+        out_xs, out_ys = as_column([0.0]), as_column([0.0])
+        kernels.human_directions(
+            as_column([5.0]),
+            as_column([150.0]),
+            as_column([0.0]),
+            as_column([0.0]),
+            as_column([3.0]),
+            2.0,
+            as_offsets([0, 1]),
+            as_column([395.0]),
+            as_column([150.0]),
+            as_offsets([0]),
+            as_column([0.0]),
+            as_column([0.0]),
+            400.0,
+            300.0,
+            500.0,
+            50.0,
+            out_xs,
+            out_ys,
+        )
+        self.assertEqual([1.0], list(out_xs))
+        self.assertEqual([0.0], list(out_ys))
+
+    def test_only_hungry_humans_head_for_food(self):
+        out_xs, out_ys = as_column([0.0, 0.0]), as_column([0.0, 0.0])
+        kernels.human_directions(
+            as_column([100.0, 100.0]),
+            as_column([100.0, 100.0]),
+            as_column([0.0, 0.0]),
+            as_column([0.0, 0.0]),
+            as_column([1.0, 3.0]),
+            2.0,
+            as_offsets([0, 0, 0]),
+            as_column([]),
+            as_column([]),
+            as_offsets([1, 1]),
+            as_column([100.0, 100.0]),
+            as_column([160.0, 160.0]),
+            400.0,
+            300.0,
+            500.0,
+            50.0,
+            out_xs,
+            out_ys,
+        )
+        self.assertEqual([0.0, 0.0], list(out_xs))
+        self.assertEqual([1.0, 0.0], list(out_ys))
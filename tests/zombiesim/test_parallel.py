@@ -0,0 +1,129 @@
+import statistics
+import unittest
+from multiprocessing.shared_memory import SharedMemory
+from unittest import TestCase
+
+import pygame
+from zombiesim.simulation import Simulation
+from zombiesim.util import RandomStreams
+
+try:
+    import numpy as np
+    from zombiesim.parallel import TiledWorld, Tiling, grid_for, keyed_random
+    from zombiesim.vectorized import ArrayWorld
+except ImportError:  # numpy is optional
+    np = None  # type: ignore
+
+RECT = pygame.Rect(0, 0, 400, 300)
+
+
+def state(world: "TiledWorld") -> list:
+    """Everything about the agents, in id order so tiling does not show"""
+    result = []
+    for block, count in (
+        (world.zombies, world.zombie_count),
+        (world.humans, world.human_count),
+    ):
+        order = np.argsort(block["id"][:count])
+        for values in block.columns.values():
+            result.append(values[:count][order].tolist())
+    result.append(world.counts.as_dict())
+    return result
+
+
+@unittest.skipIf(np is None, "numpy not installed")
+class KeyedRandomTest(TestCase):
+    def test_depends_only_on_key(self):
+        ids = np.arange(1000)
+        first = keyed_random(5, 1, 10, ids)
+        self.assertEqual(first.tolist(), keyed_random(5, 1, 10, ids).tolist())
+        self.assertEqual(
+            first[500:].tolist(), keyed_random(5, 1, 10, ids[500:]).tolist()
+        )
+        self.assertNotEqual(first.tolist(), keyed_random(5, 2, 10, ids).tolist())
+        self.assertNotEqual(first.tolist(), keyed_random(5, 1, 11, ids).tolist())
+        self.assertTrue(((first >= 0) & (first < 1)).all())
+        self.assertAlmostEqual(0.5, float(first.mean()), delta=0.05)
+
+
+@unittest.skipIf(np is None, "numpy not installed")
+class TilingTest(TestCase):
+    def test_neighbours_wrap_without_repeats(self):
+        tiling = Tiling((0.0, 0.0), (400.0, 300.0), 2, 3)
+        self.assertEqual([0, 1, 2, 3, 4, 5], tiling.neighbours(0))
+        tiling = Tiling((0.0, 0.0), (400.0, 300.0), 4, 1)
+        self.assertEqual([0, 1, 3], tiling.neighbours(0))
+
+    def test_near_goes_the_short_way(self):
+        tiling = Tiling((0.0, 0.0), (400.0, 300.0), 4, 3)
+        points = np.array([[395.0, 50.0], [170.0, 50.0], [50.0, 250.0]])
+        self.assertEqual([True, False, True], tiling.near(points, 0, 60).tolist())
+
+    def test_grid_keeps_tiles_wider_than_halo(self):
+        self.assertEqual((2, 2), grid_for((1000.0, 1000.0), 4, 100.0))
+        self.assertEqual((3, 1), grid_for((400.0, 150.0), 4, 128.0))
+        self.assertEqual((1, 1), grid_for((100.0, 100.0), 8, 128.0))
+
+
+@unittest.skipIf(np is None, "numpy not installed")
+class TiledWorldTest(TestCase):
+    def world(self, zombies=0, humans=0, food=0, **kwargs) -> "TiledWorld":
+        world = TiledWorld(RECT, zombies, humans, food, RandomStreams(7), **kwargs)
+        self.addCleanup(world.close)
+        return world
+
+    def test_same_run_whatever_the_tiling(self):
+        def run(workers: int, grid: tuple[int, int]) -> list:
+            world = self.world(10, 120, 4, workers=workers, grid=grid)
+            self.assertEqual(grid[0] * grid[1], world.tiling.count)
+            Simulation(world, 2, 1).run(150)
+            return state(world)
+
+        single = run(1, (1, 1))
+        self.assertEqual(single, run(1, (3, 2)))
+        self.assertEqual(single, run(2, (2, 2)))
+
+    def test_human_bitten_twice_turns_once(self):
+        world = self.world(zombies=2, humans=1)
+        world.zombies["pos"][:2] = [[100, 100], [104, 100]]
+        world.humans["pos"][:1] = [[102, 102]]
+        world.retile()
+        world.update_humans_to_zombies()
+        world.check_food()
+        self.assertEqual(0, world.human_count)
+        self.assertEqual(3, world.zombie_count)
+        self.assertEqual(2, world.counts.bites)
+        self.assertEqual(1, world.counts.turns)
+        self.assertIn([102.0, 102.0], world.zombies["pos"][:3].tolist())
+
+    def test_food_is_eaten_across_a_tile_border(self):
+        world = self.world(humans=2, food=1, grid=(3, 2))
+        world.food["pos"][:1] = [[133, 50]]
+        world.humans["pos"][:2] = [[135, 55], [128, 45]]
+        world.humans["energy"][:2] = [1.0, 1.5]
+        world.humans["age"][:2] = 500
+        world.retile()
+        self.assertNotEqual(*world.tiling.tile_of(world.humans["pos"][:2]).tolist())
+        world.update_eaten_food()
+        self.assertEqual([23], world.food["amount"][:1].tolist())
+        self.assertEqual([0, 0], world.humans["age"][:2].tolist())
+
+    def test_matches_array_world_on_average(self):
+        tiled, array = [], []
+        for seed in range(8):
+            streams = RandomStreams(seed)
+            with TiledWorld(RECT, 40, 60, 3, streams, workers=1) as world:
+                Simulation(world, 2, 1).run(150)
+                tiled.append(world.counts.turns)
+            other = ArrayWorld(RECT, 40, 60, 3, RandomStreams(seed))
+            Simulation(other, 2, 1).run(150)
+            array.append(other.counts.turns)
+        self.assertAlmostEqual(statistics.mean(array), statistics.mean(tiled), delta=10)
+
+    def test_close_frees_shared_memory(self):
+        world = TiledWorld(RECT, 2, 10, 1, RandomStreams(1), workers=2, grid=(2, 1))
+        name = world.humans.memory.name
+        Simulation(world, 2, 1).run(5)
+        world.close()
+        with self.assertRaises(FileNotFoundError):
+            SharedMemory(name=name)
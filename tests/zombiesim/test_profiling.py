@@ -0,0 +1,110 @@
+import itertools
+import os
+import tempfile
+import threading
+import time
+from unittest import TestCase
+
+import pygame
+from zombiesim.event import EventLookup
+from zombiesim.field import field_creator
+from zombiesim.profiling import Overlay, Profiler, SpanStats, StackSampler, span
+from zombiesim.simulation import PHASES
+
+
+class ProfilerTest(TestCase):
+    def test_rolling_window(self):
+        ticks = itertools.count()
+        profiler = Profiler(clock=lambda: float(next(ticks)), window=3)
+        for _ in range(5):
+            profiler.time("step", lambda: None)
+        with profiler.span("draw"):
+            pass
+        self.assertEqual(5, profiler.calls["step"])
+        self.assertEqual(5.0, profiler.totals["step"])
+        self.assertEqual(3, len(profiler.spans["step"].samples))
+        self.assertEqual(5, profiler.spans["step"].calls)
+        self.assertEqual(1.0, profiler.spans["draw"].percentile(0.95))
+
+    def test_histogram(self):
+        stats = SpanStats()
+        for seconds in (0.0000005, 0.002, 0.003, 10.0):
+            stats.add(seconds)
+        counts = stats.histogram((0.000001, 0.001, 0.01))
+        self.assertEqual([1, 0, 2, 1], counts)
+
+    def test_span_only_times_with_a_profiler(self):
+        with span(None, "nothing"):
+            pass
+        profiler = Profiler()
+        with span(profiler, "something"):
+            pass
+        self.assertEqual(["something"], list(profiler.spans))
+
+    def test_field_phases_and_groups(self):
+        field = field_creator(start_zombies=2, start_humans=20, max_food=2, seed=1)(
+            pygame.Rect(0, 0, 400, 300)
+        )
+        profiler = Profiler()
+        field.simulation.timer = profiler
+        field.simulation.run(4)
+        field.layers(pygame.Rect(0, 0, 200, 150))
+        for name in PHASES + (
+            "update_humans.grid",
+            "update_humans.group",
+            "render.visible",
+        ):
+            self.assertIn(name, profiler.spans)
+        self.assertEqual(2, profiler.calls["update_zombies.group"])
+
+    def test_event_dispatch(self):
+        pygame.init()
+        self.addCleanup(pygame.quit)
+        events = EventLookup()
+        seen: list[pygame.event.Event] = []
+        events.add(pygame.USEREVENT, seen.append)
+        events.timer = Profiler()
+        pygame.event.post(pygame.event.Event(pygame.USEREVENT))
+        events.process_events()
+        self.assertEqual(1, len(seen))
+        self.assertEqual(1, events.timer.calls["process_events"])
+        self.assertEqual(1, events.timer.calls["event UserEvent"])
+
+
+class OverlayTest(TestCase):
+    def test_draws_only_when_visible(self):
+        profiler = Profiler()
+        profiler.time("step", lambda: None)
+        overlay = Overlay(profiler)
+        screen = pygame.Surface((400, 300))
+        self.assertIsNone(overlay.draw(screen))
+        overlay.toggle()
+        area = overlay.draw(screen)
+        assert area is not None
+        self.assertTrue(screen.get_rect().contains(area))
+        self.assertEqual((0, 0, 0, 255), tuple(screen.get_at(area.topleft)))
+
+
+def busy(until: float) -> None:
+    while time.monotonic() < until:
+        pass
+
+
+class StackSamplerTest(TestCase):
+    def test_writes_folded_stacks(self):
+        done = time.monotonic() + 0.3
+        worker = threading.Thread(target=busy, args=(done,))
+        worker.start()
+        sampler = StackSampler(worker.ident, interval=0.001)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "run.folded")
+            sampler.start(0.2, path)
+            self.assertTrue(sampler.running())
+            sampler.join()
+            worker.join()
+            with open(path) as written:
+                lines = written.read().splitlines()
+        self.assertTrue(lines)
+        stack, count = lines[0].rsplit(" ", 1)
+        self.assertGreater(int(count), 0)
+        self.assertTrue(stack.endswith(f"{__name__}.busy"), stack)
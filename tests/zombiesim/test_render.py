@@ -0,0 +1,74 @@
+from unittest import TestCase
+
+import pygame
+from zombiesim.camera import Camera
+from zombiesim.field import field_creator
+from zombiesim.render import DirtyRenderer
+
+
+class DirtyRendererTest(TestCase):
+    def setUp(self):
+        self.field = field_creator(
+            start_zombies=3, start_humans=12, max_food=2, seed=4
+        )(pygame.Rect(0, 0, 320, 240))
+        self.screen = pygame.Surface((320, 240))
+        self.renderer = DirtyRenderer(tile_size=16)
+
+    def reference(self) -> bytes:
+        expected = pygame.Surface((320, 240))
+        expected.fill(pygame.Color("black"))
+        self.field.draw(expected)
+        return pygame.image.tobytes(expected, "RGB")
+
+    def test_partial_redraws_match_full_ones(self):
+        self.renderer.draw(self.screen, self.field.layers())
+        for _ in range(60):
+            self.field.step()
+            self.renderer.draw(self.screen, self.field.layers())
+            self.assertEqual(self.reference(), pygame.image.tobytes(self.screen, "RGB"))
+        self.assertGreater(self.renderer.partial_redraws, 0)
+
+    def test_nothing_changed_nothing_drawn(self):
+        self.assertEqual(
+            [self.screen.get_rect()],
+            self.renderer.draw(self.screen, self.field.layers()),
+        )
+        self.assertEqual([], self.renderer.draw(self.screen, self.field.layers()))
+        self.assertEqual(1, self.renderer.unchanged)
+
+    def test_only_changed_tiles_are_updated(self):
+        self.renderer.draw(self.screen, self.field.layers())
+        food, *_ = self.field.food
+        food.rect.topleft = (100, 100)
+        changed = self.renderer.draw(self.screen, self.field.layers())
+        self.assertLessEqual(len(changed), 8)
+        self.assertTrue(any(each.collidepoint(100, 100) for each in changed))
+
+    def test_falls_back_to_full_redraw(self):
+        self.renderer.full_redraw_fraction = 0.0
+        self.renderer.draw(self.screen, self.field.layers())
+        self.field.step()
+        self.assertEqual(
+            [self.screen.get_rect()],
+            self.renderer.draw(self.screen, self.field.layers()),
+        )
+        self.assertEqual(2, self.renderer.full_redraws)
+
+    def test_camera_draws_its_part_of_the_world(self):
+        world = pygame.Rect(0, 0, 640, 480)
+        field = field_creator(start_zombies=6, start_humans=60, max_food=4, seed=2)(
+            world
+        )
+        camera = Camera(world, (320, 240))
+        camera.pan(150, 100)
+        for _ in range(20):
+            field.step()
+            self.renderer.draw(self.screen, field.layers(camera.area()), camera)
+            whole = pygame.Surface(world.size)
+            whole.fill(pygame.Color("black"))
+            field.draw(whole)
+            expected = whole.subsurface(pygame.Rect((150, 100), self.screen.get_size()))
+            self.assertEqual(
+                pygame.image.tobytes(expected, "RGB"),
+                pygame.image.tobytes(self.screen, "RGB"),
+            )
@@ -0,0 +1,78 @@
+from unittest import TestCase
+
+from zombiesim.scheduler import MAX_SPEED, FixedTimestep
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FixedTimestepTest(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.ticks = 0
+        self.alive = True
+
+    def step(self) -> bool:
+        self.ticks += 1
+        return self.alive
+
+    def scheduler(self, **kwargs) -> FixedTimestep:
+        return FixedTimestep(self.step, 100, clock=self.clock, **kwargs)
+
+    def frames(self, scheduler: FixedTimestep, seconds: list[float]) -> list[int]:
+        ran = []
+        for each in seconds:
+            self.clock.now += each
+            ran.append(scheduler.advance())
+        return ran
+
+    def test_ticks_follow_real_time_not_frames(self):
+        smooth = self.scheduler()
+        self.frames(smooth, [0.0625] * 32)
+        choppy = self.scheduler()
+        self.frames(choppy, [0.25] * 8)
+        self.assertEqual(20, smooth.steps)
+        self.assertEqual(20, choppy.steps)
+        self.assertEqual(40, self.ticks)
+
+    def test_leftover_time_carries_over(self):
+        scheduler = self.scheduler()
+        self.assertEqual([0, 1, 0, 1], self.frames(scheduler, [0.06] * 4))
+
+    def test_speed_multiplier(self):
+        scheduler = self.scheduler(speed=10)
+        self.assertEqual([10], self.frames(scheduler, [0.1]))
+
+    def test_catch_up_is_capped(self):
+        scheduler = self.scheduler(max_frame_ms=250)
+        self.assertEqual([2], self.frames(scheduler, [5.0]))
+        self.assertEqual(0.5, scheduler.accumulated_ms / scheduler.step_ms)
+
+    def test_max_speed_fills_the_budget(self):
+        def step() -> bool:
+            self.clock.now += 0.001
+            self.ticks += 1
+            return True
+
+        scheduler = FixedTimestep(
+            step, 100, speed=MAX_SPEED, budget_ms=10, clock=self.clock
+        )
+        self.assertEqual(10, scheduler.advance())
+        self.assertEqual("max", scheduler.describe())
+
+    def test_stops_when_step_says_done(self):
+        scheduler = self.scheduler(speed=10)
+        self.alive = False
+        self.assertEqual([1], self.frames(scheduler, [0.1]))
+        self.assertEqual(0, scheduler.accumulated_ms)
+
+    def test_reset_forgets_the_pause(self):
+        scheduler = self.scheduler()
+        self.clock.now += 60
+        scheduler.reset()
+        self.assertEqual([1], self.frames(scheduler, [0.1]))
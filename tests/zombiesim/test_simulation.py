@@ -0,0 +1,68 @@
+import sys
+from unittest import TestCase
+
+from zombiesim.simulation import PhaseTimer, Simulation
+
+
+class CountingWorld:
+    def __init__(self, lifetime: int = 100):
+        self.calls: list[str] = []
+        self.tick = 0
+        self.lifetime = lifetime
+
+    def update_zombies(self) -> None:
+        self.calls.append("zombies")
+
+    def update_humans(self) -> None:
+        self.calls.append("humans")
+
+    def update_humans_to_zombies(self) -> None:
+        self.calls.append("bites")
+
+    def update_eaten_food(self) -> None:
+        self.calls.append("eating")
+
+    def check_and_fix_edges(self) -> None:
+        self.calls.append("edges")
+
+    def check_food(self) -> None:
+        self.calls.append("food")
+        self.lifetime -= 1
+
+    def all_dead(self) -> bool:
+        return self.lifetime <= 0
+
+
+class SimulationTest(TestCase):
+    def test_zombies_every_other_tick(self):
+        world = CountingWorld()
+        Simulation(world, zombie_every=2, human_every=1).run(4)
+        self.assertEqual(2, world.calls.count("zombies"))
+        self.assertEqual(4, world.calls.count("humans"))
+        self.assertEqual(4, world.calls.count("bites"))
+        self.assertEqual(4, world.calls.count("food"))
+
+    def test_run_stops_when_all_dead(self):
+        world = CountingWorld(lifetime=3)
+        simulation = Simulation(world)
+        self.assertEqual(3, simulation.run())
+        self.assertEqual(3, simulation.tick)
+        self.assertEqual(3, world.tick)
+
+    def test_phase_timer(self):
+        ticks = iter(range(100))
+        timer = PhaseTimer(clock=lambda: float(next(ticks)))
+        Simulation(CountingWorld(), timer=timer).run(2)
+        self.assertEqual(1, timer.calls["update_zombies"])
+        self.assertEqual(2, timer.calls["check_food"])
+        self.assertEqual(2.0, timer.totals["update_humans"])
+
+    def test_no_pygame_needed(self):
+        self.assertNotIn("pygame", vars(sys.modules["zombiesim.simulation"]))
+
+    def test_observers_see_every_tick(self):
+        seen: list[int] = []
+        simulation = Simulation(CountingWorld(lifetime=3))
+        simulation.observers.append(lambda each: seen.append(each.tick))
+        simulation.run()
+        self.assertEqual([1, 2, 3], seen)
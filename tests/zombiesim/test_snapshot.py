@@ -0,0 +1,62 @@
+import gc
+import os
+import tempfile
+from unittest import TestCase
+
+import pygame
+from zombiesim import snapshot
+from zombiesim.field import Field, field_creator
+
+
+def state(field: Field) -> list[tuple]:
+    return (
+        [(each.rect.center, each.angle, each.attack_wait) for each in field.zombies]
+        + [(each.rect.center, each.energy) for each in field.humans]
+        + [(each.rect.center, each.amount) for each in field.food]
+    )
+
+
+class SnapshotTest(TestCase):
+    def setUp(self):
+        self.field = field_creator(
+            start_zombies=4, start_humans=60, max_food=3, seed=11
+        )(pygame.Rect(0, 0, 400, 300))
+        self.field.simulation.run(40)
+
+    def test_round_trip(self):
+        restored = snapshot.loads(snapshot.dumps(self.field))
+        self.assertEqual(self.field.tick, restored.tick)
+        self.assertEqual(self.field.rect, restored.rect)
+        self.assertEqual(self.field.max_food, restored.max_food)
+        self.assertEqual(self.field.streams.seed, restored.streams.seed)
+        self.assertEqual(state(self.field), state(restored))
+
+    def test_restored_run_carries_on_identically(self):
+        restored = snapshot.loads(snapshot.dumps(self.field))
+        self.field.simulation.run(80)
+        restored.simulation.run(80)
+        self.assertEqual(state(self.field), state(restored))
+
+    def test_save_and_load_file(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "run.zsim")
+            self.field.save(path)
+            restored = Field.load(path)
+        self.assertEqual(state(self.field), state(restored))
+
+    def test_leaves_gc_as_it_was(self):
+        data = snapshot.dumps(self.field)
+        self.assertTrue(gc.isenabled())
+        gc.disable()
+        self.addCleanup(gc.enable)
+        snapshot.loads(snapshot.dumps(self.field))
+        self.assertFalse(gc.isenabled())
+        gc.enable()
+        snapshot.loads(data)
+        self.assertTrue(gc.isenabled())
+
+    def test_rejects_other_files(self):
+        with self.assertRaises(snapshot.SnapshotError):
+            snapshot.loads(b"not a snapshot at all, not even close....")
+        with self.assertRaises(snapshot.SnapshotError):
+            snapshot.loads(snapshot.dumps(self.field)[:-10])
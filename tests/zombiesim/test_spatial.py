@@ -0,0 +1,148 @@
+from dataclasses import dataclass
+from unittest import TestCase
+
+import math
+import random
+
+import pygame
+from zombiesim.entities import Entity
+from zombiesim.spatial import NearestTree, Reach, SpatialGrid
+from zombiesim.type_def import Point
+
+
+@dataclass(frozen=True)
+class Thing:
+    position: Point
+
+
+class SpatialGridTest(TestCase):
+    def setUp(self):
+        self.grid: SpatialGrid[Thing] = SpatialGrid(pygame.Rect(0, 0, 1000, 500), 100)
+
+    def test_near_finds_within_radius(self):
+        close = Thing(Point(140, 100))
+        far = Thing(Point(300, 100))
+        self.grid.rebuild([far, close])
+        self.assertEqual([close], self.grid.near(Point(100, 100), 50))
+
+    def test_near_keeps_insertion_order(self):
+        things = [Thing(Point(100 + each * 30, 100)) for each in range(5)]
+        self.grid.rebuild(things)
+        self.assertEqual(things, self.grid.near(Point(160, 100), 100))
+
+    def test_near_wraps_around_edges(self):
+        across = Thing(Point(990, 495))
+        self.grid.rebuild([across])
+        self.assertEqual([across], self.grid.near(Point(5, 5), 20))
+
+    def test_closest(self):
+        first = Thing(Point(500, 250))
+        second = Thing(Point(700, 250))
+        self.grid.rebuild([first, second])
+        found, dist = self.grid.closest(Point(650, 250))
+        self.assertIs(second, found)
+        self.assertEqual(50, dist)
+
+    def test_closest_wraps_and_filters(self):
+        wrapped = Thing(Point(995, 250))
+        skipped = Thing(Point(20, 250))
+        self.grid.rebuild([wrapped, skipped])
+        found, dist = self.grid.closest(
+            Point(10, 250), lambda each: each is not skipped
+        )
+        self.assertIs(wrapped, found)
+        self.assertEqual(15, dist)
+
+    def test_closest_empty(self):
+        self.grid.rebuild([])
+        self.assertEqual((None, 0.0), self.grid.closest(Point(10, 10)))
+
+    def test_within(self):
+        rng = random.Random(5)
+        things = [
+            Thing(Point(rng.randrange(1000), rng.randrange(500))) for _ in range(300)
+        ]
+        self.grid.rebuild(things)
+        for area in (
+            pygame.Rect(150, 120, 300, 200),
+            pygame.Rect(-50, -50, 120, 90),
+            pygame.Rect(0, 0, 1000, 500),
+        ):
+            self.assertEqual(
+                [
+                    each
+                    for each in things
+                    if area.collidepoint(each.position.x, each.position.y)
+                ],
+                self.grid.within(area),
+            )
+
+    def test_pairs(self):
+        first = Thing(Point(100, 100))
+        second = Thing(Point(110, 100))
+        self.grid.rebuild([first, second])
+        probe = Thing(Point(105, 100))
+        lonely = Thing(Point(600, 400))
+        self.assertEqual(
+            [(probe, first), (probe, second)],
+            list(self.grid.pairs([lonely, probe], 10)),
+        )
+
+
+class ReachTest(TestCase):
+    def test_covers_whatever_near_could_find(self):
+        rng = random.Random(7)
+        grid: SpatialGrid[Thing] = SpatialGrid(pygame.Rect(0, 0, 600, 400), 20)
+        for count in (3, 200):
+            grid.rebuild(
+                Thing(Point(rng.randrange(600), rng.randrange(400)))
+                for _ in range(count)
+            )
+            reach = Reach(grid, 30)
+            self.assertEqual(count == 3, reach.marked)
+            for _ in range(500):
+                point = Point(rng.randrange(600), rng.randrange(400))
+                if grid.near(point, 30):
+                    self.assertTrue(reach.covers(point.x, point.y))
+
+    def test_wraps_around_edges(self):
+        grid: SpatialGrid[Thing] = SpatialGrid(pygame.Rect(0, 0, 600, 400), 20)
+        grid.rebuild([Thing(Point(2, 2))])
+        reach = Reach(grid, 30)
+        self.assertTrue(reach.covers(595, 395))
+        self.assertFalse(reach.covers(300, 200))
+        self.assertFalse(
+            Reach(SpatialGrid(pygame.Rect(0, 0, 60, 40), 20), 30).covers(1, 1)
+        )
+        grid.rebuild([Thing(Point(2, 2))], pygame.Rect(0, 0, 60, 40))
+        self.assertTrue(Reach(grid, 30).everywhere)
+
+
+class NearestTreeTest(TestCase):
+    def test_matches_closest_to(self):
+        rect = pygame.Rect(0, 0, 60, 40)
+        span = math.hypot(60, 40)
+        rng = random.Random(3)
+        seeker = Entity(pygame.Color("white"))
+        for count in (1, 5, 40, 300):
+            # lots of ties on a small integer grid
+            things = [
+                Thing(Point(rng.randrange(60), rng.randrange(40))) for _ in range(count)
+            ]
+            tree = NearestTree(things)
+            for _ in range(50):
+                seeker.rect.center = rng.randrange(60), rng.randrange(40)
+                found, dist = tree.closest(seeker.position, span)
+                expected, expected_dist = seeker.closest_to(things, rect)
+                self.assertIs(expected, found)
+                self.assertEqual(expected_dist, dist)
+
+    def test_folds_the_far_side(self):
+        tree = NearestTree([Thing(Point(50, 0)), Thing(Point(98, 0))])
+        found, dist = tree.closest(Point(0, 0), 100)
+        assert found is not None
+        self.assertEqual(Point(98, 0), found.position)
+        self.assertEqual(2, dist)
+
+    def test_empty(self):
+        self.assertEqual((None, 0.0), NearestTree([]).closest(Point(1, 1), 100))
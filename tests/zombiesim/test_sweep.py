@@ -0,0 +1,61 @@
+import csv
+import os
+import tempfile
+from unittest import TestCase
+
+import pygame
+from zombiesim import entities, sweep
+from zombiesim.entities import HumanSprite
+from zombiesim.field import field_creator
+
+
+class SweepTest(TestCase):
+    def test_run_one_restores_constants(self):
+        vision = entities.ZOMBIE_VISION
+        result = sweep.run_one(
+            {"INITIAL_HUMANS": 10, "ZOMBIE_VISION": 5, "WIDTH": 200, "HEIGHT": 200},
+            seed=1,
+            max_ticks=10,
+        )
+        self.assertEqual(vision, entities.ZOMBIE_VISION)
+        self.assertEqual(10, result["ticks"])
+        self.assertEqual(1.0, result["sim_seconds"])
+
+    def test_swept_vision_is_used(self):
+        previous = sweep.apply_entity_params({"HUMAN_VISION": 200})
+        for name, value in previous.items():
+            self.addCleanup(setattr, entities, name, value)
+        field = field_creator(start_zombies=1, start_humans=1, max_food=0, seed=1)(
+            pygame.Rect(0, 0, 1000, 1000)
+        )
+        (zombie,) = field.zombies
+        (human,) = field.humans
+        zombie.rect.center = 650, 500
+        human.rect.center = 500, 500
+        HumanSprite.activity_stats.reset()
+        field.tick = 1
+        field.update_humans()
+        stats = HumanSprite.activity_stats
+        self.assertEqual((1, 0), (stats.active, stats.idle))
+        self.assertLess(human.current_dir.x, 0)
+
+    def test_resumes_where_it_left_off(self):
+        space = {"INITIAL_HUMANS": [5, 10], "WIDTH": [200], "HEIGHT": [200]}
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "sweep.csv")
+            self.assertEqual(2, sweep.sweep(space, [0], output, max_ticks=5, workers=1))
+            self.assertEqual(
+                2, sweep.sweep(space, [0, 1], output, max_ticks=5, workers=1)
+            )
+            self.assertEqual(
+                0, sweep.sweep(space, [0, 1], output, max_ticks=5, workers=1)
+            )
+            with open(output, newline="") as written:
+                rows = list(csv.DictReader(written))
+        self.assertEqual(4, len(rows))
+        self.assertEqual({"0", "1"}, {row["seed"] for row in rows})
+
+    def test_parse_seeds(self):
+        self.assertEqual([0, 1, 2], sweep.parse_seeds("3"))
+        self.assertEqual([4, 5, 6], sweep.parse_seeds("4-6"))
+        self.assertEqual([1, 9], sweep.parse_seeds("1,9"))
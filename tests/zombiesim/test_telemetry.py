@@ -0,0 +1,73 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import pygame
+from zombiesim import sweep
+from zombiesim.field import field_creator
+from zombiesim.simulation import PHASES
+from zombiesim.telemetry import TelemetryRecorder, TelemetryWriter, read_records
+
+
+class TelemetryTest(TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+
+    def record(self, name: str, ticks: int, batch_size: int = 7) -> list[dict]:
+        path = os.path.join(self.folder.name, name)
+        field = field_creator(start_zombies=5, start_humans=80, max_food=3, seed=2)(
+            pygame.Rect(0, 0, 300, 200)
+        )
+        with TelemetryWriter(path, batch_size=batch_size) as writer:
+            TelemetryRecorder(writer, {"run": "a"}).attach(field.simulation)
+            field.simulation.run(ticks)
+        self.assertEqual(ticks, writer.written)
+        return list(read_records(path))
+
+    def test_one_record_per_tick(self):
+        records = self.record("run.jsonl", 30)
+        self.assertEqual(list(range(1, 31)), [each["tick"] for each in records])
+        self.assertEqual({"a"}, {each["run"] for each in records})
+        for name in PHASES:
+            self.assertIn(f"ms_{name}", records[0])
+
+    def test_events_add_up(self):
+        records = self.record("run.jsonl", 200)
+        last = records[-1]
+        turns = sum(each["turns"] for each in records)
+        starved = sum(each["starved"] for each in records)
+        self.assertGreater(turns, 0)
+        self.assertGreaterEqual(sum(each["bites"] for each in records), turns)
+        self.assertEqual(85, last["humans"] + last["zombies"] + starved)
+        self.assertEqual(5 + turns, last["zombies"])
+
+    def test_csv_appends(self):
+        first = self.record("run.csv", 10)
+        both = self.record("run.csv", 10)
+        self.assertEqual(20, len(both))
+        self.assertEqual(first, both[:10])
+        self.assertIsInstance(first[0]["mean_energy"], float)
+
+    def test_errors_are_raised(self):
+        # a folder cannot be opened for appending
+        writer = TelemetryWriter(self.folder.name, batch_size=1)
+        writer.write({"tick": 1})
+        writer._thread.join()
+        with self.assertRaises(OSError):
+            writer.write({"tick": 2})
+        with self.assertRaises(OSError):
+            writer.flush()
+        with self.assertRaises(OSError):
+            writer.close()
+
+    def test_sweep_writes_a_file_per_run(self):
+        folder = os.path.join(self.folder.name, "ticks")
+        output = os.path.join(self.folder.name, "sweep.csv")
+        space = {"INITIAL_HUMANS": [5, 10], "WIDTH": [200], "HEIGHT": [200]}
+        sweep.sweep(space, [0], output, max_ticks=5, workers=1, telemetry=folder)
+        files = sorted(os.listdir(folder))
+        self.assertEqual(2, len(files))
+        records = list(read_records(os.path.join(folder, files[0])))
+        self.assertEqual(5, len(records))
+        self.assertIn("seed=0", records[0]["key"])
@@ -0,0 +1,123 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import pygame
+from zombiesim.camera import Camera
+from zombiesim.field import Field, field_creator
+from zombiesim.trajectory import (
+    FOOD,
+    HUMAN,
+    ZOMBIE,
+    Replay,
+    TrajectoryError,
+    TrajectoryReader,
+    TrajectoryRecorder,
+)
+
+
+def positions(field: Field) -> list[tuple[int, int, int]]:
+    return sorted(
+        [(ZOMBIE, *each.rect.center) for each in field.zombies]
+        + [(HUMAN, *each.rect.center) for each in field.humans]
+        + [(FOOD, *each.rect.center) for each in field.food]
+    )
+
+
+class TrajectoryTest(TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.path = os.path.join(folder.name, "run.ztr")
+        self.field = field_creator(
+            start_zombies=6, start_humans=80, max_food=3, seed=5
+        )(pygame.Rect(0, 0, 300, 200))
+        self.expected: list[list[tuple[int, int, int]]] = []
+
+        def remember(_) -> None:
+            self.expected.append(positions(self.field))
+
+        self.recorder = TrajectoryRecorder(self.path, self.field.rect, keyframe_every=8)
+        self.recorder.attach(self.field.simulation)
+        self.addCleanup(self.recorder.close)
+        self.field.simulation.observers.append(remember)
+        self.field.simulation.run(150)
+
+    def read(self) -> TrajectoryReader:
+        reader = TrajectoryReader(self.path)
+        self.addCleanup(reader.close)
+        return reader
+
+    def decoded(self, reader: TrajectoryReader, number: int) -> list:
+        frame = reader.frame(number)
+        return sorted(zip(frame.kinds, frame.xs, frame.ys))
+
+    def test_every_tick_decodes_exactly(self):
+        self.recorder.close()
+        reader = self.read()
+        self.assertEqual(150, len(reader))
+        self.assertEqual((300, 200), (reader.width, reader.height))
+        for number, expected in enumerate(self.expected):
+            self.assertEqual(expected, self.decoded(reader, number))
+            self.assertEqual(number + 1, reader.tick_of(number))
+
+    def test_seeks_backwards(self):
+        self.recorder.close()
+        reader = self.read()
+        for number in (149, 3, 77, 76, 75, 0, 148):
+            self.assertEqual(self.expected[number], self.decoded(reader, number))
+
+    def test_ids_follow_agents(self):
+        self.recorder.close()
+        reader = self.read()
+        first, second = reader.frame(20), reader.frame(21)
+        self.assertEqual(len(set(first.ids)), len(first.ids))
+        self.assertTrue(set(first.ids) & set(second.ids))
+
+    def test_reads_without_footer(self):
+        self.recorder.out.flush()
+        reader = self.read()
+        self.assertEqual(150, len(reader))
+        self.assertEqual(self.expected[-1], self.decoded(reader, 149))
+
+    def test_rejects_other_files(self):
+        with open(self.path, "wb") as out:
+            out.write(b"something else entirely")
+        with self.assertRaises(TrajectoryError):
+            TrajectoryReader(self.path)
+
+    def test_replay_controls(self):
+        self.recorder.close()
+        playback = Replay(self.read())
+        playback.faster()
+        playback.advance()
+        self.assertEqual(2, playback.position)
+        playback.reverse()
+        playback.advance()
+        playback.advance()
+        self.assertEqual(0, playback.position)
+        playback.step(5)
+        self.assertTrue(playback.paused)
+        playback.advance()
+        self.assertEqual(5, playback.position)
+        playback.seek(1000)
+        self.assertEqual(149, playback.position)
+        screen = pygame.Surface((300, 200))
+        playback.draw(screen)
+        self.assertIn("tick 150", playback.status())
+
+    def test_replay_draws_through_a_camera(self):
+        self.recorder.close()
+        playback = Replay(self.read())
+        screen = pygame.Surface((60, 40))
+        camera = Camera(pygame.Rect(0, 0, 300, 200), (60, 40))
+        camera.show_all()
+        playback.draw(screen, camera)
+        # the whole world, shrunk onto the small screen
+        self.assertTrue(
+            any(
+                screen.get_at((x, y))[:3] != (0, 0, 0)
+                for x in range(60)
+                for y in range(40)
+            )
+        )
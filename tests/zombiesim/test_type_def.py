@@ -1,5 +1,10 @@
 from unittest import TestCase
-from zombiesim.type_def import Direction, Point
+from zombiesim.type_def import (
+    Direction,
+    MutablePoint,
+    Point,
+    direction_and_distance,
+)
 
 
 class DirectionTest(TestCase):
@@ -14,6 +19,18 @@ class DirectionTest(TestCase):
         self.assertEqual(-1, result.x)
         self.assertEqual(1, result.y)
 
+    def test_towards_is_normalize(self):
+        self.assertEqual(Direction(3, -4).normalize(), Direction.towards(3, -4))
+        self.assertEqual(Direction(0, 0), Direction.towards(0, 0))
+
+    def test_direction_and_distance(self):
+        src, dest = Point(1.5, 2.0), Point(-7.25, 11.0)
+        direc, dist = direction_and_distance(src, dest)
+        self.assertEqual(Direction.from_points(src, dest), direc)
+        self.assertEqual(src.distance(dest), dist)
+        self.assertEqual((Direction(0, 0), 0), direction_and_distance(src, src))
+
+
 class PointTest(TestCase):
     def test_distance(self):
         self.assertEqual(3, Point(0, 0).distance(Point(3, 0)))
@@ -26,3 +43,18 @@ class PointTest(TestCase):
     def test_diff_points(self):
         result = Point(1, 1) - Point(3, 4)
         self.assertEqual(Point(-2, -3), result)
+
+    def test_values(self):
+        self.assertEqual(hash(Point(1, 2)), hash(Point(1.0, 2.0)))
+        self.assertNotEqual(Point(1, 2), Direction(1, 2))
+        self.assertEqual("Point(x=1, y=2)", repr(Point(1, 2)))
+        with self.assertRaises(AttributeError):
+            Point(1, 2).z = 3  # type: ignore
+
+
+class MutablePointTest(TestCase):
+    def test_move_in_place(self):
+        goto = MutablePoint(1, 1)
+        goto.move(Direction(0, 1), 3)
+        goto.move(Direction(1, 0), -2)
+        self.assertEqual(Point(-1, 4), goto.to_point())
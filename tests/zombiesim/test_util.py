@@ -4,18 +4,106 @@ Created on Dec 7, 2014
 @author: bbuxton
 """
 
+import gc
 import unittest
 from zombiesim.type_def import Point
 
-from zombiesim.util import xfrange
+from zombiesim.util import (
+    CacheStats,
+    GcStats,
+    RandomStreams,
+    VisionCache,
+    steps_until_empty,
+    xfrange,
+)
 
 
 class UtilTest((unittest.TestCase)):
 
-
     def test_xfrange(self):
         result = xfrange(0, 1.0, 0.5)
         self.assertEqual(round(0, 1), round(next(result), 1))
         self.assertEqual(round(0.5, 1), round(next(result), 1))
         self.assertRaises(StopIteration, next, result)
 
+    def test_steps_until_empty_counts_like_xfrange(self):
+        for start in (0.0, 0.3217, 2.7183, 3.99991):
+            expected = len(list(xfrange(start, 0, -0.0005)))
+            self.assertEqual(expected, steps_until_empty(start, 0.0005))
+        # where adding up -0.0005 leaves a little over
+        self.assertEqual(2000, steps_until_empty(1.0, 0.0005))
+        self.assertEqual(2, steps_until_empty(1.0, 0.5))
+
+
+class RandomStreamsTest(unittest.TestCase):
+    def test_same_seed_same_numbers(self):
+        first = RandomStreams(42)
+        second = RandomStreams(42)
+        self.assertEqual(first.movement.random(), second.movement.random())
+        self.assertEqual(first.spawn.random(), second.spawn.random())
+
+    def test_streams_are_independent(self):
+        first = RandomStreams(42)
+        second = RandomStreams(42)
+        first.spawn.random()
+        self.assertEqual(first.lifetime.random(), second.lifetime.random())
+        self.assertNotEqual(first.spawn.random(), first.movement.random())
+
+
+class Mortal:
+    def __init__(self):
+        self.living = True
+
+    def alive(self) -> bool:
+        return self.living
+
+
+class VisionCacheTest(unittest.TestCase):
+    def test_recomputes_after_lifetime(self):
+        stats = CacheStats()
+        cache: VisionCache[Mortal] = VisionCache(3, stats)
+        computed: list[int] = []
+
+        def compute() -> list[Mortal]:
+            computed.append(1)
+            return [Mortal()]
+
+        for tick in range(7):
+            cache.lookup(tick, compute)
+        self.assertEqual(3, len(computed))
+        self.assertEqual((4, 3), (stats.hits, stats.misses))
+
+    def test_drops_the_dead(self):
+        cache: VisionCache[Mortal] = VisionCache(10, CacheStats())
+        first, second = Mortal(), Mortal()
+        cache.lookup(0, lambda: [first, second])
+        first.living = False
+        self.assertEqual([second], cache.lookup(1, lambda: []))
+
+    def test_lookup_nothing(self):
+        stats = CacheStats()
+        cache: VisionCache[Mortal] = VisionCache(3, stats)
+        someone = Mortal()
+        cache.lookup(0, lambda: [someone])
+        self.assertTrue(cache.fresh(2))
+        self.assertFalse(cache.lookup_nothing(2))
+        self.assertEqual([someone], cache.seen)
+        someone.living = False
+        self.assertTrue(cache.lookup_nothing(2))
+        self.assertFalse(cache.fresh(3))
+        self.assertTrue(cache.lookup_nothing(3))
+        self.assertEqual([], cache.lookup(5, lambda: [Mortal()]))
+        self.assertEqual((2, 2), (stats.hits, stats.misses))
+
+
+class GcStatsTest(unittest.TestCase):
+    def test_counts_collections_while_installed(self):
+        stats = GcStats().install()
+        try:
+            gc.collect()
+        finally:
+            stats.uninstall()
+        self.assertEqual(1, stats.collections[2])
+        self.assertGreaterEqual(stats.seconds, 0.0)
+        gc.collect()
+        self.assertEqual(1, stats.collections[2])
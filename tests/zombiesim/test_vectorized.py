@@ -0,0 +1,163 @@
+import unittest
+from dataclasses import dataclass
+from unittest import TestCase, mock
+
+import pygame
+from zombiesim import entities
+from zombiesim.field import field_creator
+from zombiesim.simulation import Simulation
+from zombiesim.spatial import NearestTree
+from zombiesim.type_def import Point
+from zombiesim.util import RandomStreams
+
+try:
+    import numpy as np
+    from zombiesim.vectorized import ArrayWorld, CellIndex, wrapped
+except ImportError:  # numpy is optional
+    np = None  # type: ignore
+
+
+@dataclass
+class Thing:
+    position: Point
+
+
+@unittest.skipIf(np is None, "numpy not installed")
+class CellIndexTest(TestCase):
+    def test_pairs_match_brute_force(self):
+        rng = np.random.default_rng(3)
+        points = rng.integers(0, 500, (200, 2)).astype(float)
+        queries = rng.integers(0, 500, (50, 2)).astype(float)
+        index = CellIndex(points, (0.0, 0.0), (500.0, 500.0), 40)
+        query, found, _ = index.pairs(queries, 40)
+        delta = points[None, :, :] - queries[:, None, :]
+        dist = np.hypot(wrapped(delta[..., 0], 500), wrapped(delta[..., 1], 500))
+        expected = set(zip(*np.nonzero(dist <= 40)))
+        self.assertEqual(expected, set(zip(query.tolist(), found.tolist())))
+
+    def test_closest(self):
+        points = np.array([[10.0, 10.0], [490.0, 10.0], [200.0, 200.0]])
+        index = CellIndex(points, (0.0, 0.0), (500.0, 500.0), 50)
+        result = index.closest(np.array([[495.0, 10.0], [300.0, 300.0]]), 50)
+        self.assertEqual([1, -1], result.tolist())
+
+
+@unittest.skipIf(np is None, "numpy not installed")
+class ArrayWorldTest(TestCase):
+    def world(self, zombies=0, humans=0, food=0) -> "ArrayWorld":
+        return ArrayWorld(
+            pygame.Rect(0, 0, 400, 300),
+            zombies,
+            humans,
+            food,
+            streams=RandomStreams(7),
+        )
+
+    def test_human_bitten_twice_turns_once(self):
+        world = self.world(zombies=2, humans=1)
+        world.zombie_pos[:] = [[100, 100], [104, 100]]
+        world.human_pos[:] = [[102, 102]]
+        world.update_humans_to_zombies()
+        self.assertEqual(0, len(world.human_pos))
+        self.assertEqual(3, len(world.zombie_pos))
+        self.assertEqual([102.0, 102.0], world.zombie_pos[2].tolist())
+
+    def test_only_hungry_humans_eat(self):
+        world = self.world(humans=2, food=1)
+        world.food_pos[:] = [[50, 50]]
+        world.human_pos[:] = [[52, 55], [48, 45]]
+        world.human_energy[:] = [1.0, 3.0]
+        world.tick = 30
+        world.update_eaten_food()
+        self.assertEqual([24], world.food_amount.tolist())
+        self.assertEqual([30, 0], world.fed_at.tolist())
+
+    def test_closest_food_as_the_tree_finds_it(self):
+        world = self.world(food=12)
+        rng = np.random.default_rng(5)
+        world.food_pos[:] = rng.integers(0, [400, 300], (12, 2))
+        # with ties, and the corners where the fold takes over
+        world.food_pos[1] = world.food_pos[0]
+        points = np.concatenate(
+            (
+                rng.integers(0, [400, 300], (300, 2)),
+                [[0, 0], [399, 299], [0, 299], [399, 0], [5, 3], [396, 290]],
+            )
+        ).astype(float)
+        tree: NearestTree[Thing] = NearestTree(
+            [Thing(Point(x, y)) for x, y in world.food_pos.tolist()]
+        )
+        expected = [
+            tree.closest_index(Point(x, y), world.span)[0] for x, y in points.tolist()
+        ]
+        self.assertEqual(expected, world.closest_food(points).tolist())
+
+    def test_edges_wrap(self):
+        world = self.world(humans=1)
+        world.human_pos[:] = [[2, 298]]
+        world.check_and_fix_edges()
+        self.assertEqual([395.0, 5.0], world.human_pos[0].tolist())
+
+    def test_humans_flee_across_the_edge(self):
+        world = self.world(zombies=1, humans=1)
+        world.zombie_pos[:] = [[5, 150]]
+        world.human_pos[:] = [[395, 150]]
+        world.look_for_zombies()
+        goto = world.human_pos.copy()
+        world.run_from_zombies(goto)
+        self.assertEqual([395 - 40.0**2, 150.0], goto[0].tolist())
+
+    def test_runs(self):
+        world = self.world(zombies=3, humans=50, food=3)
+        for _ in range(40):
+            world.update_zombies()
+            world.update_humans()
+            world.resolve()
+        self.assertEqual(53, len(world.human_pos) + len(world.zombie_pos))
+        self.assertEqual(3, len(world.food_pos))
+
+    def test_same_seed_same_run(self):
+        def trajectory(seed: int) -> "list[list[float]]":
+            world = ArrayWorld(
+                pygame.Rect(0, 0, 300, 200), 3, 30, 2, streams=RandomStreams(seed)
+            )
+            for _ in range(60):
+                world.update_zombies()
+                world.update_humans()
+                world.resolve()
+            positions: list[list[float]] = world.human_pos.tolist()
+            return positions + world.zombie_pos.tolist()
+
+        self.assertEqual(trajectory(11), trajectory(11))
+        self.assertNotEqual(trajectory(11), trajectory(12))
+
+    # hungry and starving within the run, so eating and starving are covered
+    @mock.patch.object(entities, "HUMAN_ENERGY_DECAY", 0.01)
+    def test_plays_out_as_a_field(self):
+        rect = pygame.Rect(0, 0, 400, 300)
+        for seed in (0, 2):
+            field = field_creator(5, 60, 3, seed)(rect)
+            world = ArrayWorld(rect, 5, 60, 3, RandomStreams(seed))
+            sprites, arrays = Simulation(field, 2, 1), Simulation(world, 2, 1)
+            for _ in range(300):
+                sprites.step()
+                arrays.step()
+                self.assertEqual(
+                    [list(human.rect.center) for human in field.humans],
+                    world.human_pos.tolist(),
+                )
+                self.assertEqual(
+                    [list(zombie.rect.center) for zombie in field.zombies],
+                    world.zombie_pos.tolist(),
+                )
+                self.assertEqual(
+                    [zombie.angle for zombie in field.zombies],
+                    world.zombie_angle.tolist(),
+                )
+                self.assertEqual(
+                    [list(food.rect.center) for food in field.food],
+                    world.food_pos.tolist(),
+                )
+            self.assertEqual(field.counts.as_dict(), world.counts.as_dict())
+            self.assertGreater(world.counts.eaten, 0)
+            self.assertGreater(world.counts.starved, 0)
@@ -0,0 +1,243 @@
+"""
+Headless benchmark: ticks per second and time per phase across population
+sizes, written to JSON so runs from different commits can be compared.
+
+World area, zombies and food all grow with the number of humans so every
+size runs at the same density as the default 1440x900 window.
+"""
+
+import argparse
+import functools
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from typing import Any, Optional
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from zombiesim.entities import HumanSprite, ZombieSprite
+from zombiesim.field import (
+    HUMAN_TICKS,
+    INITIAL_HUMANS,
+    INITIAL_ZOMBIES,
+    MAX_FOOD,
+    ZOMBIE_TICKS,
+    field_creator,
+)
+from zombiesim.simulation import PhaseTimer, Simulation, Steppable
+from zombiesim.util import GcStats
+
+BASE_WIDTH: int = 1440
+BASE_HEIGHT: int = 900
+DEFAULT_SIZES: tuple[int, ...] = (250, 2_000, 20_000, 100_000)
+DEFAULT_TICKS: int = 20
+ENGINES: tuple[str, ...] = ("sprite", "array", "tiled")
+
+Result = dict[str, Any]
+
+
+def world_shape(humans: int) -> tuple[pygame.Rect, int, int]:
+    """World rect, zombies and food for the default density at this size"""
+    ratio = humans / INITIAL_HUMANS
+    scale = math.sqrt(ratio)
+    rect = pygame.Rect(0, 0, int(BASE_WIDTH * scale), int(BASE_HEIGHT * scale))
+    zombies = max(1, int(ratio * INITIAL_ZOMBIES))
+    food = max(1, int(ratio * MAX_FOOD))
+    return rect, zombies, food
+
+
+def build(
+    engine: str, humans: int, seed: int
+) -> tuple[Steppable, pygame.Rect, int, int]:
+    rect, zombies, food = world_shape(humans)
+    if engine == "array":
+        from zombiesim.vectorized import array_world_creator
+
+        return (
+            array_world_creator(zombies, humans, food, seed)(rect),
+            rect,
+            zombies,
+            food,
+        )
+    if engine == "tiled":
+        from zombiesim.parallel import tiled_world_creator
+
+        return (
+            tiled_world_creator(zombies, humans, food, seed)(rect),
+            rect,
+            zombies,
+            food,
+        )
+    creator = field_creator(
+        start_zombies=zombies, start_humans=humans, max_food=food, seed=seed
+    )
+    return creator(rect), rect, zombies, food
+
+
+def bench_one(engine: str, humans: int, ticks: int, seed: int) -> Result:
+    begin = time.perf_counter()
+    world, rect, zombies, food = build(engine, humans, seed)
+    setup = time.perf_counter() - begin
+
+    caches = {"zombies": ZombieSprite.vision_stats, "humans": HumanSprite.vision_stats}
+    activity = {
+        "zombies": ZombieSprite.activity_stats,
+        "humans": HumanSprite.activity_stats,
+    }
+    for stats in caches.values():
+        stats.reset()
+    for each in activity.values():
+        each.reset()
+    timer = PhaseTimer()
+    simulation = Simulation(world, ZOMBIE_TICKS, HUMAN_TICKS, timer=timer)
+    screen = pygame.Surface((BASE_WIDTH, BASE_HEIGHT))
+    draw: Optional[Callable[[pygame.Surface], None]] = getattr(world, "draw", None)
+
+    collector = GcStats().install()
+    begin = time.perf_counter()
+    ran = 0
+    while ran < ticks:
+        ran += 1
+        alive = simulation.step()
+        if draw is not None:
+            timer.time("draw", functools.partial(draw, screen))
+        if not alive:
+            break
+    elapsed = time.perf_counter() - begin
+    collector.uninstall()
+    pools = {
+        kind: getattr(world, kind).pool_stats
+        for kind in ("zombies", "humans", "food")
+        if hasattr(getattr(world, kind, None), "pool_stats")
+    }
+    close: Optional[Callable[[], None]] = getattr(world, "close", None)
+    if close is not None:
+        close()
+
+    return {
+        "engine": engine,
+        "humans": humans,
+        "zombies": zombies,
+        "food": food,
+        "width": rect.width,
+        "height": rect.height,
+        "ticks": ran,
+        "setup_seconds": setup,
+        "seconds": elapsed,
+        "ticks_per_second": ran / elapsed if elapsed else math.inf,
+        "vision_cache": {
+            kind: {"hits": stats.hits, "misses": stats.misses}
+            for kind, stats in caches.items()
+        },
+        "activity": {
+            kind: {"active": stats.active, "idle": stats.idle}
+            for kind, stats in activity.items()
+        },
+        "gc": {"collections": collector.collections, "seconds": collector.seconds},
+        "pools": {
+            kind: {
+                "created": stats.created,
+                "reused": stats.reused,
+                "released": stats.released,
+            }
+            for kind, stats in pools.items()
+        },
+        "phases": {
+            name: {
+                "seconds": total,
+                "calls": timer.calls[name],
+                "ms_per_call": 1000.0 * total / timer.calls[name],
+            }
+            for name, total in timer.totals.items()
+        },
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        found = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return found.stdout.strip()
+
+
+def compare(results: list[Result], baseline: list[Result], tolerance: float) -> int:
+    """Print slowdowns against a previous run, returns how many regressed"""
+    before = {(each["engine"], each["humans"]): each for each in baseline}
+    regressions = 0
+    for each in results:
+        old = before.get((each["engine"], each["humans"]))
+        if old is None:
+            continue
+        change = old["ticks_per_second"] / each["ticks_per_second"]
+        flag = ""
+        if change > 1 + tolerance:
+            regressions += 1
+            flag = "  <-- REGRESSION"
+        print(f"{each['engine']:>6} {each['humans']:>7}: {change:.2f}x time{flag}")
+    return regressions
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(each) for each in DEFAULT_SIZES),
+        help="comma separated human counts",
+    )
+    parser.add_argument("--ticks", type=int, default=DEFAULT_TICKS)
+    parser.add_argument("--engine", choices=ENGINES, default="sprite")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="bench.json")
+    parser.add_argument("--baseline", help="earlier output to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="fraction slower than the baseline that counts as a regression",
+    )
+    args = parser.parse_args(argv)
+
+    results: list[Result] = []
+    for humans in (int(each) for each in args.sizes.split(",")):
+        result = bench_one(args.engine, humans, args.ticks, args.seed)
+        results.append(result)
+        phases = ", ".join(
+            f"{name} {each['ms_per_call']:.2f}ms"
+            for name, each in result["phases"].items()
+        )
+        print(
+            f"{args.engine} {humans} humans: "
+            f"{result['ticks_per_second']:.1f} ticks/s ({phases})"
+        )
+
+    report = {
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seed": args.seed,
+        "results": results,
+    }
+    with open(args.output, "w") as out:
+        json.dump(report, out, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as previous:
+            baseline = json.load(previous)["results"]
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
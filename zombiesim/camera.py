@@ -0,0 +1,126 @@
+"""
+A camera onto a world bigger (or smaller) than the screen.
+
+The world keeps its own size whatever the window does; the camera decides
+which part of it is on screen and how big it is drawn. It maps world
+positions to the screen for drawing (see DirtyRenderer) and screen
+positions back into the world for the mouse (see EntityMover).
+"""
+
+import math
+from typing import Optional
+
+import pygame
+
+from zombiesim.type_def import Point
+
+MAX_ZOOM: float = 8.0
+ZOOM_STEP: float = 1.25
+# fraction of the screen one pan moves
+PAN_STEP: float = 0.25
+
+
+class Camera:
+    def __init__(self, world: pygame.Rect, size: tuple[int, int], zoom: float = 1.0):
+        self.world: pygame.Rect = pygame.Rect(world)
+        self.size: tuple[int, int] = size
+        self.zoom: float = 1.0
+        self.left: float = float(world.left)
+        self.top: float = float(world.top)
+        self._scaled: dict[pygame.Surface, pygame.Surface] = {}
+        self.set_zoom(zoom)
+
+    def min_zoom(self) -> float:
+        """Small enough for the whole world to fit on screen"""
+        width, height = self.size
+        fit = min(width / self.world.width, height / self.world.height)
+        return min(1.0, fit)
+
+    def view_size(self) -> tuple[float, float]:
+        """How much of the world fits on screen"""
+        width, height = self.size
+        return width / self.zoom, height / self.zoom
+
+    def area(self) -> pygame.Rect:
+        """The part of the world on screen"""
+        width, height = self.view_size()
+        return pygame.Rect(
+            math.floor(self.left),
+            math.floor(self.top),
+            math.ceil(width) + 1,
+            math.ceil(height) + 1,
+        )
+
+    def resize(self, size: tuple[int, int]) -> None:
+        self.size = size
+        self.set_zoom(self.zoom)
+
+    def pan(self, dx: float, dy: float) -> None:
+        """Move the view by (dx, dy) screen pixels"""
+        self.left += dx / self.zoom
+        self.top += dy / self.zoom
+        self.clamp()
+
+    def pan_by_screens(self, across: float, down: float) -> None:
+        width, height = self.size
+        self.pan(across * PAN_STEP * width, down * PAN_STEP * height)
+
+    def set_zoom(self, zoom: float, around: Optional[tuple[int, int]] = None) -> None:
+        """Zoom keeping the world under around (the screen's center if not
+        given) where it is on screen"""
+        if around is None:
+            around = (self.size[0] // 2, self.size[1] // 2)
+        fixed = self.to_world(Point(*around))
+        self.zoom = max(self.min_zoom(), min(MAX_ZOOM, zoom))
+        self._scaled = {}
+        self.left = fixed.x - around[0] / self.zoom
+        self.top = fixed.y - around[1] / self.zoom
+        self.clamp()
+
+    def zoom_in(self, around: Optional[tuple[int, int]] = None) -> None:
+        self.set_zoom(self.zoom * ZOOM_STEP, around)
+
+    def zoom_out(self, around: Optional[tuple[int, int]] = None) -> None:
+        self.set_zoom(self.zoom / ZOOM_STEP, around)
+
+    def show_all(self) -> None:
+        self.set_zoom(self.min_zoom())
+
+    def clamp(self) -> None:
+        """Keep the view over the world, centered on it along any side
+        where all of it fits"""
+        width, height = self.view_size()
+        self.left = self._clamped(self.left, width, self.world.left, self.world.width)
+        self.top = self._clamped(self.top, height, self.world.top, self.world.height)
+
+    @staticmethod
+    def _clamped(start: float, seen: float, low: int, extent: int) -> float:
+        if seen >= extent:
+            return low + (extent - seen) / 2.0
+        return max(float(low), min(start, low + extent - seen))
+
+    def to_screen(self, x: float, y: float) -> tuple[int, int]:
+        return (
+            math.floor((x - self.left) * self.zoom),
+            math.floor((y - self.top) * self.zoom),
+        )
+
+    def to_world(self, pos: Point) -> Point:
+        return Point(self.left + pos.x / self.zoom, self.top + pos.y / self.zoom)
+
+    def scaled(self, image: pygame.Surface) -> pygame.Surface:
+        """image as drawn at this zoom, scaled once per zoom"""
+        if self.zoom == 1.0:
+            return image
+        found = self._scaled.get(image)
+        if found is None:
+            width, height = image.get_size()
+            found = pygame.transform.scale(
+                image,
+                (
+                    max(1, round(width * self.zoom)),
+                    max(1, round(height * self.zoom)),
+                ),
+            )
+            self._scaled[image] = found
+        return found
@@ -4,24 +4,36 @@ Created on Dec 7, 2014
 @author: bbuxton
 """
 
-import random
 import sys
 import pygame
 import math
 from collections.abc import Callable, Iterator
-from typing import Generator, Iterable, Optional, Generic, Tuple, TypeVar, Type, cast
+from typing import (
+    ClassVar,
+    Iterable,
+    Optional,
+    Generic,
+    Tuple,
+    TypeVar,
+    Type,
+    cast,
+)
 
 import zombiesim.util as zutil
+from zombiesim.spatial import SpatialGrid
 from zombiesim.type_def import (
     Bounds,
     Direction,
     Food,
     Human,
     HasPosition,
+    MutablePoint,
     PointProducer,
     Point,
     World,
     Zombie,
+    direction_and_distance,
+    wrapped_direction_and_distance,
 )
 
 SpritePredicate = Callable[[pygame.sprite.Sprite], bool]
@@ -31,42 +43,162 @@ C = TypeVar("C", bound=HasPosition)
 
 
 class EntityGroup(pygame.sprite.Group, Generic[T]):
-    def __init__(self, clazz: type[T]):
+    def __init__(
+        self, clazz: type[T], streams: zutil.RandomStreams = zutil.DEFAULT_STREAMS
+    ):
+        # bumped whenever a sprite joins or leaves, see Field.food_tree
+        self.version: int = 0
+        # the version each sprite joined at, so in group order
+        self.joined: dict[T, int] = {}
         super().__init__()
         self.entity_class: type[T] = clazz
+        self.streams: zutil.RandomStreams = streams
+        # released entities, handed out again by create_one
+        self.pool: list[T] = []
+        self.pool_stats: zutil.PoolStats = zutil.PoolStats()
 
     def create_one(self) -> T:
-        entity: T = self.entity_class()
+        entity: T
+        if self.pool:
+            entity = self.pool.pop()
+            entity.reset()
+            self.pool_stats.reused += 1
+        else:
+            entity = self.entity_class(streams=self.streams)
+            self.pool_stats.created += 1
         self.add(entity)
         return entity
 
+    def release(self, entity: T) -> None:
+        """Take back an entity that is finished with, for create_one to
+        reuse; nothing else may hold on to it"""
+        entity.kill()
+        self.pool.append(entity)
+        self.pool_stats.released += 1
+
+    def add_internal(self, sprite, layer=None) -> None:
+        super().add_internal(sprite, layer)
+        self.version += 1
+        self.joined[sprite] = self.version
+
+    def remove_internal(self, sprite) -> None:
+        super().remove_internal(sprite)
+        self.version += 1
+        self.joined.pop(sprite, None)
+
+    def joined_since(self, version: int) -> list[T]:
+        """Sprites that joined after version and are still here"""
+        found = []
+        for sprite, joined in reversed(self.joined.items()):
+            if joined <= version:
+                break
+            found.append(sprite)
+        found.reverse()
+        return found
+
     def __iter__(self) -> Iterator[T]:
         return cast(Iterator[T], super().__iter__())
 
 
 ENTITY_WIDTH = 10
 ENTITY_HEIGHT = 10
+ALPHA_LEVELS: int = 32
+
+ShapeDrawer = Callable[[pygame.Surface, pygame.Color], None]
+
+
+def draw_ellipse(image: pygame.Surface, color: pygame.Color) -> None:
+    pygame.draw.ellipse(image, color, image.get_rect())
+
+
+def draw_rect(image: pygame.Surface, color: pygame.Color) -> None:
+    pygame.draw.rect(image, color, image.get_rect())
+
+
+class ImageAtlas:
+    """
+    Entity images drawn once and shared by every sprite.
+
+    Each shape and colour gets one strip surface holding every alpha level
+    side by side, built the first time it is asked for; sprites point their
+    image at a subsurface of the strip instead of owning a surface.
+    """
+
+    def __init__(self, levels: int = ALPHA_LEVELS):
+        self.levels: int = levels
+        self._strips: dict[
+            tuple[ShapeDrawer, tuple[int, int, int]], list[pygame.Surface]
+        ] = {}
+
+    def level_for(self, alpha: float) -> int:
+        """Quantize an alpha in [0, 1] to one of the atlas levels"""
+        return int(round(max(0.0, min(alpha, 1.0)) * (self.levels - 1)))
+
+    def image(
+        self, shape: ShapeDrawer, color: pygame.Color, level: Optional[int] = None
+    ) -> pygame.Surface:
+        key = (shape, (color.r, color.g, color.b))
+        strip = self._strips.get(key)
+        if strip is None:
+            strip = self._strips[key] = self._build(shape, color)
+        return strip[self.levels - 1 if level is None else level]
+
+    def _build(self, shape: ShapeDrawer, color: pygame.Color) -> list[pygame.Surface]:
+        sheet = pygame.Surface(
+            [ENTITY_WIDTH * self.levels, ENTITY_HEIGHT], flags=pygame.SRCALPHA
+        )
+        sheet.fill(pygame.Color(0, 0, 0, 0))
+        images = []
+        for level in range(self.levels):
+            image = sheet.subsurface(
+                pygame.Rect(level * ENTITY_WIDTH, 0, ENTITY_WIDTH, ENTITY_HEIGHT)
+            )
+            alpha = int(round(255 * level / (self.levels - 1)))
+            shape(image, pygame.Color(color.r, color.g, color.b, alpha))
+            images.append(image)
+        return images
+
+    def __len__(self) -> int:
+        return len(self._strips) * self.levels
+
+
+ATLAS: ImageAtlas = ImageAtlas()
 
 
 class Entity(pygame.sprite.Sprite):
+    shape: ClassVar[ShapeDrawer] = staticmethod(draw_rect)
+
     @classmethod
     def create_group(
-        cls: Type[T], size: int, point_getter: PointProducer
+        cls: Type[T],
+        size: int,
+        point_getter: PointProducer,
+        streams: zutil.RandomStreams = zutil.DEFAULT_STREAMS,
     ) -> EntityGroup[T]:
-        all_group = EntityGroup[T](cls)
+        all_group = EntityGroup[T](cls, streams)
         for _ in range(size):
             new_entity = all_group.create_one()
             pos = point_getter()
             new_entity.rect.center = int(pos.x), int(pos.y)
         return all_group
 
-    def __init__(self, color: pygame.Color = pygame.Color("black")):
+    def __init__(
+        self,
+        color: pygame.Color = pygame.Color("black"),
+        streams: zutil.RandomStreams = zutil.DEFAULT_STREAMS,
+    ):
         super().__init__()
+        self.streams: zutil.RandomStreams = streams
         self.color: pygame.Color = color
         self._mouse_groups: list[pygame.sprite.AbstractGroup] = []
-        self.image: pygame.Surface = self.create_image()
-        self.rect: pygame.rect.Rect = self.image.get_rect()
-        self.draw_image(self.color)  # FIXME
+        self.image: pygame.Surface = ATLAS.image(type(self).shape, color)
+        self.rect: pygame.rect.Rect = pygame.Rect(0, 0, ENTITY_WIDTH, ENTITY_HEIGHT)
+
+    def reset(self) -> None:
+        """Back to the state a new entity starts in (drawing the same random
+        numbers a new one would), for reuse from an EntityGroup pool"""
+        self.image = ATLAS.image(type(self).shape, self.color)
+        self.rect.update(0, 0, ENTITY_WIDTH, ENTITY_HEIGHT)
 
     @property
     def center(self) -> Tuple[int, int]:
@@ -74,15 +206,8 @@ class Entity(pygame.sprite.Sprite):
 
     @property
     def position(self) -> Point:
-        return Point(*self.center)
-
-    def create_image(self) -> pygame.Surface:
-        image = pygame.Surface([ENTITY_WIDTH, ENTITY_HEIGHT], flags=pygame.SRCALPHA)
-        image.fill(pygame.Color(0, 0, 0, 0))
-        return image
-
-    def draw_image(self, color: pygame.Color) -> None:
-        pass
+        x, y = self.rect.center
+        return Point(x, y)
 
     def reset_pos(self) -> None:
         pass
@@ -121,6 +246,8 @@ class Entity(pygame.sprite.Sprite):
         self_rect: Optional[pygame.rect.Rect] = self.rect
         if self_rect is None:
             return (None, 0.0)
+        if isinstance(other, SpatialGrid):
+            return other.closest(self.position, to_include)
         span = zutil.span(bounds)
         span_mid = span / 2.0
         curmin: float = sys.maxsize
@@ -142,9 +269,26 @@ class Entity(pygame.sprite.Sprite):
 
 
 class Actor(Entity):
-    def __init__(self, color: pygame.Color, default_energy: float = 0.0):
-        super().__init__(color)
+    shape: ClassVar[ShapeDrawer] = staticmethod(draw_ellipse)
+
+    def __init__(
+        self,
+        color: pygame.Color,
+        default_energy: float = 0.0,
+        streams: zutil.RandomStreams = zutil.DEFAULT_STREAMS,
+        direction: Optional[Direction] = None,
+    ):
+        super().__init__(color, streams)
+        self.default_energy: float = default_energy
         self.energy: float = default_energy
+        if direction is None:
+            self.change_dir()
+        else:
+            self.current_dir = direction
+
+    def reset(self) -> None:
+        super().reset()
+        self.energy = self.default_energy
         self.change_dir()
 
     @property
@@ -155,9 +299,6 @@ class Actor(Entity):
     def y(self) -> int:
         return self.rect.y
 
-    def draw_image(self, color: pygame.Color) -> None:
-        pygame.draw.ellipse(self.image, color, self.image.get_rect())
-
     def update_pos(self, direc: Direction) -> None:
         new_x = self.x + (direc.x * self.energy)
         new_y = self.y + (direc.y * self.energy)
@@ -175,7 +316,7 @@ class Actor(Entity):
             self.rect.top = parent_rect.top
 
     def change_dir(self) -> None:
-        self.current_dir = zutil.random_direction()
+        self.current_dir = zutil.random_direction(self.streams.movement)
 
     def update_state(self, field: World) -> None:
         self.update_pos(self.current_dir)
@@ -186,16 +327,42 @@ ZOMBIE_VISION: int = 100
 ZOMBIE_ATTACK_WAIT_MAX: int = 25
 ZOMBIE_COLOR: pygame.Color = pygame.Color("red")
 ZOMBIE_ENERGY: float = 2.0
-RECALCULATE_HUMANS_SEEN: int = 10
+# in ticks: zombies move every other tick, so this is every 10 zombie moves
+RECALCULATE_HUMANS_SEEN: int = 20
 
 
 class ZombieSprite(Actor):
-    def __init__(self):
-        self.angle = zutil.random_angle()
-        super().__init__(ZOMBIE_COLOR, ZOMBIE_ENERGY)
-        self.attack_wait = random.randint(
+    vision_stats: ClassVar[zutil.CacheStats] = zutil.CacheStats()
+    activity_stats: ClassVar[zutil.ActivityStats] = zutil.ActivityStats()
+
+    def __init__(
+        self,
+        streams: zutil.RandomStreams = zutil.DEFAULT_STREAMS,
+        angle: Optional[float] = None,
+        attack_wait: Optional[int] = None,
+        direction: Optional[Direction] = None,
+    ):
+        """Anything not given is drawn at random (for restoring a snapshot)"""
+        if angle is None:
+            angle = zutil.random_angle(streams.spawn)
+        self.angle: float = angle
+        super().__init__(ZOMBIE_COLOR, ZOMBIE_ENERGY, streams, direction)
+        if attack_wait is None:
+            attack_wait = streams.spawn.randint(
+                int(ZOMBIE_ATTACK_WAIT_MAX / 2), ZOMBIE_ATTACK_WAIT_MAX
+            )
+        self.attack_wait: int = attack_wait
+        self.humans_seen: zutil.VisionCache[Human] = zutil.VisionCache(
+            RECALCULATE_HUMANS_SEEN, ZombieSprite.vision_stats
+        )
+
+    def reset(self) -> None:
+        self.angle = zutil.random_angle(self.streams.spawn)
+        super().reset()
+        self.attack_wait = self.streams.spawn.randint(
             int(ZOMBIE_ATTACK_WAIT_MAX / 2), ZOMBIE_ATTACK_WAIT_MAX
         )
+        self.humans_seen.clear()
 
     def update_state(self, field: World) -> None:
         if self.attack_wait > 0:
@@ -203,38 +370,38 @@ class ZombieSprite(Actor):
             return
         current_pos = self.position
         goto = self.run_to_humans(field, current_pos)
-        next_point = Point(goto.x + self.current_dir.x, goto.y + self.current_dir.y)
+        current_dir = self.current_dir
         # TODO Revisit
-        victim_angle = Direction.from_points(current_pos, next_point).to_angle()
+        heading = Direction.towards(
+            (goto.x + current_dir.x) - current_pos.x,
+            (goto.y + current_dir.y) - current_pos.y,
+        )
+        self.turn_towards(heading.to_angle())
+        super().update_state(field)
+
+    def turn_towards(self, victim_angle: float) -> None:
         if victim_angle > self.angle:
-            self.angle += math.radians(random.random() * 45)
+            self.angle += math.radians(self.streams.movement.random() * 45)
         elif victim_angle < self.angle:
-            self.angle -= math.radians(random.random() * 45)
+            self.angle -= math.radians(self.streams.movement.random() * 45)
         self.current_dir = Direction.from_angle(self.angle)
-        super().update_state(field)
 
-    @zutil.cache_for(times=RECALCULATE_HUMANS_SEEN)
     def humans_in_vision(self, field: World) -> Iterable[Human]:
-        return [
-            human
-            for human in field.humans
-            if self.position.distance(human.position) <= ZOMBIE_VISION
-        ]
+        return self.humans_seen.lookup(
+            field.tick, lambda: field.humans_near(self.position, ZOMBIE_VISION)
+        )
 
     def run_to_humans(self, field: World, start: Point) -> Point:
-        humans = self.humans_in_vision(field)
         bounds = field.bounds
-        victim, _ = self.closest_to(humans, bounds)
+        # the first of the nearest, measured the way the grid saw them
+        victim: Optional[tuple[Direction, float]] = None
+        for human in self.humans_in_vision(field):
+            seen = wrapped_direction_and_distance(start, human.position, bounds)
+            if victim is None or seen[1] < victim[1]:
+                victim = seen
         if victim is None:
             return start
-        span = zutil.span(bounds)
-        span_mid = span / 2.0
-        direc = Direction.from_points(start, victim.position)
-        dist = self.position.distance(victim.position)
-        if dist > span_mid:
-            dist = span - dist
-            direc = -direc
-
+        direc, dist = victim
         factor_dist = float(ZOMBIE_VISION - dist)
         goto = Point(
             int(start.x + (factor_dist * direc.x)),
@@ -243,7 +410,7 @@ class ZombieSprite(Actor):
         return goto
 
     def change_dir(self) -> None:
-        self.angle = zutil.random_angle_change(self.angle, 45)
+        self.angle = zutil.random_angle_change(self.angle, 45, self.streams.movement)
         self.current_dir = Direction.from_angle(self.angle)
 
 
@@ -251,19 +418,56 @@ HUMAN_VISION: int = 50
 HUMAN_COLOR: pygame.Color = pygame.Color("pink")
 HUMAN_ENERGY_LEVEL: float = 4.0
 HUMAN_HUNGRY_LEVEL: float = HUMAN_ENERGY_LEVEL / 2
+# per tick, humans move every tick
+HUMAN_ENERGY_DECAY: float = 0.0005
+# in ticks, humans move every tick
 RECALCULATE_ZOMBIES_SEEN: int = 5
 
 
 class HumanSprite(Actor):
-    def __init__(self):
-        super().__init__(HUMAN_COLOR)
-        self.lifetime: Generator[float, None, None] = self.new_lifetime()
+    vision_stats: ClassVar[zutil.CacheStats] = zutil.CacheStats()
+    activity_stats: ClassVar[zutil.ActivityStats] = zutil.ActivityStats()
 
-    def eat_food(self, food: Food) -> None:
-        if self.is_hungry():
-            food.consume()
-            self.lifetime = self.new_lifetime()
-            self.change_dir()
+    def __init__(
+        self,
+        streams: zutil.RandomStreams = zutil.DEFAULT_STREAMS,
+        direction: Optional[Direction] = None,
+        full_energy: Optional[float] = None,
+        fed_at: int = 0,
+    ):
+        """Anything not given is drawn at random (for restoring a snapshot).
+        Energy counts down from full_energy, starting the tick after fed_at:
+        made at tick 0 for a new field"""
+        super().__init__(HUMAN_COLOR, streams=streams, direction=direction)
+        self.alpha_level: int = ATLAS.levels - 1
+        self.zombies_seen: zutil.VisionCache[Zombie] = zutil.VisionCache(
+            RECALCULATE_ZOMBIES_SEEN, HumanSprite.vision_stats
+        )
+        if full_energy is None:
+            full_energy = self.new_lifetime()
+        self.feed(full_energy, fed_at)
+
+    def reset(self) -> None:
+        super().reset()
+        self.alpha_level = ATLAS.levels - 1
+        self.zombies_seen.clear()
+        self.feed(self.new_lifetime(), 0)
+
+    def feed(self, full_energy: float, tick: int) -> None:
+        self.full_energy: float = full_energy
+        self.fed_at: int = tick
+        self.starves_at: int = (
+            tick + 1 + zutil.steps_until_empty(full_energy, HUMAN_ENERGY_DECAY)
+        )
+
+    def eat_food(self, food: Food, tick: int) -> bool:
+        """Eat if hungry, returns whether it did"""
+        if not self.is_hungry():
+            return False
+        food.consume()
+        self.feed(self.new_lifetime(), tick)
+        self.change_dir()
+        return True
 
     def is_hungry(self) -> bool:
         return self.energy < HUMAN_HUNGRY_LEVEL
@@ -271,76 +475,95 @@ class HumanSprite(Actor):
     def is_dead(self) -> bool:
         return self.energy == 0
 
-    def new_lifetime(self) -> Generator[float, None, None]:
-        return zutil.xfrange(2 + (random.random() * 2), 0, -0.0005)
+    def new_lifetime(self) -> float:
+        """Energy to start from after a meal"""
+        spread = HUMAN_ENERGY_LEVEL - HUMAN_HUNGRY_LEVEL
+        return HUMAN_HUNGRY_LEVEL + (self.streams.lifetime.random() * spread)
+
+    def energy_at(self, tick: int) -> float:
+        """What is left at tick, 0 from starves_at on"""
+        if tick >= self.starves_at:
+            return 0
+        return self.full_energy - HUMAN_ENERGY_DECAY * (tick - self.fed_at - 1)
 
     def alpha(self) -> float:
         result = self.energy / 2.0
         return min(result, 1)
 
-    def update_state(self, field: World) -> None:
-        self.energy = next(self.lifetime, 0)
-        if self.is_dead():
+    def fade(self) -> None:
+        """Point at the atlas image for the current energy"""
+        level = ATLAS.level_for(self.alpha())
+        if level != self.alpha_level:
+            self.alpha_level = level
+            self.image = ATLAS.image(HumanSprite.shape, self.color, level)
+
+    def use_energy(self, tick: int) -> None:
+        """Down to this tick's energy; starving is up to whoever calls this
+        (live or Field.starve)"""
+        self.energy = self.energy_at(tick)
+        self.fade()
+
+    def live(self, tick: int) -> bool:
+        """Use up this tick's energy, returns False (having died) if there
+        was none left"""
+        if tick >= self.starves_at:
+            self.energy = 0
             self.kill()
+            return False
+        self.use_energy(tick)
+        return True
+
+    def update_state(self, field: World) -> None:
+        if not self.live(field.tick):
             return
-        self.color.a = int(255 * self.alpha())
-        self.draw_image(self.color)
         pos = self.position
-        goto = self.run_from_zombies(field, pos)
-        goto = self.run_to_food(field, goto)
-        next_pos = Point(goto.x + self.current_dir.x, goto.y + self.current_dir.y)
-        go_to_dir = Direction.from_points(pos, next_pos)
-        self.current_dir = go_to_dir
+        goto = MutablePoint(pos.x, pos.y)
+        self.run_from_zombies(field, pos, goto)
+        self.run_to_food(field, pos, goto)
+        current_dir = self.current_dir
+        self.current_dir = Direction.towards(
+            (goto.x + current_dir.x) - pos.x, (goto.y + current_dir.y) - pos.y
+        )
         super().update_state(field)
 
-    @zutil.cache_for(times=RECALCULATE_ZOMBIES_SEEN)
     def zombies_in_vision(self, field: World) -> Iterable[Zombie]:
-        return [
-            zombie
-            for zombie in field.zombies
-            if self.position.distance(zombie.position) <= HUMAN_VISION
-        ]
-
-    def run_from_zombies(self, field: World, goto: Point) -> Point:
-        span = zutil.span(field.bounds)
-        span_mid = span / 2.0
+        return self.zombies_seen.lookup(
+            field.tick, lambda: field.zombies_near(self.position, HUMAN_VISION)
+        )
+
+    def run_from_zombies(self, field: World, pos: Point, goto: MutablePoint) -> None:
+        """Move goto away from every zombie in sight of pos"""
+        bounds = field.bounds
         for zombie in self.zombies_in_vision(field):
-            dist = self.position.distance(zombie.position)
-            rev_dir = False
-            if dist > span_mid:
-                dist = span - dist
-                rev_dir = True
+            direc, dist = wrapped_direction_and_distance(pos, zombie.position, bounds)
             factor_dist = float(HUMAN_VISION - dist) ** 2
-            direc = Direction.from_points(self.position, zombie.position)
-            if not rev_dir:
-                direc = -direc
-            goto = Point(
-                goto.x + (factor_dist * direc.x), goto.y + (factor_dist * direc.y)
-            )
-        return goto
+            goto.move(direc, -factor_dist)
 
-    def run_to_food(self, field: World, goto: Point) -> Point:
+    def run_to_food(self, field: World, pos: Point, goto: MutablePoint) -> None:
+        """Move goto towards the closest food to pos, if hungry"""
         if self.is_hungry():
-            span = zutil.span(field.bounds)
-            span_mid = span / 2.0
-            food, _ = self.closest_to(field.food, field.bounds)
+            span_mid = zutil.span(field.bounds) / 2.0
+            food, _ = field.closest_food(pos)
             if food is not None:
-                direc = Direction.from_points(self.position, food.position)
-                dist = self.position.distance(food.position)
-                if dist > span_mid:
-                    direc = -direc
+                direc, dist = direction_and_distance(pos, food.position)
                 factor = (float(self.energy) / 4 * HUMAN_VISION) ** 2
-                goto = Point(goto.x + (factor * direc.x), goto.y + (factor * direc.y))
-        return goto
+                goto.move(direc, -factor if dist > span_mid else factor)
 
 
 class Consumable(Entity):
-    def __init__(self, color: pygame.Color, amount: int = 5):
-        super().__init__(color)
+    def __init__(
+        self,
+        color: pygame.Color,
+        amount: int = 5,
+        streams: zutil.RandomStreams = zutil.DEFAULT_STREAMS,
+    ):
+        super().__init__(color, streams)
+        self.full_amount: int = amount
         self.amount: int = amount
 
-    def draw_image(self, color: pygame.Color) -> None:
-        pygame.draw.rect(self.image, color, self.image.get_rect())
+    def reset(self) -> None:
+        super().reset()
+        self.amount = self.full_amount
 
     def consume(self) -> None:
         self.amount -= 1
@@ -356,5 +579,5 @@ DEFAULT_FOOD_AMOUNT: int = 25
 
 
 class FoodSprite(Consumable):
-    def __init__(self):
-        super().__init__(FOOD_COLOR, amount=DEFAULT_FOOD_AMOUNT)
+    def __init__(self, streams: zutil.RandomStreams = zutil.DEFAULT_STREAMS):
+        super().__init__(FOOD_COLOR, amount=DEFAULT_FOOD_AMOUNT, streams=streams)
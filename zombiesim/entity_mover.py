@@ -44,25 +44,35 @@ class EntityMover:
         event_lookup: EventLookup,
         sprite_finder_func: SpriteFinder,
         on_sprite_change: EntityCallback = lambda sprite: None,
+        to_world: Callable[[Point], Point] = lambda pos: pos,
     ):
         self.under_mouse: pygame.sprite.Group = pygame.sprite.Group()
         self.sprite_finder_func: SpriteFinder = sprite_finder_func
         self.on_sprite_change: EntityCallback = on_sprite_change
+        self.to_world: Callable[[Point], Point] = to_world
         self.on_mouse_up: EventCallback = lambda pos: None
         self.on_mouse_move: EventCallback = lambda pos: None
         self.registry: dict[pygame.sprite.Sprite, EntityMover.Pickup] = {}
+        self.handles: list[int] = []
         self.register_events(event_lookup)
 
     def register_events(self, events: EventLookup) -> None:
         # pylint: disable=no-member
-        events.add(pygame.MOUSEBUTTONDOWN, self.mouse_down)
-        events.add(pygame.MOUSEMOTION, self.mouse_move)
-        events.add(pygame.MOUSEBUTTONUP, self.mouse_up)
+        self.handles = [
+            events.add(pygame.MOUSEBUTTONDOWN, self.mouse_down),
+            events.add(pygame.MOUSEMOTION, self.mouse_move),
+            events.add(pygame.MOUSEBUTTONUP, self.mouse_up),
+        ]
+
+    def unregister_events(self, events: EventLookup) -> None:
+        for handle in self.handles:
+            events.remove_handler(handle)
+        self.handles = []
 
     def mouse_down(self, event: pygame.event.Event) -> None:
         if event.button != 1:
             return
-        pos = Point(*event.pos)
+        pos = self.to_world(Point(*event.pos))
         sprites = self.sprites_under(pos)
         for each in sprites:
             self.pick_up(each, pos)
@@ -82,13 +92,13 @@ class EntityMover:
     def mouse_move(self, event: pygame.event.Event) -> None:
         if not event.buttons[0]:
             return
-        pos = Point(*event.pos)
+        pos = self.to_world(Point(*event.pos))
         self.on_mouse_move(pos)  # type: ignore
 
     def mouse_up(self, event: pygame.event.Event) -> None:
         if event.button != 1:
             return
-        pos = Point(*event.pos)
+        pos = self.to_world(Point(*event.pos))
         self.on_mouse_up(pos)  # type: ignore
         self.on_mouse_up = lambda pos: None
         self.on_mouse_move = lambda pos: None
@@ -4,33 +4,84 @@ Created on Dec 7, 2014
 @author: bbuxton
 """
 
+import functools
+import itertools
+from collections.abc import Callable, Iterator
+from typing import Optional
+
 import pygame
+from zombiesim.simulation import PhaseTimer
 from zombiesim.type_def import EventCallback, Runnable
+import zombiesim.util as zutil
+
+Handlers = dict[int, EventCallback]
+Dispatch = Callable[[pygame.event.Event], None]
 
 
 class EventLookup:
+    """
+    Any number of handlers per event type (and per key for KEYDOWN), each
+    added under a handle it can be taken away with again.
+
+    Timer events (every_do) that have queued up more than once by the time
+    process_events runs are handed out once, with how many there were as
+    event.count, so a slow frame is not followed by a burst of catching up.
+    """
+
     def __init__(self):
-        self._mapping: dict[int, EventCallback] = {}
-        self._keys: dict[int, EventCallback] = {}
+        self._mapping: dict[int, Handlers] = {}
+        self._keys: dict[int, Handlers] = {}
+        # which handlers dict each handle is in
+        self._owners: dict[int, Handlers] = {}
+        self._handles: Iterator[int] = itertools.count(1)
+        # the KEYDOWN handler passing key presses on to _keys
+        self._key_handle: Optional[int] = None
+        self._timers: set[int] = set()
         self.next_event_id: int = pygame.USEREVENT
+        self.stats: zutil.DispatchStats = zutil.DispatchStats()
+        # times process_events and each dispatch when set, see profiling
+        self.timer: Optional[PhaseTimer] = None
+
+    def _subscribe(
+        self, table: dict[int, Handlers], key: int, func: EventCallback
+    ) -> int:
+        handle = next(self._handles)
+        handlers = table.setdefault(key, {})
+        handlers[handle] = func
+        self._owners[handle] = handlers
+        return handle
+
+    def add(self, event_type: int, func: EventCallback = lambda event: None) -> int:
+        """Call func for every event_type event too, returns a handle for
+        remove_handler"""
+        return self._subscribe(self._mapping, event_type, func)
 
-    def add(self, event_type: int, func: EventCallback = lambda event: None) -> None:
-        self._mapping[event_type] = func
+    def remove_handler(self, handle: int) -> None:
+        handlers = self._owners.pop(handle, None)
+        if handlers is not None:
+            del handlers[handle]
 
     def remove(self, event_type: int) -> None:
+        """Stop the timer (if any) and drop every handler for event_type"""
         pygame.time.set_timer(event_type, 0)
-        del self._mapping[event_type]
+        self._timers.discard(event_type)
+        for handle in self._mapping.pop(event_type, {}):
+            del self._owners[handle]
 
-    def add_key_press(self, key, func: EventCallback = lambda event: None) -> None:
-        def key_func(event: pygame.event.Event) -> None:
-            evt_key = event.key
-            self._keys.get(evt_key, lambda event: None)(event)
+    def add_key_press(self, key, func: EventCallback = lambda event: None) -> int:
+        if self._key_handle not in self._owners:
+            self._key_handle = self.add(pygame.KEYDOWN, self._key_down)
+        return self._subscribe(self._keys, key, func)
 
-        self._keys[key] = func
-        self.add(pygame.KEYDOWN, key_func)
+    def _key_down(self, event: pygame.event.Event) -> None:
+        handlers = self._keys.get(event.key)
+        if handlers:
+            for func in list(handlers.values()):
+                func(event)
 
     def func_for(self, event_type: int) -> EventCallback:
-        return self._mapping.get(event_type, lambda _: None)
+        """Whatever the handlers for event_type are when called"""
+        return functools.partial(self._dispatch_to, self._mapping, event_type)
 
     def next_event_type(self) -> int:
         self.next_event_id = self.next_event_id + 1
@@ -39,9 +90,59 @@ class EventLookup:
     def every_do(self, millis: int, func: Runnable = lambda: None) -> int:
         event_id = self.next_event_type()
         pygame.time.set_timer(event_id, millis)
+        self._timers.add(event_id)
         self.add(event_id, lambda _: func())
         return event_id
 
+    def _dispatch_to(
+        self, table: dict[int, Handlers], key: int, event: pygame.event.Event
+    ) -> None:
+        handlers = table.get(key)
+        if handlers:
+            for func in list(handlers.values()):
+                func(event)
+
+    def dispatch(self, event: pygame.event.Event) -> None:
+        self.stats.dispatched += 1
+        self._dispatch_to(self._mapping, event.type, event)
+
+    def coalesce(self, events: list[pygame.event.Event]) -> list[pygame.event.Event]:
+        """events with each timer event type only once, where the first one
+        was, carrying the number there were as count"""
+        timers = self._timers
+        counts: dict[int, int] = {}
+        for event in events:
+            if event.type in timers:
+                counts[event.type] = counts.get(event.type, 0) + 1
+        if not counts:
+            return events
+        backlog = sum(counts.values()) - len(counts)
+        if backlog:
+            self.stats.merged += backlog
+            self.stats.backlogged_frames += 1
+            self.stats.worst_backlog = max(self.stats.worst_backlog, backlog)
+        result = []
+        for event in events:
+            count = counts.get(event.type)
+            if count is None:
+                result.append(event)
+            elif count:
+                result.append(pygame.event.Event(event.type, count=count))
+                counts[event.type] = 0
+        return result
+
     def process_events(self) -> None:
-        for event in pygame.event.get():
-            self._mapping.get(event.type, lambda event: None)(event)
+        timer = self.timer
+        if timer is None:
+            self._process(self.dispatch)
+        else:
+            timed = functools.partial(self._timed, timer)
+            timer.time("process_events", functools.partial(self._process, timed))
+
+    def _process(self, dispatch: Dispatch) -> None:
+        for event in self.coalesce(pygame.event.get()):
+            dispatch(event)
+
+    def _timed(self, timer: PhaseTimer, event: pygame.event.Event) -> None:
+        name = "event " + pygame.event.event_name(event.type)
+        timer.time(name, functools.partial(self.dispatch, event))
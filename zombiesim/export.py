@@ -0,0 +1,391 @@
+"""
+Headless export of a run as frames, for making videos without recording
+the screen.
+
+Every Nth tick is drawn offscreen, straight into one of a ring of frame
+buffers in multiprocessing.shared_memory: the Surfaces drawn on are views
+of the shared block, so the pixels are never copied on this side. A writer
+process is told which buffer is ready, writes it out (PNG files, or raw
+RGBX frames down the pipe to an encoder such as ffmpeg) and hands the
+buffer back. The simulation only waits for the writers when every buffer
+is still waiting to be written, so more buffers and writers let it run
+further ahead; asked to, it drops such frames instead and counts them (see
+ExportStats), numbering the ones written without gaps.
+"""
+
+import argparse
+import multiprocessing
+import os
+import shlex
+import subprocess
+import sys
+import time
+import weakref
+from collections.abc import Callable, Sequence
+from multiprocessing.connection import Connection, wait
+from multiprocessing.process import BaseProcess
+from multiprocessing.shared_memory import SharedMemory
+from typing import Literal, Optional, Protocol, Union
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from zombiesim.benchmark import world_shape
+from zombiesim.camera import Camera
+from zombiesim.field import INITIAL_HUMANS, Field, field_creator
+from zombiesim.main import world_size
+from zombiesim.render import DirtyRenderer
+import zombiesim.util as zutil
+
+# how the pixels of a frame are laid out, as pygame.image.frombuffer has it
+PIXEL_FORMAT: Literal["RGBX"] = "RGBX"
+BYTES_PER_PIXEL: int = 4
+SLOTS: int = 8
+FRAME_SIZE: tuple[int, int] = (1280, 720)
+
+
+class FrameWriter(Protocol):
+    """Runs in the writer process: opened once, then handed frames in order"""
+
+    def open(self, size: tuple[int, int]) -> None: ...
+
+    def write(self, frame: int, pixels: memoryview) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class PngWriter:
+    """Each frame to a PNG file, pattern % frame number naming it"""
+
+    def __init__(self, pattern: str):
+        self.pattern: str = pattern
+        self.size: tuple[int, int] = (0, 0)
+
+    def open(self, size: tuple[int, int]) -> None:
+        self.size = size
+        directory = os.path.dirname(self.pattern % 0)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, frame: int, pixels: memoryview) -> None:
+        image = pygame.image.frombuffer(pixels, self.size, PIXEL_FORMAT)
+        pygame.image.save(image, self.pattern % frame)
+
+    def close(self) -> None:
+        pass
+
+
+class PipeWriter:
+    """Raw frames down the standard input of a command, such as
+    ffmpeg -f rawvideo -pix_fmt rgb0 -s 1280x720 -i - run.mp4"""
+
+    def __init__(self, command: Sequence[str]):
+        self.command: list[str] = list(command)
+        self._process: Optional["subprocess.Popen[bytes]"] = None
+
+    def open(self, size: tuple[int, int]) -> None:
+        self._process = subprocess.Popen(self.command, stdin=subprocess.PIPE)
+
+    def write(self, frame: int, pixels: memoryview) -> None:
+        assert self._process is not None and self._process.stdin is not None
+        self._process.stdin.write(pixels)
+
+    def close(self) -> None:
+        if self._process is None:
+            return
+        assert self._process.stdin is not None
+        self._process.stdin.close()
+        returned = self._process.wait()
+        self._process = None
+        if returned:
+            raise subprocess.CalledProcessError(returned, self.command)
+
+
+def _write(
+    connection: Connection,
+    name: str,
+    size: tuple[int, int],
+    frame_bytes: int,
+    writer: FrameWriter,
+) -> None:
+    """The writer process: (slot, frame) in, the slot back once written;
+    None to finish, after which it sends None (or what went wrong)"""
+    memory = SharedMemory(name=name)
+    buffer = memory.buf
+    assert buffer is not None
+    try:
+        writer.open(size)
+        while True:
+            message = connection.recv()
+            if message is None:
+                break
+            slot, frame = message
+            start = slot * frame_bytes
+            pixels = buffer[start : start + frame_bytes]
+            try:
+                writer.write(frame, pixels)
+            finally:
+                pixels.release()
+            connection.send(slot)
+        writer.close()
+        connection.send(None)
+    except Exception as error:
+        connection.send(error)
+    finally:
+        del buffer
+        memory.close()
+
+
+def _release(memory: SharedMemory, connections: list[Connection]) -> None:
+    for connection in connections:
+        try:
+            connection.send(None)
+            connection.close()
+        except OSError:
+            pass
+    memory.close()
+    memory.unlink()
+
+
+class FrameExporter:
+    def __init__(
+        self,
+        size: tuple[int, int],
+        writer: FrameWriter,
+        slots: int = SLOTS,
+        writers: int = 1,
+        drop: bool = False,
+    ):
+        """slots is how many frames can wait to be written; writers is how
+        many processes write them, more than one only for a writer that
+        does not need frames in order (PngWriter, not PipeWriter); drop
+        leaves a frame out rather than wait for a buffer to be written"""
+        self.size: tuple[int, int] = size
+        self.drop: bool = drop
+        self.stats: zutil.ExportStats = zutil.ExportStats()
+        self.frame_bytes: int = size[0] * size[1] * BYTES_PER_PIXEL
+        self.memory: SharedMemory = SharedMemory(
+            create=True, size=slots * self.frame_bytes
+        )
+        buffer = self.memory.buf
+        assert buffer is not None
+        # drawing on these draws into the shared block
+        self.surfaces: list[pygame.Surface] = [
+            pygame.image.frombuffer(
+                buffer[slot * self.frame_bytes : (slot + 1) * self.frame_bytes],
+                size,
+                PIXEL_FORMAT,
+            )
+            for slot in range(slots)
+        ]
+        self.free: list[int] = list(range(slots))
+        # frames sent to each writer and not yet back
+        self.pending: list[int] = [0] * writers
+        self._connections: list[Connection] = []
+        self._processes: list[BaseProcess] = []
+        self._finalizer = weakref.finalize(
+            self, _release, self.memory, self._connections
+        )
+        for each in range(writers):
+            ours, theirs = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_write,
+                args=(theirs, self.memory.name, size, self.frame_bytes, writer),
+                name=f"zombiesim-export-{each}",
+                daemon=True,
+            )
+            process.start()
+            theirs.close()
+            self._connections.append(ours)
+            self._processes.append(process)
+        self._closed: bool = False
+
+    def _reply(self, writer: int, reply: Union[int, Exception, None]) -> None:
+        if isinstance(reply, Exception):
+            raise reply
+        if reply is not None:
+            self.pending[writer] -= 1
+            self.free.append(reply)
+
+    def reclaim(self) -> None:
+        """Take back the buffers written since last time, without waiting"""
+        for writer, connection in enumerate(self._connections):
+            while connection.poll():
+                self._reply(writer, connection.recv())
+
+    def _wait_for_slot(self) -> None:
+        begin = time.perf_counter()
+        busy = [
+            connection
+            for writer, connection in enumerate(self._connections)
+            if self.pending[writer]
+        ]
+        ready = wait(busy)
+        for writer, connection in enumerate(self._connections):
+            if connection in ready:
+                self._reply(writer, connection.recv())
+        self.stats.waited += time.perf_counter() - begin
+
+    def export(self, draw: Callable[[pygame.Surface], None]) -> bool:
+        """Have draw draw the next frame into a free buffer (still holding
+        whatever was drawn in it last) and queue it to be written by the
+        least busy writer, first waiting for a buffer to be written if none
+        is free; False, drawing nothing, if dropping frames and none is"""
+        self.reclaim()
+        if not self.free:
+            if self.drop:
+                self.stats.dropped += 1
+                return False
+            self._wait_for_slot()
+        slot = self.free.pop()
+        draw(self.surfaces[slot])
+        writer = self.pending.index(min(self.pending))
+        # numbered as written, so dropped frames leave no gaps
+        self._connections[writer].send((slot, self.stats.exported))
+        self.pending[writer] += 1
+        self.stats.exported += 1
+        return True
+
+    def close(self) -> None:
+        """Wait for every queued frame to be written and the writers to
+        finish, then free the shared memory"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            for connection in self._connections:
+                connection.send(None)
+            for writer, connection in enumerate(self._connections):
+                while True:
+                    reply = connection.recv()
+                    if reply is None:
+                        break
+                    self._reply(writer, reply)
+        except (EOFError, OSError):
+            # a writer has already gone, having sent what went wrong
+            pass
+        finally:
+            for process in self._processes:
+                process.join()
+            # every view into the block has to go before it can be unmapped
+            self.surfaces = []
+            self._finalizer()
+
+    def __enter__(self) -> "FrameExporter":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+def export_run(
+    field: Field,
+    exporter: FrameExporter,
+    ticks: int,
+    every: int = 1,
+    camera: Optional[Camera] = None,
+) -> int:
+    """Run field for up to ticks ticks (stopping once everyone is dead),
+    exporting every Nth tick as seen by camera (all of the field by
+    default), frame n being tick n * every unless frames are dropped;
+    returns the ticks run"""
+    view = camera
+    if view is None:
+        view = Camera(field.rect, exporter.size)
+        view.show_all()
+    renderer = DirtyRenderer()
+
+    def draw(surface: pygame.Surface) -> None:
+        # each buffer is a different screen, so this always draws all of it
+        renderer.draw(surface, field.layers(view.area()), view)
+
+    ran = 0
+    while ran < ticks:
+        if ran % every == 0:
+            exporter.export(draw)
+        ran += 1
+        if not field.step():
+            break
+    return ran
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument(
+        "--png", metavar="PATTERN", help="PNG file per frame, e.g. out/%%05d.png"
+    )
+    output.add_argument(
+        "--pipe",
+        metavar="COMMAND",
+        help="command reading raw rgb0 frames on its standard input",
+    )
+    parser.add_argument("--ticks", type=int, default=1000)
+    parser.add_argument("--every", type=int, default=1, help="export every Nth tick")
+    parser.add_argument("--humans", type=int, default=INITIAL_HUMANS)
+    parser.add_argument(
+        "--world",
+        metavar="WIDTHxHEIGHT",
+        type=world_size,
+        help="size of the world (default: as crowded as the default window)",
+    )
+    parser.add_argument(
+        "--size",
+        metavar="WIDTHxHEIGHT",
+        type=world_size,
+        default=FRAME_SIZE,
+        help="size of each frame (default: %(default)s)",
+    )
+    parser.add_argument("--slots", type=int, default=SLOTS)
+    parser.add_argument(
+        "--writers",
+        type=int,
+        help="processes writing PNG files (default: one per core)",
+    )
+    parser.add_argument(
+        "--drop",
+        action="store_true",
+        help="drop frames rather than wait for them to be written",
+    )
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    pygame.init()
+    rect, zombies, food = world_shape(args.humans)
+    if args.world:
+        rect = pygame.Rect((0, 0), args.world)
+    field = field_creator(
+        start_zombies=zombies,
+        start_humans=args.humans,
+        max_food=food,
+        seed=args.seed,
+    )(rect)
+    writer: FrameWriter
+    writers = 1
+    if args.png:
+        writer = PngWriter(args.png)
+        writers = args.writers or os.cpu_count() or 1
+    else:
+        # the encoder needs the frames in order
+        writer = PipeWriter(shlex.split(args.pipe))
+
+    begin = time.perf_counter()
+    with FrameExporter(args.size, writer, args.slots, writers, args.drop) as exporter:
+        ran = export_run(field, exporter, args.ticks, args.every)
+        simulated = time.perf_counter() - begin
+    finished = time.perf_counter() - begin
+    print(
+        f"{ran} ticks in {simulated:.1f}s, written by {finished:.1f}s: "
+        f"{exporter.stats}"
+    )
+    if exporter.stats.dropped:
+        print("To drop fewer frames, raise --slots or --every, or add --writers")
+    elif exporter.stats.waited:
+        print("To wait less, raise --slots or add --writers")
+    pygame.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,9 +7,11 @@ Created on Dec 7, 2014
 from dataclasses import dataclass, field
 import itertools
 import functools
-import time
+import heapq
+import math
 import random
-from typing import Callable, Optional, cast, Iterable
+import time
+from typing import Callable, Generic, Iterator, Optional, TypeVar, cast, Iterable
 
 import pygame
 from zombiesim.entities import (
@@ -19,9 +21,14 @@ from zombiesim.entities import (
     HumanSprite,
     ZombieSprite,
     EntityGroup,
+    ENTITY_HEIGHT,
+    ENTITY_WIDTH,
 )
+from zombiesim import entities, kernels, profiling
 from zombiesim.event import EventLookup
 from zombiesim.entity_mover import EntityMover
+from zombiesim.simulation import Census, EventCounts, Simulation
+from zombiesim.spatial import NearestTree, Reach, SpatialGrid
 from zombiesim.type_def import Food, Human, Point, Bounds
 import zombiesim.util as zutil
 
@@ -29,96 +36,286 @@ SEC: int = 1000
 MINUTE: int = 60 * SEC
 ZOMBIE_UPDATE_MS: int = 200
 HUMAN_UPDATE_MS: int = 100
+TICK_MS: int = math.gcd(ZOMBIE_UPDATE_MS, HUMAN_UPDATE_MS)
+ZOMBIE_TICKS: int = ZOMBIE_UPDATE_MS // TICK_MS
+HUMAN_TICKS: int = HUMAN_UPDATE_MS // TICK_MS
 
 INITIAL_ZOMBIES: int = 5
 INITIAL_HUMANS: int = 250
 MAX_FOOD: int = 5
+# furthest apart two entity centers can be and still touch, by rect or circle
+CONTACT_DISTANCE: float = math.hypot(ENTITY_WIDTH, ENTITY_HEIGHT)
 
+A = TypeVar("A", bound=Actor)
 
-def random_point(rect: pygame.rect.Rect) -> Point:
-    x = random.randrange(rect.left, rect.right)
-    y = random.randrange(rect.top, rect.bottom)
+
+def random_point(
+    rect: pygame.rect.Rect, rng: random.Random = zutil.DEFAULT_STREAMS.spawn
+) -> Point:
+    x = rng.randrange(rect.left, rect.right)
+    y = rng.randrange(rect.top, rect.bottom)
     return Point(x, y)
 
 
+class GroupView(Generic[A]):
+    """
+    Where a group's actors are, for finding those in an area without going
+    over the whole group: a grid that the tick rebuilds anyway once they
+    have moved, plus whatever joined the group or was moved by the field
+    (see Field.check_and_fix_edges) after that.
+    """
+
+    def __init__(self, group: EntityGroup[A], grid: SpatialGrid[A]):
+        self.group: EntityGroup[A] = group
+        self.grid: SpatialGrid[A] = grid
+        self.tick: int = -1
+        self.version: int = group.version
+        self.moved: list[A] = []
+
+    def rebuild(self, bounds: Bounds, tick: int) -> None:
+        self.grid.rebuild(self.group, bounds)
+        self.tick = tick
+        self.version = self.group.version
+        self.moved = []
+
+    def within(self, area: pygame.Rect, bounds: Bounds, tick: int) -> list[A]:
+        """Those with their centers in area, in group order"""
+        if self.tick != tick:
+            # moved by something other than a tick since
+            self.rebuild(bounds, tick)
+        joined = self.group.joined
+        inside = area.collidepoint
+        found = set(self.grid.within(area))
+        found.update(self.moved)
+        found.update(self.group.joined_since(self.version))
+        return sorted(
+            (each for each in found if each in joined and inside(each.rect.center)),
+            key=joined.__getitem__,
+        )
+
+
 @dataclass
 class Field:
     zombies: EntityGroup[ZombieSprite]
     humans: EntityGroup[HumanSprite]
     food: EntityGroup[FoodSprite]
-    rect: pygame.rect.Rect = pygame.Rect((0, 0), (0, 0))
+    rect: pygame.rect.Rect = field(default_factory=lambda: pygame.Rect((0, 0), (0, 0)))
     started: float = field(init=False)
     mover: Optional[EntityMover] = None
     registered_ids: list[int] = field(default_factory=list)
     max_food: int = field(init=False)
+    streams: zutil.RandomStreams = zutil.DEFAULT_STREAMS
+    human_grid: SpatialGrid[HumanSprite] = field(init=False)
+    zombie_grid: SpatialGrid[ZombieSprite] = field(init=False)
+    contact_grid: SpatialGrid[HumanSprite] = field(init=False)
+    # what visible looks in: the grids above, as each tick leaves them
+    human_view: GroupView[HumanSprite] = field(init=False)
+    zombie_view: GroupView[ZombieSprite] = field(init=False)
+    food_grid: SpatialGrid[FoodSprite] = field(init=False)
+    food_tree: NearestTree[FoodSprite] = field(init=False)
+    food_version: int = field(init=False, default=-1)
+    # (starves_at, order, human), out of date once the human has eaten since
+    starvation: list[tuple[int, int, HumanSprite]] = field(
+        init=False, default_factory=list
+    )
+    starvation_order: Iterator[int] = field(init=False, default_factory=itertools.count)
+    simulation: Simulation = field(init=False)
+    tick: int = field(init=False, default=0)
+    counts: EventCounts = field(init=False, default_factory=EventCounts)
 
     def __post_init__(self):
         self.started = time.time()
         self.max_food = len(self.food)
+        # read when made, as sweep patches the vision for each run
+        self.human_grid = SpatialGrid(self.rect, entities.ZOMBIE_VISION)
+        self.zombie_grid = SpatialGrid(self.rect, entities.HUMAN_VISION)
+        self.contact_grid = SpatialGrid(self.rect, CONTACT_DISTANCE)
+        self.human_view = GroupView(self.humans, self.contact_grid)
+        self.zombie_view = GroupView(self.zombies, self.zombie_grid)
+        self.food_grid = SpatialGrid(self.rect, CONTACT_DISTANCE)
+        self.food_tree = NearestTree()
+        self.simulation = Simulation(self, ZOMBIE_TICKS, HUMAN_TICKS)
+        for human in self.humans:
+            self.schedule_starvation(human)
 
     @property
     def bounds(self) -> Bounds:
         return self.rect
 
-    def start(self, events: EventLookup) -> None:
-        id = events.every_do(ZOMBIE_UPDATE_MS, lambda: self.zombies.update(self))
-        self.registered_ids.append(id)
-        id = events.every_do(HUMAN_UPDATE_MS, lambda: self.humans.update(self))
-        self.registered_ids.append(id)
-        id = events.every_do(5 * MINUTE, self.print_status)
+    def humans_near(self, point: Point, radius: float) -> list[HumanSprite]:
+        return self.human_grid.near(point, radius)
+
+    def zombies_near(self, point: Point, radius: float) -> list[ZombieSprite]:
+        return self.zombie_grid.near(point, radius)
+
+    def closest_food(self, point: Point) -> tuple[Optional[FoodSprite], float]:
+        return self.current_food_tree().closest(point, zutil.span(self.rect))
+
+    def current_food_tree(self) -> NearestTree[FoodSprite]:
+        """The food tree, rebuilt first if food has come or gone since"""
+        self.refresh_food()
+        return self.food_tree
+
+    def current_food_grid(self) -> SpatialGrid[FoodSprite]:
+        """The food grid, which like the tree only changes with the food"""
+        self.refresh_food()
+        return self.food_grid
+
+    def refresh_food(self) -> None:
+        if self.food_version != self.food.version:
+            self.food_tree.rebuild(self.food)
+            self.food_grid.rebuild(self.food, self.rect)
+            self.food_version = self.food.version
+
+    def update_zombies(self) -> None:
+        phase = self.simulation.phase
+        phase(
+            "update_zombies.grid",
+            functools.partial(self.human_grid.rebuild, self.humans, self.rect),
+        )
+        phase(
+            "update_zombies.group",
+            functools.partial(
+                kernels.update_zombies,
+                self,
+                self.zombies.sprites(),
+                Reach(self.human_grid, entities.ZOMBIE_VISION),
+            ),
+        )
+
+    def update_humans(self) -> None:
+        phase = self.simulation.phase
+        phase(
+            "update_humans.grid",
+            functools.partial(self.zombie_view.rebuild, self.rect, self.tick),
+        )
+        phase("update_humans.starve", self.starve)
+        phase(
+            "update_humans.group",
+            functools.partial(
+                kernels.update_humans,
+                self,
+                self.humans.sprites(),
+                Reach(self.zombie_grid, entities.HUMAN_VISION),
+            ),
+        )
+
+    def schedule_starvation(self, human: HumanSprite) -> None:
+        """Have starve kill the human once its energy runs out, again after
+        every meal"""
+        entry = (human.starves_at, next(self.starvation_order), human)
+        heapq.heappush(self.starvation, entry)
+
+    def starve(self) -> None:
+        """Kill every human whose energy has run out by this tick"""
+        held: list[tuple[int, int, HumanSprite]] = []
+        while self.starvation and self.starvation[0][0] <= self.tick:
+            entry = heapq.heappop(self.starvation)
+            due, _, human = entry
+            if due != human.starves_at or not human.alive():
+                # it has eaten since, or been bitten
+                continue
+            if human not in self.humans:
+                # under the mouse, it starves once put down
+                held.append(entry)
+                continue
+            human.energy = 0
+            human.kill()
+            self.counts.starved += 1
+        for entry in held:
+            heapq.heappush(self.starvation, entry)
+
+    def step(self) -> bool:
+        """One tick, returns False once everyone is dead"""
+        return self.simulation.step()
+
+    def start(
+        self,
+        events: EventLookup,
+        to_world: Callable[[Point], Point] = lambda pos: pos,
+    ) -> None:
+        """Status and mouse handling, with to_world turning mouse positions
+        into field ones (see Camera); ticks are driven by a FixedTimestep"""
+        id = events.every_do(
+            5 * MINUTE, functools.partial(self.print_status, events.stats)
+        )
         self.registered_ids.append(id)
 
         def reset_func(entity: Entity) -> None:
             entity.reset_pos()
 
         self.mover = EntityMover(
-            events, self.entities_under, on_sprite_change=reset_func
+            events, self.entities_under, on_sprite_change=reset_func, to_world=to_world
         )
 
     def stop(self, events: EventLookup) -> None:
         print("To all die: " + zutil.str_diff_time(self.started))
         for each_id in self.registered_ids:
             events.remove(each_id)
+        self.registered_ids.clear()
+        if self.mover:
+            self.mover.unregister_events(events)
 
-    def print_status(self):
+    def print_status(self, event_stats: Optional[zutil.DispatchStats] = None):
         print(
             "Update: humans: {0} zombies: {1}".format(
                 len(self.humans), len(self.zombies)
             )
         )
+        print(
+            "Vision caches: zombies: {0} humans: {1}".format(
+                ZombieSprite.vision_stats, HumanSprite.vision_stats
+            )
+        )
+        print(
+            "Activity: zombies: {0} humans: {1}".format(
+                ZombieSprite.activity_stats, HumanSprite.activity_stats
+            )
+        )
+        print(
+            "Pools: zombies: {0} humans: {1} food: {2}".format(
+                self.zombies.pool_stats,
+                self.humans.pool_stats,
+                self.food.pool_stats,
+            )
+        )
+        if event_stats is not None:
+            print("Events: {0}".format(event_stats))
+
+    def update(self) -> bool:
+        """Once a frame; the field keeps its own size whatever the screen's"""
+        return not self.all_dead()
 
-    def update(self, screen: pygame.surface.Surface) -> bool:
-        self.rect = screen.get_rect()
+    def resolve(self) -> None:
         self.update_humans_to_zombies()
         self.update_eaten_food()
         self.check_and_fix_edges()
         self.check_food()
-        return not self.all_dead()
 
     def update_humans_to_zombies(self) -> None:
-        dead_list: list[HumanSprite] = []
-        for zombie in self.zombies:
-            died: list[HumanSprite] = self.find_if_biten(zombie)
-            dead_list += died
-        for human in dead_list:
+        biten = self.find_biten()
+        for human in biten:
             self.turn(human)
+        self.counts.turns += len(biten)
 
     def update_eaten_food(self):
-        for food in self.food:
-            eaten: list[Human] = self.find_who_can_eat(food)
-            for human in eaten:
-                if food.has_more():
-                    human.eat_food(cast(Food, food))
+        for food, human in self.find_who_can_eat():
+            if food.has_more() and human.eat_food(cast(Food, food), self.tick):
+                self.schedule_starvation(cast(HumanSprite, human))
+                self.counts.eaten += 1
+                if not food.has_more():
+                    self.food.release(food)
 
     def check_and_fix_edges(self) -> None:
-        def check_and_fix(actor: Actor, parent_rect: pygame.rect.Rect):
+        def check_and_fix(actor: A, parent_rect: pygame.rect.Rect, view: GroupView[A]):
             if not parent_rect.contains(actor.rect):
                 actor.hit_edge(parent_rect)
+                view.moved.append(actor)
 
         for each_zombie in self.zombies:
-            check_and_fix(each_zombie, self.rect)
+            check_and_fix(each_zombie, self.rect, self.zombie_view)
         for each_human in self.humans:
-            check_and_fix(each_human, self.rect)
+            check_and_fix(each_human, self.rect, self.human_view)
 
     def check_food(self) -> None:
         num_under_mouse = 0
@@ -126,15 +323,62 @@ class Field:
             num_under_mouse = len(self.mover.under_mouse)
         while (len(self.food) + num_under_mouse) < self.max_food:
             new_food = self.food.create_one()
-            center = random_point(self.rect)
+            center = random_point(self.rect, self.streams.spawn)
             new_food.rect.center = int(center.x), int(center.y)
 
+    def census(self) -> Census:
+        humans = len(self.humans)
+        energy = sum(each.energy for each in self.humans)
+        return Census(
+            humans,
+            len(self.zombies),
+            len(self.food),
+            energy / humans if humans else 0.0,
+        )
+
     def all_dead(self) -> bool:
         no_humans = not self.humans
         if self.mover:
             return no_humans and not self.mover.under_mouse
         return no_humans
 
+    def save(self, path: str) -> None:
+        """Write everything needed to carry on from this tick, see snapshot"""
+        from zombiesim import snapshot
+
+        snapshot.save(self, path)
+
+    @classmethod
+    def load(cls, path: str) -> "Field":
+        from zombiesim import snapshot
+
+        return snapshot.load(path)
+
+    def layers(self, area: Optional[pygame.Rect] = None) -> list[Iterable[Entity]]:
+        """What draw draws, bottom to top; given an area of the field, only
+        what can be seen of it"""
+        layers: list[Iterable[Entity]]
+        if area is None:
+            layers = [self.food, self.humans, self.zombies]
+        else:
+            layers = list(
+                self.visible(area.inflate(2 * ENTITY_WIDTH, 2 * ENTITY_HEIGHT))
+            )
+        if self.mover:
+            layers.append(self.mover.under_mouse)
+        return layers
+
+    def visible(self, area: pygame.Rect) -> list[list[Entity]]:
+        """Food, humans and zombies with their centers in area, each in
+        group order, looked up in the food grid and the grids the tick left
+        behind (see GroupView)"""
+        with profiling.span(self.simulation.timer, "render.visible"):
+            return [
+                list(self.current_food_grid().within(area)),
+                list(self.human_view.within(area, self.rect, self.tick)),
+                list(self.zombie_view.within(area, self.rect, self.tick)),
+            ]
+
     def draw(self, screen: pygame.surface.Surface) -> None:
         self.food.draw(screen)
         self.humans.draw(screen)
@@ -147,29 +391,45 @@ class Field:
         new_zombie.rect.center = human.rect.center
 
     def entities_under(self, pos: Point) -> Iterable[Entity]:
+        x, y = int(pos.x), int(pos.y)
+        food, humans, zombies = self.visible(
+            pygame.Rect(
+                x - ENTITY_WIDTH,
+                y - ENTITY_HEIGHT,
+                2 * ENTITY_WIDTH + 1,
+                2 * ENTITY_HEIGHT + 1,
+            )
+        )
         return [
             each
-            for each in itertools.chain(self.humans, self.zombies, self.food)
-            if each.rect.collidepoint(pos.x, pos.y)
+            for each in itertools.chain(humans, zombies, food)
+            if each.rect.collidepoint(x, y)
         ]
 
-    def find_who_can_eat(self, food: FoodSprite) -> list[Human]:
-        humans = pygame.sprite.spritecollide(
-            sprite=food,
-            group=self.humans,
-            dokill=False,
-            collided=pygame.sprite.collide_rect,
-        )
-        return cast(list[Human], humans)
-
-    def find_if_biten(self, zombie: ZombieSprite) -> list[HumanSprite]:
-        biten = pygame.sprite.spritecollide(
-            sprite=zombie,
-            group=self.humans,
-            dokill=True,
-            collided=pygame.sprite.collide_circle,
-        )
-        return cast(list[HumanSprite], biten)
+    def find_who_can_eat(self) -> list[tuple[FoodSprite, Human]]:
+        """Humans touching each food, from the grid find_biten made this
+        tick (made here if it did not run): those bitten since are left out"""
+        if self.human_view.tick != self.tick:
+            self.human_view.rebuild(self.rect, self.tick)
+        return [
+            (food, cast(Human, human))
+            for food, human in self.contact_grid.pairs(self.food, CONTACT_DISTANCE)
+            if human.alive() and pygame.sprite.collide_rect(food, human)
+        ]
+
+    def find_biten(self) -> list[HumanSprite]:
+        """Humans any zombie is touching, killed and in the order the zombies
+        got to them; one bitten by several zombies is only listed once. The
+        grid of the humans made here is used for meals as well"""
+        self.human_view.rebuild(self.rect, self.tick)
+        biten: dict[HumanSprite, None] = {}
+        for zombie, human in self.contact_grid.pairs(self.zombies, CONTACT_DISTANCE):
+            if pygame.sprite.collide_circle(zombie, human):
+                self.counts.bites += 1
+                biten[human] = None
+        for human in biten:
+            human.kill()
+        return list(biten)
 
 
 CallableFieldCreator = Callable[[pygame.rect.Rect], Field]
@@ -179,12 +439,19 @@ def field_creator(
     start_zombies: int = INITIAL_ZOMBIES,
     start_humans: int = INITIAL_HUMANS,
     max_food: int = MAX_FOOD,
+    seed: Optional[int] = None,
 ) -> CallableFieldCreator:
+    """Every field made with a given seed plays out the same way; without one
+    each field gets a fresh seed (see Field.streams.seed)"""
+
     def creator(rect: pygame.rect.Rect) -> Field:
-        point_creator = functools.partial(random_point, rect)
-        zombies = ZombieSprite.create_group(start_zombies, point_creator)
-        humans = HumanSprite.create_group(start_humans, point_creator)
-        food = FoodSprite.create_group(max_food, point_creator)
-        return Field(zombies=zombies, humans=humans, food=food, rect=rect)
+        streams = zutil.RandomStreams(seed)
+        point_creator = functools.partial(random_point, rect, streams.spawn)
+        zombies = ZombieSprite.create_group(start_zombies, point_creator, streams)
+        humans = HumanSprite.create_group(start_humans, point_creator, streams)
+        food = FoodSprite.create_group(max_food, point_creator, streams)
+        return Field(
+            zombies=zombies, humans=humans, food=food, rect=rect, streams=streams
+        )
 
     return creator
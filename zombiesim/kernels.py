@@ -0,0 +1,373 @@
+"""
+Batched steering: the whole "where do I go next" calculation for every
+zombie or every human in one call, instead of one sprite at a time through
+Point and Direction objects.
+
+The kernels are plain loops over flat columns of floats. When numba is
+installed they are compiled; otherwise they run as they are, which still
+avoids building a Point or Direction for every step of the calculation. In
+both cases the arithmetic is done in the same order as the sprites' own
+update_state methods, so the results are the same (to the last bit without
+numba, to within floating point rounding of atan2 with it).
+
+Random numbers are still drawn by the sprites, one at a time and in group
+order, so a seeded run draws exactly what the sprite-by-sprite update did.
+
+Given a Reach of what they could see, the batch updates leave out agents
+with nothing in sight (and, for humans, not hungry): they carry straight on,
+which is what the full calculation comes to for them, worked out directly
+and without looking anything up. Nothing in sight means a vision cache
+still fresh with no one alive in it or, once it has run out, being outside
+the Reach; the cache is then updated as a lookup finding no one would, so
+nothing about the run changes.
+"""
+
+import math
+from collections.abc import Callable, Iterator, Sequence
+from typing import Any, Optional, TypeVar
+
+from zombiesim import entities
+from zombiesim.entities import HumanSprite, ZombieSprite
+from zombiesim.spatial import Reach
+from zombiesim.type_def import Bounds, Direction, Point, World
+import zombiesim.util as zutil
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+try:
+    import numba  # type: ignore
+    import numpy as np
+except ImportError:  # numba is optional
+    numba = None
+
+BACKEND: str = "python" if numba is None else "numba"
+
+
+def _compiled(func: F) -> F:
+    if numba is None:
+        return func
+    compiled: F = numba.njit(cache=True, nogil=True)(func)
+    return compiled
+
+
+def as_column(values: Sequence[float]) -> Any:
+    """Whatever the kernels take: NumPy arrays for numba, lists otherwise"""
+    return values if numba is None else np.asarray(values, dtype=np.float64)
+
+
+def as_offsets(values: Sequence[int]) -> Any:
+    return values if numba is None else np.asarray(values, dtype=np.int64)
+
+
+@_compiled
+def _normalized(x: float, y: float) -> tuple[float, float]:
+    # Direction.normalize
+    dist = math.sqrt(x**2 + y**2)
+    if dist == 0:
+        return x, y
+    return x / dist, y / dist
+
+
+@_compiled
+def _wrapped(delta: float, size: float) -> float:
+    # type_def.wrapped_delta
+    delta = delta % size
+    if delta > size / 2.0:
+        delta -= size
+    return delta
+
+
+@_compiled
+def _closest(
+    x: float,
+    y: float,
+    xs: Any,
+    ys: Any,
+    first: int,
+    last: int,
+    width: float,
+    height: float,
+) -> int:
+    # ZombieSprite.run_to_humans: the first of the nearest, or -1
+    best = -1
+    curmin = math.inf
+    for each in range(first, last):
+        to_x = _wrapped(xs[each] - x, width)
+        to_y = _wrapped(ys[each] - y, height)
+        dist = math.sqrt(to_x**2 + to_y**2)
+        if dist < curmin:
+            curmin = dist
+            best = each
+    return best
+
+
+@_compiled
+def zombie_headings(
+    xs: Any,
+    ys: Any,
+    dxs: Any,
+    dys: Any,
+    seen: Any,
+    seen_xs: Any,
+    seen_ys: Any,
+    width: float,
+    height: float,
+    vision: float,
+    out: Any,
+) -> None:
+    """The angle each zombie wants to head in (before it turns towards it),
+    as ZombieSprite.update_state works out: humans seen by zombie i are
+    seen_xs/seen_ys[seen[i]:seen[i + 1]], in a field wrapping at width by
+    height"""
+    for i in range(len(xs)):
+        x = xs[i]
+        y = ys[i]
+        goto_x = x
+        goto_y = y
+        victim = _closest(x, y, seen_xs, seen_ys, seen[i], seen[i + 1], width, height)
+        if victim >= 0:
+            to_x = _wrapped(seen_xs[victim] - x, width)
+            to_y = _wrapped(seen_ys[victim] - y, height)
+            direc_x, direc_y = _normalized(to_x, to_y)
+            dist = math.sqrt(to_x**2 + to_y**2)
+            factor = vision - dist
+            goto_x = float(int(x + (factor * direc_x)))
+            goto_y = float(int(y + (factor * direc_y)))
+        head_x, head_y = _normalized(goto_x + dxs[i] - x, goto_y + dys[i] - y)
+        out[i] = math.atan2(head_y, head_x)
+
+
+@_compiled
+def human_directions(
+    xs: Any,
+    ys: Any,
+    dxs: Any,
+    dys: Any,
+    energies: Any,
+    hungry_level: float,
+    seen: Any,
+    seen_xs: Any,
+    seen_ys: Any,
+    fed: Any,
+    food_xs: Any,
+    food_ys: Any,
+    width: float,
+    height: float,
+    span: float,
+    vision: float,
+    out_xs: Any,
+    out_ys: Any,
+) -> None:
+    """Each human's new direction, as HumanSprite.update_state works it
+    out: away from the zombies it saw (seen as for zombie_headings), then
+    towards the closest food if hungry - for human i that is at
+    food_xs/food_ys[i], if fed[i] is not 0 (see Field.closest_food, which
+    measures with span)"""
+    span_mid = span / 2.0
+    for i in range(len(xs)):
+        x = xs[i]
+        y = ys[i]
+        goto_x = x
+        goto_y = y
+        for each in range(seen[i], seen[i + 1]):
+            to_x = _wrapped(seen_xs[each] - x, width)
+            to_y = _wrapped(seen_ys[each] - y, height)
+            dist = math.sqrt(to_x**2 + to_y**2)
+            factor = (vision - dist) ** 2
+            direc_x, direc_y = _normalized(to_x, to_y)
+            direc_x = direc_x * -1.0
+            direc_y = direc_y * -1.0
+            goto_x = goto_x + (factor * direc_x)
+            goto_y = goto_y + (factor * direc_y)
+        energy = energies[i]
+        if energy < hungry_level and fed[i]:
+            food_x = food_xs[i]
+            food_y = food_ys[i]
+            direc_x, direc_y = _normalized(food_x - x, food_y - y)
+            dist = math.sqrt((x - food_x) ** 2 + (y - food_y) ** 2)
+            if dist > span_mid:
+                direc_x = direc_x * -1.0
+                direc_y = direc_y * -1.0
+            factor = (energy / 4 * vision) ** 2
+            goto_x = goto_x + (factor * direc_x)
+            goto_y = goto_y + (factor * direc_y)
+        next_x = goto_x + dxs[i]
+        next_y = goto_y + dys[i]
+        out_xs[i], out_ys[i] = _normalized(next_x - x, next_y - y)
+
+
+def _size(bounds: Bounds) -> tuple[float, float]:
+    # what the vision grids wrap at, as SpatialGrid has it
+    left, top = bounds.topleft
+    right, bottom = bounds.bottomright
+    return float(max(1, right - left)), float(max(1, bottom - top))
+
+
+def _straight_on(x: float, y: float, current: Direction) -> Direction:
+    # the steering with nothing to run to or from: goto is where it is
+    return Direction.towards((x + current.x) - x, (y + current.y) - y)
+
+
+def update_zombies(
+    field: World, zombies: Sequence[ZombieSprite], prey: Optional[Reach] = None
+) -> None:
+    """ZombieSprite.update_state for every zombie, steering in one batch;
+    prey is where any human could be within ZOMBIE_VISION"""
+    stats = ZombieSprite.activity_stats
+    tick = field.tick
+    active = []
+    # heading of each idle zombie, None for those the kernel works out
+    headings: list[Optional[float]] = []
+    for zombie in zombies:
+        if zombie.attack_wait > 0:
+            zombie.attack_wait -= 1
+            continue
+        active.append(zombie)
+        x, y = zombie.rect.center
+        seen = zombie.humans_seen
+        if (
+            prey is not None
+            and (seen.fresh(tick) or not prey.covers(x, y))
+            and seen.lookup_nothing(tick)
+        ):
+            headings.append(_straight_on(x, y, zombie.current_dir).to_angle())
+        else:
+            headings.append(None)
+    if not active:
+        return
+    busy = [zombie for zombie, heading in zip(active, headings) if heading is None]
+    stats.active += len(busy)
+    stats.idle += len(active) - len(busy)
+    angles = _zombie_angles(field, busy)
+    for zombie, heading in zip(active, headings):
+        angle = next(angles) if heading is None else heading
+        zombie.turn_towards(angle)
+        zombie.update_pos(zombie.current_dir)
+
+
+def _zombie_angles(field: World, zombies: Sequence[ZombieSprite]) -> Iterator[float]:
+    if not zombies:
+        return iter(())
+    xs: list[float] = []
+    ys: list[float] = []
+    dxs: list[float] = []
+    dys: list[float] = []
+    seen = [0]
+    seen_xs: list[float] = []
+    seen_ys: list[float] = []
+    for zombie in zombies:
+        x, y = zombie.rect.center
+        xs.append(x)
+        ys.append(y)
+        dxs.append(zombie.current_dir.x)
+        dys.append(zombie.current_dir.y)
+        for human in zombie.humans_in_vision(field):
+            seen_at = human.position
+            seen_xs.append(seen_at.x)
+            seen_ys.append(seen_at.y)
+        seen.append(len(seen_xs))
+    angles = as_column([0.0] * len(zombies))
+    zombie_headings(
+        as_column(xs),
+        as_column(ys),
+        as_column(dxs),
+        as_column(dys),
+        as_offsets(seen),
+        as_column(seen_xs),
+        as_column(seen_ys),
+        *_size(field.bounds),
+        float(entities.ZOMBIE_VISION),
+        angles,
+    )
+    return (float(angle) for angle in angles)
+
+
+def update_humans(
+    field: World, humans: Sequence[HumanSprite], threats: Optional[Reach] = None
+) -> None:
+    """HumanSprite.update_state for every human, steering in one batch;
+    any that have starved must already be gone (Field.starve). threats is
+    where any zombie could be within HUMAN_VISION"""
+    tick = field.tick
+    busy = []
+    for human in humans:
+        human.use_energy(tick)
+        x, y = human.rect.center
+        seen = human.zombies_seen
+        if (
+            threats is not None
+            and not human.is_hungry()
+            and (seen.fresh(tick) or not threats.covers(x, y))
+            and seen.lookup_nothing(tick)
+        ):
+            human.current_dir = _straight_on(x, y, human.current_dir)
+            human.update_pos(human.current_dir)
+        else:
+            busy.append(human)
+    stats = HumanSprite.activity_stats
+    stats.active += len(busy)
+    stats.idle += len(humans) - len(busy)
+    if busy:
+        _steer_humans(field, busy)
+
+
+def _steer_humans(field: World, humans: Sequence[HumanSprite]) -> None:
+    xs: list[float] = []
+    ys: list[float] = []
+    dxs: list[float] = []
+    dys: list[float] = []
+    energies: list[float] = []
+    seen = [0]
+    seen_xs: list[float] = []
+    seen_ys: list[float] = []
+    fed: list[int] = []
+    food_xs: list[float] = []
+    food_ys: list[float] = []
+    for human in humans:
+        x, y = human.rect.center
+        xs.append(x)
+        ys.append(y)
+        dxs.append(human.current_dir.x)
+        dys.append(human.current_dir.y)
+        energies.append(human.energy)
+        for zombie in human.zombies_in_vision(field):
+            seen_at = zombie.position
+            seen_xs.append(seen_at.x)
+            seen_ys.append(seen_at.y)
+        seen.append(len(seen_xs))
+        food = None
+        if human.is_hungry():
+            food, _ = field.closest_food(Point(x, y))
+        if food is None:
+            fed.append(0)
+            food_xs.append(0.0)
+            food_ys.append(0.0)
+        else:
+            food_at = food.position
+            fed.append(1)
+            food_xs.append(food_at.x)
+            food_ys.append(food_at.y)
+    out_xs = as_column([0.0] * len(humans))
+    out_ys = as_column([0.0] * len(humans))
+    human_directions(
+        as_column(xs),
+        as_column(ys),
+        as_column(dxs),
+        as_column(dys),
+        as_column(energies),
+        float(entities.HUMAN_HUNGRY_LEVEL),
+        as_offsets(seen),
+        as_column(seen_xs),
+        as_column(seen_ys),
+        as_offsets(fed),
+        as_column(food_xs),
+        as_column(food_ys),
+        *_size(field.bounds),
+        zutil.span(field.bounds),
+        float(entities.HUMAN_VISION),
+        out_xs,
+        out_ys,
+    )
+    for human, x, y in zip(humans, out_xs, out_ys):
+        human.current_dir = Direction(float(x), float(y))
+        human.update_pos(human.current_dir)
@@ -4,10 +4,27 @@ Created on Nov 29, 2014
 @author: btbuxton
 """
 
+import argparse
+import functools
+from typing import Optional
+
 import pygame
 
+from zombiesim.camera import Camera
 from zombiesim.event import EventLookup
-from zombiesim.field import INITIAL_HUMANS, INITIAL_ZOMBIES, MAX_FOOD, field_creator
+from zombiesim.field import (
+    INITIAL_HUMANS,
+    INITIAL_ZOMBIES,
+    MAX_FOOD,
+    TICK_MS,
+    field_creator,
+)
+from zombiesim import profiling
+from zombiesim.profiling import Overlay, Profiler, StackSampler
+from zombiesim.render import DirtyRenderer
+from zombiesim.scheduler import SPEEDS, FixedTimestep
+from zombiesim.trajectory import Replay, TrajectoryReader, TrajectoryRecorder
+from zombiesim.type_def import EventCallback, Runnable
 import zombiesim.util as zutil
 
 
@@ -17,9 +34,57 @@ class Done(Exception):
         raise cls()
 
 
-def main() -> None:
+def ignore_event(func: Runnable) -> EventCallback:
+    return lambda _: func()
+
+
+def world_size(text: str) -> tuple[int, int]:
+    """WIDTHxHEIGHT, for --world"""
+    try:
+        width, height = (int(each) for each in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"expected WIDTHxHEIGHT, not {text!r}"
+        ) from None
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError(f"{text!r} is not a size")
+    return width, height
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Zombie Simulation")
+    parser.add_argument("--record", metavar="FILE", help="record every tick to FILE")
+    parser.add_argument(
+        "--replay", metavar="FILE", help="play back a recording instead of simulating"
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        default="zombiesim.folded",
+        help="where s writes sampled stacks (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--profile-seconds",
+        metavar="N",
+        type=float,
+        default=10.0,
+        help="how long s samples for (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--world",
+        metavar="WIDTHxHEIGHT",
+        type=world_size,
+        help="size of the world (default: the screen's)",
+    )
+    parser.add_argument(
+        "--humans",
+        metavar="N",
+        type=int,
+        help="humans to start with (default: as many per screen as ever)",
+    )
+    args = parser.parse_args(argv)
+
     pygame.init()
-    fps = 60
     display_info = pygame.display.Info()
     screen_width = display_info.current_w
     screen_height = display_info.current_h
@@ -29,6 +94,24 @@ def main() -> None:
     )
     pygame.display.set_caption("Zombie Simulation")
 
+    events = create_events()
+    try:
+        if args.replay:
+            replay(events, args.replay)
+        else:
+            simulate(
+                events,
+                args.record,
+                (args.profile, args.profile_seconds),
+                args.world,
+                args.humans,
+            )
+    except Done:
+        pass
+    pygame.quit()
+
+
+def create_events() -> EventLookup:
     events = EventLookup()
 
     def callback(_) -> None:
@@ -42,44 +125,226 @@ def main() -> None:
     events.add(pygame.VIDEORESIZE, set_screen)
     events.add_key_press(pygame.K_ESCAPE, events.func_for(pygame.QUIT))
     events.add_key_press(pygame.K_f, lambda _: zutil.make_full_screen())
+    return events
+
+
+def add_speed_keys(events: EventLookup, scheduler: FixedTimestep) -> None:
+    """1, 2 and 3 run the simulation at 1x, 10x and as fast as it goes"""
+    for key, speed in zip((pygame.K_1, pygame.K_2, pygame.K_3), SPEEDS):
+        events.add_key_press(
+            key, ignore_event(functools.partial(scheduler.set_speed, speed))
+        )
+
+
+ARROWS: tuple[int, int, int, int] = (
+    pygame.K_LEFT,
+    pygame.K_RIGHT,
+    pygame.K_UP,
+    pygame.K_DOWN,
+)
+
+
+def add_camera_keys(
+    events: EventLookup,
+    camera: Camera,
+    on_move: Runnable,
+    pan_keys: tuple[int, int, int, int] = ARROWS,
+) -> None:
+    """pan_keys (left, right, up, down: the arrows unless given) pan, = and
+    - (or the mouse wheel) zoom, 0 shows everything; on_move is called after
+    each, as the whole screen changes"""
+    left, right, up, down = pan_keys
+    moves: dict[int, Runnable] = {
+        left: functools.partial(camera.pan_by_screens, -1, 0),
+        right: functools.partial(camera.pan_by_screens, 1, 0),
+        up: functools.partial(camera.pan_by_screens, 0, -1),
+        down: functools.partial(camera.pan_by_screens, 0, 1),
+        pygame.K_EQUALS: camera.zoom_in,
+        pygame.K_MINUS: camera.zoom_out,
+        pygame.K_0: camera.show_all,
+    }
+
+    def then_redraw(move: Runnable) -> EventCallback:
+        def moved(_) -> None:
+            move()
+            on_move()
+
+        return moved
+
+    for key, move in moves.items():
+        events.add_key_press(key, then_redraw(move))
+
+    def wheel(event: pygame.event.Event) -> None:
+        around = pygame.mouse.get_pos()
+        for _ in range(abs(event.y)):
+            if event.y > 0:
+                camera.zoom_in(around)
+            else:
+                camera.zoom_out(around)
+        on_move()
 
+    def resize(event: pygame.event.Event) -> None:
+        camera.resize(event.dict["size"])
+        on_move()
+
+    events.add(pygame.MOUSEWHEEL, wheel)
+    events.add(pygame.VIDEORESIZE, resize)
+
+
+def add_profile_keys(
+    events: EventLookup,
+    overlay: Overlay,
+    on_toggle: Runnable,
+    sample_to: tuple[str, float],
+) -> None:
+    """p shows span timings (timing only while shown), s samples stacks
+    for a flamegraph"""
+    sampler = StackSampler()
+    path, seconds = sample_to
+
+    def sample() -> None:
+        if not sampler.running():
+            print(f"Sampling stacks for {seconds}s to {path}")
+            sampler.start(seconds, path)
+
+    def toggle() -> None:
+        overlay.toggle()
+        on_toggle()
+
+    events.add_key_press(pygame.K_p, ignore_event(toggle))
+    events.add_key_press(pygame.K_s, ignore_event(sample))
+
+
+def simulate(
+    events: EventLookup,
+    record: Optional[str] = None,
+    sample_to: tuple[str, float] = ("zombiesim.folded", 10.0),
+    world_size: Optional[tuple[int, int]] = None,
+    humans: Optional[int] = None,
+) -> None:
+    """A world of world_size (the screen's size if not given), populated
+    as densely as one screen wide has always been unless humans says"""
+    fps = 60
+    screen_width, screen_height = pygame.display.get_surface().get_size()
+    world = pygame.Rect((0, 0), world_size or (screen_width, screen_height))
     max_w = 1440
-    ratio = float(screen_width) / max_w
+    ratio = (float(world.width) / max_w) * (float(world.height) / screen_height)
+    if humans is not None:
+        ratio = float(humans) / INITIAL_HUMANS
     start_zombies = int(ratio * INITIAL_ZOMBIES)
     start_humans = int(ratio * INITIAL_HUMANS)
     max_food = max(1, int(ratio * MAX_FOOD))
     field_factory = field_creator(
         start_zombies=start_zombies, start_humans=start_humans, max_food=max_food
     )
-    field = field_factory(pygame.display.get_surface().get_rect())
-    field.start(events)
+    camera = Camera(world, (screen_width, screen_height))
+    field = field_factory(world)
+    field.start(events, camera.to_world)
+    recorder: Optional[TrajectoryRecorder] = None
+    if record:
+        recorder = TrajectoryRecorder(record, field.rect).attach(field.simulation)
+
+    scheduler = FixedTimestep(lambda: field.step(), TICK_MS)
+    renderer = DirtyRenderer()
+    profiler = Profiler()
+    overlay = Overlay(profiler)
+    overlay_area: Optional[pygame.Rect] = None
+
+    def install_profiler() -> None:
+        timer = profiler if overlay.visible else None
+        field.simulation.timer = timer
+        events.timer = timer
+        renderer.invalidate()
 
     def restart() -> None:
         nonlocal field
         field.stop(events)
-        field = field_factory(pygame.display.get_surface().get_rect())
-        field.start(events)
+        field = field_factory(world)
+        field.start(events, camera.to_world)
+        if recorder:
+            recorder.attach(field.simulation)
+        install_profiler()
+        scheduler.reset()
 
     events.add_key_press(pygame.K_r, lambda _: restart())
+    add_speed_keys(events, scheduler)
+    add_profile_keys(events, overlay, install_profiler, sample_to)
+    add_camera_keys(events, camera, renderer.invalidate)
 
     clock = pygame.time.Clock()
     try:
         while True:
             events.process_events()
             screen = pygame.display.get_surface()
-            should_continue = field.update(screen)
+            should_continue = field.update()
             if not should_continue:
                 restart()
                 continue
+            scheduler.advance()
+
+            with profiling.span(field.simulation.timer, "render"):
+                changed = renderer.draw(screen, field.layers(camera.area()), camera)
+            drawn = overlay.draw(screen)
+            if drawn != overlay_area:
+                # uncover whatever the last one hid
+                overlay_area = drawn
+                renderer.invalidate()
+            if drawn:
+                changed.append(drawn)
+            if changed:
+                pygame.display.update(changed)
+            pygame.display.set_caption(f"Zombie Simulation {scheduler.describe()}")
+
+            clock.tick(fps)
+    finally:
+        if recorder:
+            recorder.close()
 
+
+def replay(events: EventLookup, path: str) -> None:
+    """Space pauses, left/right step, up/down change speed, backspace
+    reverses, home/end jump to either end; the camera pans with a, d, w
+    and s, and zooms as it does live"""
+    fps = 60
+    reader = TrajectoryReader(path)
+    playback = Replay(reader)
+    camera = Camera(
+        pygame.Rect(0, 0, reader.width, reader.height),
+        pygame.display.get_surface().get_size(),
+    )
+    add_camera_keys(
+        events,
+        camera,
+        lambda: None,
+        (pygame.K_a, pygame.K_d, pygame.K_w, pygame.K_s),
+    )
+    scheduler = FixedTimestep(playback.advance, TICK_MS)
+    keys = {
+        pygame.K_SPACE: playback.toggle_pause,
+        pygame.K_LEFT: lambda: playback.step(-1),
+        pygame.K_RIGHT: lambda: playback.step(1),
+        pygame.K_UP: playback.faster,
+        pygame.K_DOWN: playback.slower,
+        pygame.K_BACKSPACE: playback.reverse,
+        pygame.K_HOME: lambda: playback.seek(0),
+        pygame.K_END: lambda: playback.seek(len(reader) - 1),
+    }
+    for key, action in keys.items():
+        events.add_key_press(key, ignore_event(action))
+
+    clock = pygame.time.Clock()
+    try:
+        while True:
+            events.process_events()
+            scheduler.advance()
+            screen = pygame.display.get_surface()
             screen.fill(pygame.Color("black"))
-            field.draw(screen)
+            playback.draw(screen, camera)
+            pygame.display.set_caption("Zombie Simulation replay: " + playback.status())
             pygame.display.flip()
-
             clock.tick(fps)
-    except Done:
-        pass
-    pygame.quit()
+    finally:
+        reader.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,869 @@
+"""
+Tiled engine: the wrapping world is cut into a grid of tiles and the tiles
+are stepped by worker processes, so one simulation can use every core.
+
+Every agent lives in NumPy columns in multiprocessing.shared_memory, kept
+sorted by the tile that owns it, so the workers all read and write the same
+arrays and nothing is pickled per tick; the only messages are "run this
+phase" and the event counts that come back. A worker steps the agents its
+tiles own and sees agents owned by the neighbouring tiles as ghosts whenever
+they are inside the halo (as far as anything can see, plus how far it can
+move in a tick). Between ticks the coordinating process drops the dead,
+turns the bitten, refills food and sorts everything by tile again, which is
+how agents that walked over a tile border migrate to their new owner.
+
+Random numbers come from (seed, tick, agent id) rather than from a shared
+stream, so a run depends on its seed alone: the same seed gives the same run
+whatever the number of tiles or workers. The rules are those of
+vectorized.ArrayWorld, except that everyone looks again every tick instead
+of keeping what they saw for a while; it matches that and the sprites
+statistically but not number for number. NumPy is required, as for
+vectorized.
+"""
+
+import math
+import multiprocessing
+import os
+import weakref
+from collections.abc import Callable, Sequence
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from multiprocessing.shared_memory import SharedMemory
+from typing import NamedTuple, Optional, Union
+
+import numpy as np
+
+from zombiesim import entities
+import zombiesim.util as zutil
+from zombiesim.simulation import Census, EventCounts
+from zombiesim.type_def import Bounds
+from zombiesim.vectorized import (
+    BITE_RADIUS,
+    ENTITY_SIZE,
+    HALF_HEIGHT,
+    HALF_WIDTH,
+    CellIndex,
+    fold,
+    normalized,
+    shortest,
+)
+
+# what a keyed_random draw is for, so different uses get unrelated numbers
+(
+    ZOMBIE_X,
+    ZOMBIE_Y,
+    ZOMBIE_ANGLE,
+    ZOMBIE_TURN,
+    ZOMBIE_WAIT,
+    ZOMBIE_STEER,
+    HUMAN_X,
+    HUMAN_Y,
+    HUMAN_HEADING,
+    HUMAN_LIFETIME,
+    FOOD_X,
+    FOOD_Y,
+) = range(12)
+
+MASK: int = (1 << 64) - 1
+GOLDEN: int = 0x9E3779B97F4A7C15
+MIX_1: int = 0xBF58476D1CE4E5B9
+MIX_2: int = 0x94D049BB133111EB
+
+# name, dtype and width (0 for one value per agent) of each shared column
+Spec = tuple[tuple[str, str, int], ...]
+ZOMBIE_COLUMNS: Spec = (
+    ("id", "i8", 0),
+    ("pos", "f8", 2),
+    ("dir", "f8", 2),
+    ("angle", "f8", 0),
+    ("wait", "i8", 0),
+)
+HUMAN_COLUMNS: Spec = (
+    ("id", "i8", 0),
+    ("pos", "f8", 2),
+    ("dir", "f8", 2),
+    ("start", "f8", 0),
+    ("age", "i8", 0),
+    ("energy", "f8", 0),
+    ("alive", "?", 0),
+    ("bitten", "?", 0),
+)
+# food with nothing left has an amount of 0, there is no separate count
+FOOD_COLUMNS: Spec = (
+    ("id", "i8", 0),
+    ("pos", "f8", 2),
+    ("amount", "i8", 0),
+)
+# where each tile's agents start, the last entry being how many there are
+OFFSET_COLUMNS: Spec = (
+    ("zombies", "i8", 0),
+    ("humans", "i8", 0),
+)
+# run by the workers, everything else by the coordinating process
+TILE_PHASES: tuple[str, ...] = (
+    "update_zombies",
+    "update_humans",
+    "update_humans_to_zombies",
+    "update_eaten_food",
+)
+
+
+def _mix(value: int) -> int:
+    value = ((value ^ (value >> 30)) * MIX_1) & MASK
+    value = ((value ^ (value >> 27)) * MIX_2) & MASK
+    return value ^ (value >> 31)
+
+
+def _mix_all(values: np.ndarray) -> np.ndarray:
+    # uint64 arrays wrap around on overflow, which is the point here
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(MIX_1)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(MIX_2)
+    mixed: np.ndarray = values ^ (values >> np.uint64(31))
+    return mixed
+
+
+def keyed_random(seed: int, stream: int, tick: int, ids: np.ndarray) -> np.ndarray:
+    """Uniform [0, 1) for each id, fixed by seed, stream, tick and id alone"""
+    key = _mix((_mix((_mix(seed & MASK) + stream * GOLDEN) & MASK) + tick) & MASK)
+    bits = _mix_all(ids.astype(np.uint64) * np.uint64(GOLDEN) + np.uint64(key))
+    draws: np.ndarray = (bits >> np.uint64(11)).astype(np.float64) * 2.0**-53
+    return draws
+
+
+def keyed_integers(
+    seed: int, stream: int, tick: int, ids: np.ndarray, low: int, high: int
+) -> np.ndarray:
+    """From low up to but not including high, like Generator.integers"""
+    draws = keyed_random(seed, stream, tick, ids)
+    values: np.ndarray = low + np.floor(draws * (high - low)).astype(np.int64)
+    return values
+
+
+def keyed_directions(seed: int, stream: int, tick: int, ids: np.ndarray) -> np.ndarray:
+    angles = np.radians(keyed_integers(seed, stream, tick, ids, 0, 360))
+    return np.column_stack((np.cos(angles), np.sin(angles)))
+
+
+class Rules(NamedTuple):
+    """The entity constants of a run, taken when the world is made so that
+    workers use them however they were started"""
+
+    zombie_vision: float
+    zombie_energy: float
+    attack_wait_max: int
+    human_vision: float
+    energy_level: float
+    hungry_level: float
+    energy_decay: float
+    food_amount: int
+
+    @classmethod
+    def current(cls) -> "Rules":
+        return cls(
+            float(entities.ZOMBIE_VISION),
+            float(entities.ZOMBIE_ENERGY),
+            int(entities.ZOMBIE_ATTACK_WAIT_MAX),
+            float(entities.HUMAN_VISION),
+            float(entities.HUMAN_ENERGY_LEVEL),
+            float(entities.HUMAN_HUNGRY_LEVEL),
+            float(entities.HUMAN_ENERGY_DECAY),
+            int(entities.DEFAULT_FOOD_AMOUNT),
+        )
+
+    @property
+    def halo(self) -> float:
+        """How close to a tile an agent can be and still matter to it"""
+        reach = max(self.zombie_vision, self.human_vision, BITE_RADIUS)
+        step = max(self.zombie_energy, self.energy_level)
+        return reach + 2 * step + ENTITY_SIZE
+
+
+class SharedColumns:
+    """Equal length NumPy columns packed into one shared memory block"""
+
+    def __init__(self, spec: Spec, capacity: int, name: Optional[str] = None):
+        self.spec: Spec = spec
+        self.capacity: int = capacity
+        shapes: list[tuple[str, str, tuple[int, ...], int]] = []
+        size = 0
+        for column, dtype, width in spec:
+            shape = (capacity, width) if width else (capacity,)
+            shapes.append((column, dtype, shape, size))
+            size += -(-np.dtype(dtype).itemsize * math.prod(shape) // 8) * 8
+        self.memory: SharedMemory = SharedMemory(
+            name=name, create=name is None, size=max(size, 8)
+        )
+        self.columns: dict[str, np.ndarray] = {
+            column: np.ndarray(shape, dtype, buffer=self.memory.buf, offset=offset)
+            for column, dtype, shape, offset in shapes
+        }
+
+    @property
+    def handle(self) -> tuple[Spec, int, str]:
+        """What another process needs to attach to the same block"""
+        return self.spec, self.capacity, self.memory.name
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def keep(self, count: int, keep: np.ndarray) -> int:
+        """Move the rows where keep is set to the front, in order, returns
+        how many there are now"""
+        for values in self.columns.values():
+            kept = values[:count][keep]
+            values[: len(kept)] = kept
+        return int(np.count_nonzero(keep))
+
+    def reorder(self, count: int, order: np.ndarray) -> None:
+        for values in self.columns.values():
+            values[:count] = values[:count][order]
+
+    def close(self) -> None:
+        # every view into the block has to go before it can be unmapped
+        self.columns = {}
+        self.memory.close()
+
+
+def _release(blocks: list[SharedColumns], connections: list[Connection]) -> None:
+    for connection in connections:
+        try:
+            connection.send(None)
+            connection.close()
+        except OSError:
+            pass
+    for block in blocks:
+        block.close()
+        block.memory.unlink()
+
+
+class Tiling:
+    """A grid of columns x rows tiles over the wrapping world"""
+
+    def __init__(
+        self,
+        origin: tuple[float, float],
+        size: tuple[float, float],
+        columns: int,
+        rows: int,
+    ):
+        self.left, self.top = origin
+        self.width, self.height = size
+        self.columns: int = columns
+        self.rows: int = rows
+        self.tile_width: float = self.width / columns
+        self.tile_height: float = self.height / rows
+
+    @property
+    def count(self) -> int:
+        return self.columns * self.rows
+
+    def tile_of(self, points: np.ndarray) -> np.ndarray:
+        cols = np.floor((points[:, 0] - self.left) / self.tile_width).astype(np.int64)
+        rows = np.floor((points[:, 1] - self.top) / self.tile_height).astype(np.int64)
+        tiles: np.ndarray = (rows % self.rows) * self.columns + cols % self.columns
+        return tiles
+
+    def neighbours(self, tile: int) -> list[int]:
+        """The tile and the ones around it, each once however few there are"""
+        row, col = divmod(tile, self.columns)
+        return sorted(
+            {
+                ((row + drow) % self.rows) * self.columns + (col + dcol) % self.columns
+                for drow in (-1, 0, 1)
+                for dcol in (-1, 0, 1)
+            }
+        )
+
+    def near(self, points: np.ndarray, tile: int, margin: float) -> np.ndarray:
+        """Which points are within margin of the tile on both axes, going
+        the short way around"""
+        row, col = divmod(tile, self.columns)
+        x_gap = self._gap(
+            points[:, 0], self.left + col * self.tile_width, self.tile_width, self.width
+        )
+        y_gap = self._gap(
+            points[:, 1],
+            self.top + row * self.tile_height,
+            self.tile_height,
+            self.height,
+        )
+        near: np.ndarray = (x_gap <= margin) & (y_gap <= margin)
+        return near
+
+    def _gap(
+        self, values: np.ndarray, low: float, length: float, size: float
+    ) -> np.ndarray:
+        past = (values - low) % size
+        gap: np.ndarray = np.where(
+            past < length, 0.0, np.minimum(past - length, size - past)
+        )
+        return gap
+
+
+def grid_for(size: tuple[float, float], tiles: int, halo: float) -> tuple[int, int]:
+    """Columns and rows for at most this many tiles, none narrower than the
+    halo, with the tiles as close to square as can be"""
+    width, height = size
+    most_columns = max(1, int(width // halo))
+    most_rows = max(1, int(height // halo))
+    for count in range(max(1, tiles), 0, -1):
+        shapes = [
+            (columns, count // columns)
+            for columns in range(1, count + 1)
+            if count % columns == 0
+            and columns <= most_columns
+            and count // columns <= most_rows
+        ]
+        if shapes:
+            return min(
+                shapes,
+                key=lambda shape: abs(
+                    math.log((width / shape[0]) / (height / shape[1]))
+                ),
+            )
+    return 1, 1
+
+
+class Layout(NamedTuple):
+    """Everything a worker needs to step tiles of a world"""
+
+    seed: int
+    rules: Rules
+    origin: tuple[float, float]
+    size: tuple[float, float]
+    grid: tuple[int, int]
+    zombies: tuple[Spec, int, str]
+    humans: tuple[Spec, int, str]
+    food: tuple[Spec, int, str]
+    offsets: tuple[Spec, int, str]
+
+
+Counts = dict[str, int]
+
+
+class TileStepper:
+    """Runs the per-agent phases of a tick for a set of tiles"""
+
+    def __init__(
+        self,
+        layout: Layout,
+        tiles: Sequence[int],
+        blocks: Optional[Sequence[SharedColumns]] = None,
+    ):
+        self.seed: int = layout.seed
+        self.rules: Rules = layout.rules
+        self.halo: float = layout.rules.halo
+        self.origin: tuple[float, float] = layout.origin
+        self.size: tuple[float, float] = layout.size
+        self.span: float = math.hypot(*layout.size)
+        self.tiling: Tiling = Tiling(layout.origin, layout.size, *layout.grid)
+        self.tiles: list[int] = list(tiles)
+        if blocks is None:
+            blocks = [
+                SharedColumns(*handle)
+                for handle in (
+                    layout.zombies,
+                    layout.humans,
+                    layout.food,
+                    layout.offsets,
+                )
+            ]
+        self.zombies, self.humans, self.food, self.offsets = blocks
+        self.tick: int = 0
+        self._counts: Counts = {}
+
+    def run(self, phase: str, tick: int) -> Counts:
+        """One phase for every tile, returns what happened"""
+        if phase not in TILE_PHASES:
+            raise ValueError(f"not a tile phase: {phase}")
+        self.tick = tick
+        self._counts = {}
+        step: Callable[[int], None] = getattr(self, phase)
+        for tile in self.tiles:
+            step(tile)
+        return self._counts
+
+    def count(self, name: str, amount: int) -> None:
+        self._counts[name] = self._counts.get(name, 0) + amount
+
+    def owned(self, kind: str, tile: int) -> tuple[int, int]:
+        offsets = self.offsets[kind]
+        return int(offsets[tile]), int(offsets[tile + 1])
+
+    def ghosts(self, kind: str, block: SharedColumns, tile: int) -> np.ndarray:
+        """Slots of everything owned by the tile or its neighbours that is
+        within the halo of it"""
+        offsets = self.offsets[kind]
+        slots = np.concatenate(
+            [
+                np.arange(offsets[each], offsets[each + 1])
+                for each in self.tiling.neighbours(tile)
+            ]
+        )
+        near: np.ndarray = slots[self.tiling.near(block["pos"][slots], tile, self.halo)]
+        return near
+
+    def index_of(self, positions: np.ndarray, cell_size: float) -> CellIndex:
+        # the grid spans the whole world but only a tile's worth of agents
+        # go in, so cells no smaller than the halo keep it from being mostly
+        # empty cells
+        return CellIndex(positions, self.origin, self.size, max(cell_size, self.halo))
+
+    def update_zombies(self, tile: int) -> None:
+        zombies, humans, rules = self.zombies, self.humans, self.rules
+        first, last = self.owned("zombies", tile)
+        wait = zombies["wait"][first:last]
+        waiting = wait > 0
+        wait[waiting] -= 1
+        active = first + np.flatnonzero(~waiting)
+        if not len(active):
+            return
+        start = zombies["pos"][active]
+        goto = start.copy()
+        vision = rules.zombie_vision
+        seen_by = self.ghosts("humans", humans, tile)
+        if len(seen_by):
+            index = self.index_of(humans["pos"][seen_by], vision)
+            victims = index.closest(start, vision, humans["id"][seen_by])
+            seen = victims >= 0
+            if seen.any():
+                chasing = start[seen]
+                direc, dist = shortest(
+                    index.positions[victims[seen]] - chasing, self.size
+                )
+                factor = vision - dist
+                goto[seen] = np.trunc(chasing + factor[:, None] * direc)
+        heading = normalized(goto + zombies["dir"][active] - start)
+        victim_angle = np.arctan2(heading[:, 1], heading[:, 0])
+        angle = zombies["angle"][active]
+        steer = keyed_random(self.seed, ZOMBIE_STEER, self.tick, zombies["id"][active])
+        turn = np.radians(steer * 45)
+        angle = np.where(
+            victim_angle > angle,
+            angle + turn,
+            np.where(victim_angle < angle, angle - turn, angle),
+        )
+        direction = np.column_stack((np.cos(angle), np.sin(angle)))
+        zombies["angle"][active] = angle
+        zombies["dir"][active] = direction
+        zombies["pos"][active] = np.round(start + direction * rules.zombie_energy)
+
+    def update_humans(self, tile: int) -> None:
+        humans, rules = self.humans, self.rules
+        first, last = self.owned("humans", tile)
+        age = humans["age"][first:last]
+        energy = humans["start"][first:last] - age * rules.energy_decay
+        age += 1
+        alive = energy > 0
+        humans["alive"][first:last] = alive
+        humans["energy"][first:last] = energy
+        self.count("starved", int(len(alive) - np.count_nonzero(alive)))
+        moving = first + np.flatnonzero(alive)
+        if not len(moving):
+            return
+        energy = energy[alive]
+        pos = humans["pos"][moving]
+        goto = pos + self.run_from_zombies(pos, tile) + self.run_to_food(pos, energy)
+        direction = normalized(goto + humans["dir"][moving] - pos)
+        humans["dir"][moving] = direction
+        humans["pos"][moving] = np.round(pos + direction * energy[:, None])
+
+    def run_from_zombies(self, pos: np.ndarray, tile: int) -> np.ndarray:
+        push = np.zeros_like(pos)
+        zombies = self.zombies
+        near = self.ghosts("zombies", zombies, tile)
+        if not len(near):
+            return push
+        vision = self.rules.human_vision
+        index = self.index_of(zombies["pos"][near], vision)
+        human, zombie, _ = index.pairs(pos, vision)
+        if len(human):
+            # sum in an order that does not depend on the tiling
+            order = np.lexsort((zombies["id"][near][zombie], human))
+            human, zombie = human[order], zombie[order]
+            direc, dist = shortest(index.positions[zombie] - pos[human], self.size)
+            direc = -direc
+            factor = (vision - dist) ** 2
+            for axis in (0, 1):
+                push[:, axis] = np.bincount(
+                    human, weights=factor * direc[:, axis], minlength=len(pos)
+                )
+        return push
+
+    def run_to_food(self, pos: np.ndarray, energy: np.ndarray) -> np.ndarray:
+        pull = np.zeros_like(pos)
+        hungry = np.flatnonzero(energy < self.rules.hungry_level)
+        food_pos = self.food["pos"][self.food["amount"] > 0]
+        if not len(hungry) or not len(food_pos):
+            return pull
+        start = pos[hungry]
+        delta = food_pos[None, :, :] - start[:, None, :]
+        dist = np.hypot(delta[..., 0], delta[..., 1])
+        dist = np.where(dist > self.span / 2.0, self.span - dist, dist)
+        nearest = np.argmin(dist, axis=1)
+        direc, _, reverse = fold(food_pos[nearest] - start, self.span)
+        direc = np.where(reverse[:, None], -direc, direc)
+        factor = (energy[hungry] / 4 * self.rules.human_vision) ** 2
+        pull[hungry] = factor[:, None] * direc
+        return pull
+
+    def update_humans_to_zombies(self, tile: int) -> None:
+        humans, zombies = self.humans, self.zombies
+        first, last = self.owned("humans", tile)
+        owned = first + np.flatnonzero(humans["alive"][first:last])
+        near = self.ghosts("zombies", zombies, tile)
+        if not len(owned) or not len(near):
+            return
+        index = self.index_of(humans["pos"][owned], BITE_RADIUS)
+        biters = zombies["pos"][near]
+        zombie, human, _ = index.pairs(biters, BITE_RADIUS)
+        delta = index.positions[human] - biters[zombie]
+        human = human[(delta[:, 0] ** 2 + delta[:, 1] ** 2) <= BITE_RADIUS**2]
+        if not len(human):
+            return
+        turned = np.unique(human)
+        humans["bitten"][owned[turned]] = True
+        self.count("bites", len(human))
+        self.count("turns", len(turned))
+
+    def update_eaten_food(self, tile: int) -> None:
+        """Food is eaten by whoever its tile says, the eaters can belong to
+        any tile; someone next to two foods gets the same new lifetime from
+        both, so it does not matter which tile writes it"""
+        food, humans, rules = self.food, self.humans, self.rules
+        live = np.flatnonzero(food["amount"] > 0)
+        mine = live[self.tiling.tile_of(food["pos"][live]) == tile]
+        if not len(mine):
+            return
+        near = self.ghosts("humans", humans, tile)
+        near = near[
+            humans["alive"][near]
+            & ~humans["bitten"][near]
+            & (humans["energy"][near] < rules.hungry_level)
+        ]
+        if not len(near):
+            return
+        index = self.index_of(humans["pos"][near], BITE_RADIUS)
+        meals = food["pos"][mine]
+        meal, human, _ = index.pairs(meals, BITE_RADIUS)
+        delta = np.abs(index.positions[human] - meals[meal])
+        touching = (delta[:, 0] < ENTITY_SIZE) & (delta[:, 1] < ENTITY_SIZE)
+        meal, human = meal[touching], human[touching]
+        if not len(meal):
+            return
+        order = np.lexsort((humans["id"][near][human], meal))
+        meal, human = meal[order], human[order]
+        eaters: list[int] = []
+        for each in np.unique(meal):
+            slot = mine[each]
+            amount = int(food["amount"][slot])
+            ate = human[meal == each][:amount]
+            food["amount"][slot] = amount - len(ate)
+            eaters.extend(ate.tolist())
+        slots = near[np.array(eaters, dtype=np.int64)]
+        who = humans["id"][slots]
+        spread = rules.energy_level - rules.hungry_level
+        lifetime = keyed_random(self.seed, HUMAN_LIFETIME, self.tick, who)
+        humans["start"][slots] = rules.hungry_level + lifetime * spread
+        humans["age"][slots] = 0
+        humans["dir"][slots] = keyed_directions(
+            self.seed, HUMAN_HEADING, self.tick, who
+        )
+        self.count("eaten", len(slots))
+
+    def close(self) -> None:
+        for block in (self.zombies, self.humans, self.food, self.offsets):
+            block.close()
+
+
+def _serve(connection: Connection, layout: Layout, tiles: list[int]) -> None:
+    stepper = TileStepper(layout, tiles)
+    try:
+        while True:
+            message = connection.recv()
+            if message is None:
+                break
+            phase, tick = message
+            reply: Union[Counts, Exception]
+            try:
+                reply = stepper.run(phase, tick)
+            except Exception as error:
+                reply = error
+            connection.send(reply)
+    except EOFError:
+        pass
+    finally:
+        stepper.close()
+
+
+class TiledWorld:
+    def __init__(
+        self,
+        rect: Bounds,
+        start_zombies: int,
+        start_humans: int,
+        max_food: int,
+        streams: Optional[zutil.RandomStreams] = None,
+        workers: Optional[int] = None,
+        grid: Optional[tuple[int, int]] = None,
+    ):
+        """workers is how many processes step tiles, all the cores by
+        default; 0 or 1 steps them in this process. grid is the tiles'
+        columns and rows, by default one tile per worker"""
+        self.streams: zutil.RandomStreams = streams or zutil.RandomStreams()
+        self.seed: int = self.streams.seed
+        self.rules: Rules = Rules.current()
+        self.left, self.top = rect.topleft
+        self.right, self.bottom = rect.bottomright
+        self.width = float(self.right - self.left)
+        self.height = float(self.bottom - self.top)
+        self.max_food: int = max_food
+        self.tick: int = 0
+        self.counts: EventCounts = EventCounts()
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        origin = float(self.left), float(self.top)
+        size = self.width, self.height
+        if grid is None:
+            grid = grid_for(size, workers, self.rules.halo)
+        self.tiling: Tiling = Tiling(origin, size, *grid)
+        workers = min(workers, self.tiling.count)
+
+        self.zombies: SharedColumns = SharedColumns(
+            ZOMBIE_COLUMNS, max(1, start_zombies + start_humans)
+        )
+        self.humans: SharedColumns = SharedColumns(HUMAN_COLUMNS, max(1, start_humans))
+        self.food: SharedColumns = SharedColumns(FOOD_COLUMNS, max(1, max_food))
+        self.offsets: SharedColumns = SharedColumns(
+            OFFSET_COLUMNS, self.tiling.count + 1
+        )
+        blocks = [self.zombies, self.humans, self.food, self.offsets]
+        self._connections: list[Connection] = []
+        self._processes: list[BaseProcess] = []
+        self._finalizer = weakref.finalize(self, _release, blocks, self._connections)
+        self.zombie_count: int = 0
+        self.human_count: int = 0
+        self._next_zombie: int = 0
+        self._next_food: int = 0
+
+        ids = np.arange(start_zombies)
+        self.add_zombies(
+            np.column_stack(
+                (
+                    self.random_xs(ZOMBIE_X, 0, ids),
+                    self.random_ys(ZOMBIE_Y, 0, ids),
+                )
+            )
+        )
+        ids = np.arange(start_humans)
+        humans = self.humans
+        humans["id"][:start_humans] = ids
+        humans["pos"][:start_humans, 0] = self.random_xs(HUMAN_X, 0, ids)
+        humans["pos"][:start_humans, 1] = self.random_ys(HUMAN_Y, 0, ids)
+        humans["dir"][:start_humans] = keyed_directions(
+            self.seed, HUMAN_HEADING, 0, ids
+        )
+        spread = self.rules.energy_level - self.rules.hungry_level
+        lifetime = keyed_random(self.seed, HUMAN_LIFETIME, 0, ids)
+        humans["start"][:start_humans] = self.rules.hungry_level + lifetime * spread
+        humans["alive"][:start_humans] = True
+        self.human_count = start_humans
+        self.add_food(max_food)
+        self.retile()
+
+        layout = Layout(
+            self.seed,
+            self.rules,
+            origin,
+            size,
+            grid,
+            self.zombies.handle,
+            self.humans.handle,
+            self.food.handle,
+            self.offsets.handle,
+        )
+        tiles = list(range(self.tiling.count))
+        self._local: Optional[TileStepper] = None
+        if workers <= 1:
+            self._local = TileStepper(layout, tiles, blocks)
+            return
+        for worker in range(workers):
+            ours, theirs = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_serve,
+                args=(theirs, layout, tiles[worker::workers]),
+                name=f"zombiesim-tiles-{worker}",
+                daemon=True,
+            )
+            process.start()
+            theirs.close()
+            self._connections.append(ours)
+            self._processes.append(process)
+
+    @property
+    def workers(self) -> int:
+        return len(self._processes)
+
+    def random_xs(self, stream: int, tick: int, ids: np.ndarray) -> np.ndarray:
+        xs = keyed_integers(self.seed, stream, tick, ids, self.left, self.right)
+        return xs.astype(np.float64)
+
+    def random_ys(self, stream: int, tick: int, ids: np.ndarray) -> np.ndarray:
+        ys = keyed_integers(self.seed, stream, tick, ids, self.top, self.bottom)
+        return ys.astype(np.float64)
+
+    def add_zombies(self, positions: np.ndarray) -> None:
+        first, count = self.zombie_count, len(positions)
+        last = first + count
+        ids = np.arange(self._next_zombie, self._next_zombie + count)
+        self._next_zombie += count
+        angle = np.radians(
+            keyed_integers(self.seed, ZOMBIE_ANGLE, self.tick, ids, 0, 360)
+        )
+        angle = angle + np.radians(
+            keyed_integers(self.seed, ZOMBIE_TURN, self.tick, ids, -45, 46)
+        )
+        most = self.rules.attack_wait_max
+        zombies = self.zombies
+        zombies["id"][first:last] = ids
+        zombies["pos"][first:last] = positions
+        zombies["angle"][first:last] = angle
+        zombies["dir"][first:last] = np.column_stack((np.cos(angle), np.sin(angle)))
+        zombies["wait"][first:last] = keyed_integers(
+            self.seed, ZOMBIE_WAIT, self.tick, ids, int(most / 2), most + 1
+        )
+        self.zombie_count = last
+
+    def add_food(self, count: int) -> None:
+        food = self.food
+        first = int(np.count_nonzero(food["amount"] > 0))
+        last = first + count
+        ids = np.arange(self._next_food, self._next_food + count)
+        self._next_food += count
+        food["id"][first:last] = ids
+        food["pos"][first:last, 0] = self.random_xs(FOOD_X, self.tick, ids)
+        food["pos"][first:last, 1] = self.random_ys(FOOD_Y, self.tick, ids)
+        food["amount"][first:last] = self.rules.food_amount
+
+    def retile(self) -> None:
+        """Sort everyone by the tile they are in now, so each tile's agents
+        are one slice of the columns"""
+        for block, count, kind in (
+            (self.zombies, self.zombie_count, "zombies"),
+            (self.humans, self.human_count, "humans"),
+        ):
+            tiles = self.tiling.tile_of(block["pos"][:count])
+            block.reorder(count, np.lexsort((block["id"][:count], tiles)))
+            offsets = self.offsets[kind]
+            offsets[0] = 0
+            offsets[1:] = np.cumsum(np.bincount(tiles, minlength=self.tiling.count))
+
+    def run_phase(self, phase: str) -> None:
+        if self._local is not None:
+            replies: list[Union[Counts, Exception]] = [
+                self._local.run(phase, self.tick)
+            ]
+        else:
+            for connection in self._connections:
+                connection.send((phase, self.tick))
+            replies = [connection.recv() for connection in self._connections]
+        for reply in replies:
+            if isinstance(reply, Exception):
+                raise reply
+            for name, amount in reply.items():
+                setattr(self.counts, name, getattr(self.counts, name) + amount)
+
+    def update_zombies(self) -> None:
+        self.run_phase("update_zombies")
+
+    def update_humans(self) -> None:
+        self.run_phase("update_humans")
+
+    def update_humans_to_zombies(self) -> None:
+        self.run_phase("update_humans_to_zombies")
+
+    def update_eaten_food(self) -> None:
+        self.run_phase("update_eaten_food")
+
+    def check_and_fix_edges(self) -> None:
+        for positions in (
+            self.zombies["pos"][: self.zombie_count],
+            self.humans["pos"][: self.human_count],
+        ):
+            for axis, low, high, half in (
+                (0, self.left, self.right, HALF_WIDTH),
+                (1, self.top, self.bottom, HALF_HEIGHT),
+            ):
+                values = positions[:, axis]
+                values[values - half < low] = high - half
+                values[values + half > high] = low + half
+
+    def check_food(self) -> None:
+        """The end of the tick: the bitten become zombies, the dead and
+        eaten up go, food is refilled and everyone is re-tiled"""
+        humans, count = self.humans, self.human_count
+        alive = humans["alive"][:count]
+        bitten = humans["bitten"][:count]
+        turned = np.flatnonzero(alive & bitten)
+        turned = turned[np.argsort(humans["id"][turned], kind="stable")]
+        positions = humans["pos"][turned]
+        self.human_count = humans.keep(count, alive & ~bitten)
+        self.add_zombies(positions)
+
+        food = self.food
+        left = food.keep(food.capacity, food["amount"] > 0)
+        food["amount"][left:] = 0
+        missing = self.max_food - left
+        if missing > 0:
+            self.add_food(missing)
+        self.retile()
+
+    def census(self) -> Census:
+        humans = self.human_count
+        energy = self.humans["energy"][:humans]
+        return Census(
+            humans,
+            self.zombie_count,
+            int(np.count_nonzero(self.food["amount"] > 0)),
+            float(energy.mean()) if humans else 0.0,
+        )
+
+    def all_dead(self) -> bool:
+        return not self.human_count
+
+    def close(self) -> None:
+        """Stop the workers and free the shared memory"""
+        self._local = None
+        self._finalizer()
+        for process in self._processes:
+            process.join()
+
+    def __enter__(self) -> "TiledWorld":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+CallableTiledWorldCreator = Callable[[Bounds], TiledWorld]
+
+
+def tiled_world_creator(
+    start_zombies: int,
+    start_humans: int,
+    max_food: int,
+    seed: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> CallableTiledWorldCreator:
+    def creator(rect: Bounds) -> TiledWorld:
+        return TiledWorld(
+            rect,
+            start_zombies,
+            start_humans,
+            max_food,
+            streams=zutil.RandomStreams(seed),
+            workers=workers,
+        )
+
+    return creator
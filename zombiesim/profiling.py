@@ -0,0 +1,233 @@
+"""
+Built-in profiling for a running simulation.
+
+A Profiler is a PhaseTimer that also keeps a rolling window of how long
+each named span took, for percentiles and a histogram. Whatever is timed -
+Simulation phases, the Field's grid rebuilds and batch updates, event
+dispatch in EventLookup, drawing - only goes through it while it is
+installed; uninstalled, each of those places is back to a single "is there
+a timer" check.
+
+An Overlay draws the spans over the screen. A StackSampler takes samples
+of the main thread's Python stack from a background thread for a number of
+seconds and writes them in the folded format flamegraph tools read
+("outer;inner;innermost count" per line).
+"""
+
+import bisect
+import collections
+import contextlib
+import math
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from types import FrameType
+from typing import ContextManager, Optional
+
+import pygame
+
+from zombiesim.simulation import PhaseTimer
+
+# samples kept per span
+WINDOW: int = 600
+# histogram bucket edges in seconds, the last bucket is everything slower
+BUCKETS: tuple[float, ...] = tuple(10.0 ** (exp / 2.0) / 1e6 for exp in range(10))
+SAMPLE_INTERVAL: float = 0.005
+
+
+class SpanStats:
+    """The last window durations of one span"""
+
+    def __init__(self, window: int = WINDOW):
+        self.samples: "collections.deque[float]" = collections.deque(maxlen=window)
+        self.calls: int = 0
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.calls += 1
+
+    def percentile(self, fraction: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def mean(self) -> float:
+        return sum(self.samples) / len(self.samples) if self.samples else 0.0
+
+    def histogram(self, edges: tuple[float, ...] = BUCKETS) -> list[int]:
+        """How many samples fall under each edge, then how many above all"""
+        counts = [0] * (len(edges) + 1)
+        for seconds in self.samples:
+            counts[bisect.bisect_left(edges, seconds)] += 1
+        return counts
+
+    def __str__(self) -> str:
+        return "{0:.2f}/{1:.2f}/{2:.2f}ms".format(
+            1000.0 * self.percentile(0.5),
+            1000.0 * self.percentile(0.95),
+            1000.0 * max(self.samples, default=0.0),
+        )
+
+
+class Profiler(PhaseTimer):
+    def __init__(
+        self, clock: Callable[[], float] = time.perf_counter, window: int = WINDOW
+    ):
+        super().__init__(clock)
+        self.window: int = window
+        self.spans: dict[str, SpanStats] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        self.totals[name] = self.totals.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+        stats = self.spans.get(name)
+        if stats is None:
+            stats = self.spans[name] = SpanStats(self.window)
+        stats.add(seconds)
+
+    def time(self, name: str, func: Callable[[], None]) -> None:
+        begin = self.clock()
+        func()
+        self.record(name, self.clock() - begin)
+
+    @contextlib.contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        begin = self.clock()
+        try:
+            yield
+        finally:
+            self.record(name, self.clock() - begin)
+
+    def reset(self) -> None:
+        self.totals.clear()
+        self.calls.clear()
+        self.spans.clear()
+
+
+def span(timer: Optional[PhaseTimer], name: str) -> ContextManager[None]:
+    """timer.span(name) if there is a Profiler to time with, else nothing"""
+    if isinstance(timer, Profiler):
+        return timer.span(name)
+    return contextlib.nullcontext()
+
+
+class Overlay:
+    """A box of span timings (p50/p95/max) with a histogram per span"""
+
+    def __init__(self, profiler: Profiler, topleft: tuple[int, int] = (10, 10)):
+        self.profiler: Profiler = profiler
+        self.topleft: tuple[int, int] = topleft
+        self.visible: bool = False
+        self._font: Optional[pygame.font.Font] = None
+
+    def toggle(self) -> None:
+        self.visible = not self.visible
+
+    def font(self) -> pygame.font.Font:
+        if self._font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            self._font = pygame.font.Font(None, 18)
+        return self._font
+
+    def lines(self) -> list[tuple[str, SpanStats]]:
+        return [
+            (f"{name} {stats}", stats)
+            for name, stats in sorted(self.profiler.spans.items())
+        ]
+
+    def draw(self, screen: pygame.surface.Surface) -> Optional[pygame.Rect]:
+        """Draw over the screen, returns the area drawn (None if hidden)"""
+        if not self.visible:
+            return None
+        font = self.font()
+        lines = self.lines() or [("no spans yet", SpanStats())]
+        height = font.get_linesize()
+        bar_width = 4 * (len(BUCKETS) + 1)
+        text_width = max(font.size(text)[0] for text, _ in lines)
+        area = pygame.Rect(
+            self.topleft, (text_width + bar_width + 15, height * len(lines) + 10)
+        )
+        area = area.clip(screen.get_rect())
+        screen.fill(pygame.Color("black"), area)
+        x, y = area.x + 5, area.y + 5
+        for text, stats in lines:
+            screen.blit(font.render(text, True, pygame.Color("white")), (x, y))
+            counts = stats.histogram()
+            most = max(counts) or 1
+            bar_x = x + text_width + 5
+            for count in counts:
+                bar = int(math.ceil((height - 2) * count / most))
+                screen.fill(
+                    pygame.Color("orange"),
+                    (bar_x, y + height - 1 - bar, 3, bar),
+                )
+                bar_x += 4
+            y += height
+        return area
+
+
+def frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", code.co_filename)
+    return f"{module}.{code.co_name}"
+
+
+def folded_stack(frame: Optional[FrameType]) -> str:
+    """A stack outermost first, ";" between frames"""
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """Samples one thread's stack in the background for a fixed time"""
+
+    def __init__(
+        self,
+        thread_id: Optional[int] = None,
+        interval: float = SAMPLE_INTERVAL,
+    ):
+        if thread_id is None:
+            thread_id = threading.main_thread().ident or 0
+        self.thread_id: int = thread_id
+        self.interval: float = interval
+        self.stacks: collections.Counter[str] = collections.Counter()
+        self._thread: Optional[threading.Thread] = None
+
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float, path: str) -> None:
+        """Sample for seconds then write the profile to path, without
+        waiting; does nothing if already sampling"""
+        if self.running():
+            return
+        self._thread = threading.Thread(
+            target=self._run, args=(seconds, path), name="stack-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def join(self) -> None:
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self, seconds: float, path: str) -> None:
+        self.stacks = collections.Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[folded_stack(frame)] += 1
+            del frame
+            time.sleep(self.interval)
+        self.write(path)
+
+    def write(self, path: str) -> None:
+        with open(path, "w") as out:
+            for stack, count in self.stacks.most_common():
+                out.write(f"{stack} {count}\n")
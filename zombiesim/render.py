@@ -0,0 +1,199 @@
+"""
+Dirty-rect drawing: only the parts of the screen where something moved,
+appeared, disappeared or changed image are redrawn and pushed to the display.
+
+The screen is split into square tiles. Each frame the image and position of
+every sprite is compared with what was drawn last time; every tile touched
+by a change (where the sprite was and where it is now) is cleared and
+redrawn, clipped to the tile, with all the sprites overlapping it in layer
+order. Frames where nothing changed cost one pass over the sprites and no
+drawing at all; frames where most tiles changed fall back to redrawing the
+whole screen.
+
+Given a View, sprites are drawn where and as big as it says (world
+positions through a Camera) rather than at their rects.
+"""
+
+from collections.abc import Iterable, Sequence
+from typing import Optional, Protocol
+
+import pygame
+
+TILE_SIZE: int = 64
+# redraw everything once this share of the tiles is dirty
+FULL_REDRAW_FRACTION: float = 0.4
+
+Drawn = tuple[pygame.Surface, int, int]
+
+
+class Drawable(Protocol):
+    image: pygame.Surface
+    rect: pygame.Rect
+
+
+class View(Protocol):
+    """Where on screen, and how big, things in the world are (see Camera)"""
+
+    def to_screen(self, x: float, y: float) -> tuple[int, int]: ...
+
+    def scaled(self, image: pygame.Surface) -> pygame.Surface: ...
+
+
+Entry = tuple[Drawable, pygame.Surface, int, int]
+
+
+class DirtyRenderer:
+    def __init__(
+        self,
+        background: pygame.Color = pygame.Color("black"),
+        tile_size: int = TILE_SIZE,
+        full_redraw_fraction: float = FULL_REDRAW_FRACTION,
+    ):
+        self.background: pygame.Color = background
+        self.tile_size: int = tile_size
+        self.full_redraw_fraction: float = full_redraw_fraction
+        self.full_redraws: int = 0
+        self.partial_redraws: int = 0
+        self.unchanged: int = 0
+        self._entries: list[Entry] = []
+        self._screen: Optional[pygame.Surface] = None
+        self._screen_size: tuple[int, int] = (0, 0)
+
+    def invalidate(self) -> None:
+        """Redraw everything next frame, e.g. after drawing over the screen"""
+        self._screen = None
+
+    def draw(
+        self,
+        screen: pygame.surface.Surface,
+        layers: Sequence[Iterable[Drawable]],
+        view: Optional[View] = None,
+    ) -> list[pygame.Rect]:
+        """Bring the screen up to date, returns the areas that need to go
+        to the display (pygame.display.update) - empty if nothing changed.
+        Without a view, sprite rects are screen positions"""
+        if view is None:
+            entries = [
+                (sprite, sprite.image, sprite.rect.x, sprite.rect.y)
+                for layer in layers
+                for sprite in layer
+            ]
+        else:
+            to_screen, scaled = view.to_screen, view.scaled
+            entries = [
+                (sprite, scaled(sprite.image), *to_screen(sprite.rect.x, sprite.rect.y))
+                for layer in layers
+                for sprite in layer
+            ]
+        previous, self._entries = self._entries, entries
+        if screen is not self._screen or screen.get_size() != self._screen_size:
+            return self._redraw_all(screen, entries)
+        if entries == previous:
+            self.unchanged += 1
+            return []
+
+        tile = self.tile_size
+        columns = -(-screen.get_width() // tile)
+        rows = -(-screen.get_height() // tile)
+        full_at = self.full_redraw_fraction * columns * rows
+        changed = self._changes(entries, previous, full_at)
+        # every change dirties at least one tile, most of them a different one
+        if changed is None:
+            return self._redraw_all(screen, entries)
+        dirty: set[int] = set()
+        for drawn in changed:
+            self._mark(dirty, drawn, columns, rows)
+        if len(dirty) >= full_at:
+            return self._redraw_all(screen, entries)
+
+        blits: dict[int, list[tuple[pygame.Surface, tuple[int, int]]]] = {
+            each: [] for each in dirty
+        }
+        for _, image, x, y in entries:
+            first_col, last_col, first_row, last_row = self._span(
+                x, y, image, columns, rows
+            )
+            for row in range(first_row, last_row + 1):
+                for col in range(first_col, last_col + 1):
+                    found = blits.get(row * columns + col)
+                    if found is not None:
+                        found.append((image, (x, y)))
+
+        rects = []
+        for each, sprites in blits.items():
+            row, col = divmod(each, columns)
+            area = pygame.Rect(col * tile, row * tile, tile, tile).clip(
+                screen.get_rect()
+            )
+            screen.set_clip(area)
+            screen.fill(self.background, area)
+            screen.blits(sprites, doreturn=False)
+            rects.append(area)
+        screen.set_clip(None)
+        self.partial_redraws += 1
+        return rects
+
+    def _changes(
+        self, entries: list[Entry], previous: list[Entry], limit: float
+    ) -> Optional[list[Drawn]]:
+        """Where things were and are for everything that changed, or None
+        as soon as there are too many to be worth tracking"""
+        changed: list[Drawn] = []
+        if len(entries) == len(previous):
+            # usually the same sprites in the same order
+            for new, old in zip(entries, previous):
+                if new[0] is not old[0]:
+                    break
+                if new != old:
+                    changed.append((new[1], new[2], new[3]))
+                    changed.append((old[1], old[2], old[3]))
+                    if len(changed) >= limit:
+                        return None
+            else:
+                return changed
+            changed = []
+        before: dict[Drawable, Drawn] = {
+            sprite: (image, x, y) for sprite, image, x, y in previous
+        }
+        for sprite, image, x, y in entries:
+            drawn = (image, x, y)
+            was = before.pop(sprite, None)
+            if was != drawn:
+                changed.append(drawn)
+                if was is not None:
+                    changed.append(was)
+                if len(changed) >= limit:
+                    return None
+        changed.extend(before.values())
+        return changed if len(changed) < limit else None
+
+    def _redraw_all(
+        self, screen: pygame.surface.Surface, entries: list[Entry]
+    ) -> list[pygame.Rect]:
+        self._screen = screen
+        self._screen_size = screen.get_size()
+        screen.fill(self.background)
+        screen.blits([(image, (x, y)) for _, image, x, y in entries], doreturn=False)
+        self.full_redraws += 1
+        return [screen.get_rect()]
+
+    def _span(
+        self, x: int, y: int, image: pygame.Surface, columns: int, rows: int
+    ) -> tuple[int, int, int, int]:
+        tile = self.tile_size
+        width, height = image.get_size()
+        return (
+            max(x // tile, 0),
+            min((x + width - 1) // tile, columns - 1),
+            max(y // tile, 0),
+            min((y + height - 1) // tile, rows - 1),
+        )
+
+    def _mark(self, dirty: set[int], drawn: Drawn, columns: int, rows: int) -> None:
+        image, x, y = drawn
+        first_col, last_col, first_row, last_row = self._span(
+            x, y, image, columns, rows
+        )
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                dirty.add(row * columns + col)
@@ -0,0 +1,88 @@
+"""
+Fixed-timestep driver: decides how many simulation ticks are due each time
+a frame is drawn.
+
+Real time is accumulated and paid out a whole tick at a time, so the
+simulation always advances in identical steps however fast or slow frames
+are drawn; a slow frame means several ticks before the next draw, not a
+different simulation. How much real time one frame can claim is capped, so
+after a stall the simulation slows down instead of trying to catch up all
+at once.
+"""
+
+import math
+import time
+from collections.abc import Callable
+
+# run as many ticks as fit in the frame budget
+MAX_SPEED: float = math.inf
+SPEEDS: tuple[float, ...] = (1.0, 10.0, MAX_SPEED)
+# a frame that took longer than this only counts as this long
+MAX_FRAME_MS: float = 250.0
+# at MAX_SPEED, how long to simulate for between frames
+FRAME_BUDGET_MS: float = 1000.0 / 60
+
+
+class FixedTimestep:
+    """Calls step once per tick due; step returns False when there is
+    nothing left to simulate, which ends the frame's ticks early"""
+
+    def __init__(
+        self,
+        step: Callable[[], bool],
+        step_ms: float,
+        speed: float = 1.0,
+        max_frame_ms: float = MAX_FRAME_MS,
+        budget_ms: float = FRAME_BUDGET_MS,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.step: Callable[[], bool] = step
+        self.step_ms: float = step_ms
+        self.speed: float = speed
+        self.max_frame_ms: float = max_frame_ms
+        self.budget_ms: float = budget_ms
+        self.clock: Callable[[], float] = clock
+        self.accumulated_ms: float = 0.0
+        self.steps: int = 0
+        self.last: float = clock()
+
+    def set_speed(self, speed: float) -> None:
+        self.speed = speed
+        self.accumulated_ms = 0.0
+
+    def reset(self) -> None:
+        """Forget time that passed while not advancing, e.g. on a restart"""
+        self.accumulated_ms = 0.0
+        self.last = self.clock()
+
+    def advance(self) -> int:
+        """Run every tick due since the last call, returns how many ran"""
+        now = self.clock()
+        elapsed_ms = min((now - self.last) * 1000.0, self.max_frame_ms)
+        self.last = now
+        if self.speed == MAX_SPEED:
+            return self._run_for(self.budget_ms)
+        self.accumulated_ms += elapsed_ms * self.speed
+        ran = 0
+        while self.accumulated_ms >= self.step_ms:
+            self.accumulated_ms -= self.step_ms
+            ran += 1
+            if not self.step():
+                self.accumulated_ms = 0.0
+                break
+        self.steps += ran
+        return ran
+
+    def _run_for(self, budget_ms: float) -> int:
+        deadline = self.clock() + budget_ms / 1000.0
+        ran = 0
+        while True:
+            ran += 1
+            if not self.step() or self.clock() >= deadline:
+                break
+        self.steps += ran
+        self.last = self.clock()
+        return ran
+
+    def describe(self) -> str:
+        return "max" if self.speed == MAX_SPEED else f"x{self.speed:g}"
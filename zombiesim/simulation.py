@@ -0,0 +1,133 @@
+"""
+Headless tick loop for the simulation.
+
+Nothing here touches pygame or wall-clock timers: the world is advanced a
+whole number of ticks at a time, so runs are repeatable and go as fast as
+the CPU allows. The GUI drives the same loop from a timer.
+"""
+
+import time
+from collections.abc import Callable
+from typing import NamedTuple, Optional, Protocol
+
+PHASES: tuple[str, ...] = (
+    "update_zombies",
+    "update_humans",
+    "update_humans_to_zombies",
+    "update_eaten_food",
+    "check_and_fix_edges",
+    "check_food",
+)
+
+
+class Steppable(Protocol):
+    tick: int
+
+    def update_zombies(self) -> None: ...
+    def update_humans(self) -> None: ...
+    def update_humans_to_zombies(self) -> None: ...
+    def update_eaten_food(self) -> None: ...
+    def check_and_fix_edges(self) -> None: ...
+    def check_food(self) -> None: ...
+    def all_dead(self) -> bool: ...
+
+
+class EventCounts:
+    """Running totals of what has happened in a world since it was made"""
+
+    __slots__ = ("bites", "turns", "eaten", "starved")
+
+    def __init__(self):
+        self.bites: int = 0
+        self.turns: int = 0
+        self.eaten: int = 0
+        self.starved: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Census(NamedTuple):
+    humans: int
+    zombies: int
+    food: int
+    mean_energy: float
+
+
+class Observable(Steppable, Protocol):
+    counts: EventCounts
+
+    def census(self) -> Census: ...
+
+
+Observer = Callable[["Simulation"], None]
+
+
+class PhaseTimer:
+    """Accumulates wall time and call counts per named phase"""
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock: Callable[[], float] = clock
+        self.totals: dict[str, float] = {}
+        self.calls: dict[str, int] = {}
+
+    def time(self, name: str, func: Callable[[], None]) -> None:
+        begin = self.clock()
+        func()
+        self.totals[name] = self.totals.get(name, 0.0) + (self.clock() - begin)
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+
+class Simulation:
+    def __init__(
+        self,
+        world: Steppable,
+        zombie_every: int = 2,
+        human_every: int = 1,
+        timer: Optional[PhaseTimer] = None,
+    ):
+        self.world: Steppable = world
+        self.zombie_every: int = zombie_every
+        self.human_every: int = human_every
+        self.timer: Optional[PhaseTimer] = timer
+        # called after every tick, e.g. telemetry.TelemetryRecorder
+        self.observers: list[Observer] = []
+
+    @property
+    def tick(self) -> int:
+        """Ticks so far, kept on the world so whatever steps it agrees"""
+        return self.world.tick
+
+    @tick.setter
+    def tick(self, value: int) -> None:
+        self.world.tick = value
+
+    def phase(self, name: str, func: Callable[[], None]) -> None:
+        if self.timer is None:
+            func()
+        else:
+            self.timer.time(name, func)
+
+    def step(self) -> bool:
+        """Advance one tick, returns False once everyone is dead"""
+        world = self.world
+        self.tick += 1
+        if self.tick % self.zombie_every == 0:
+            self.phase("update_zombies", world.update_zombies)
+        if self.tick % self.human_every == 0:
+            self.phase("update_humans", world.update_humans)
+        self.phase("update_humans_to_zombies", world.update_humans_to_zombies)
+        self.phase("update_eaten_food", world.update_eaten_food)
+        self.phase("check_and_fix_edges", world.check_and_fix_edges)
+        self.phase("check_food", world.check_food)
+        for observer in self.observers:
+            observer(self)
+        return not world.all_dead()
+
+    def run(self, max_ticks: Optional[int] = None) -> int:
+        """Step until everyone is dead or max_ticks pass, returns ticks run"""
+        start = self.tick
+        while max_ticks is None or self.tick - start < max_ticks:
+            if not self.step():
+                break
+        return self.tick - start
@@ -0,0 +1,269 @@
+"""
+Save and restore a whole Field: every entity, the random streams and the
+tick count, so a run can be checkpointed or forked and carry on exactly as
+it would have.
+
+The file is a fixed header followed by one packed column per attribute
+(little-endian, via the array module), so writing is a handful of
+tobytes() calls and reading a handful of frombytes() ones.
+"""
+
+import contextlib
+import gc
+import random
+import struct
+import sys
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Any, Union
+
+import pygame
+
+from zombiesim.entities import EntityGroup, FoodSprite, HumanSprite, ZombieSprite
+from zombiesim.field import Field
+from zombiesim.type_def import Direction
+import zombiesim.util as zutil
+
+MAGIC: bytes = b"ZSIM"
+VERSION: int = 2
+# magic, version, tick, rect, max food, seed, zombies, humans, food
+HEADER = struct.Struct("<4sHq4iiQ3I")
+# Random.getstate(): version, 624 words of state plus position, gauss_next
+MT_WORDS: int = 625
+RANDOM_STATE = struct.Struct(f"<i{MT_WORDS}I?d")
+
+Path = Union[str, bytes]
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def _column(typecode: str, values: Iterable[Any]) -> bytes:
+    packed = array(typecode, values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _pack_random(rng: random.Random) -> bytes:
+    version, words, gauss = rng.getstate()
+    return RANDOM_STATE.pack(version, *words, gauss is not None, gauss or 0.0)
+
+
+def _unpack_random(rng: random.Random, data: bytes) -> None:
+    version, *rest = RANDOM_STATE.unpack(data)
+    words, has_gauss, gauss = rest[:MT_WORDS], rest[MT_WORDS], rest[MT_WORDS + 1]
+    rng.setstate((version, tuple(words), gauss if has_gauss else None))
+
+
+def _pack_caches(caches: Sequence[zutil.VisionCache], index: dict[int, int]) -> bytes:
+    """Expiry ticks, then how many each saw, then who they saw by index;
+    anything that has died since is left out, as a lookup would do"""
+    seen = [
+        [index[id(each)] for each in cache.seen if id(each) in index]
+        for cache in caches
+    ]
+    return b"".join(
+        (
+            _column("i", (cache.expires for cache in caches)),
+            _column("I", (len(each) for each in seen)),
+            _column("I", (each for indexes in seen for each in indexes)),
+        )
+    )
+
+
+def _entities(
+    field: Field,
+) -> tuple[list[ZombieSprite], list[HumanSprite], list[FoodSprite]]:
+    return list(field.zombies), list(field.humans), list(field.food)
+
+
+@contextlib.contextmanager
+def _without_gc() -> Iterator[None]:
+    """No collections in between, leaving gc as it was found after"""
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def dumps(field: Field) -> bytes:
+    with _without_gc():
+        return _dumps(field)
+
+
+def _dumps(field: Field) -> bytes:
+    zombies, humans, food = _entities(field)
+    rect = field.rect
+    chunks = [
+        HEADER.pack(
+            MAGIC,
+            VERSION,
+            field.tick,
+            rect.x,
+            rect.y,
+            rect.width,
+            rect.height,
+            field.max_food,
+            field.streams.seed,
+            len(zombies),
+            len(humans),
+            len(food),
+        )
+    ]
+    chunks.extend(
+        _pack_random(getattr(field.streams, name)) for name in zutil.RandomStreams.NAMES
+    )
+    chunks.extend(
+        (
+            _column("i", (each.rect.x for each in zombies)),
+            _column("i", (each.rect.y for each in zombies)),
+            _column("d", (each.current_dir.x for each in zombies)),
+            _column("d", (each.current_dir.y for each in zombies)),
+            _column("d", (each.angle for each in zombies)),
+            _column("d", (each.energy for each in zombies)),
+            _column("i", (each.attack_wait for each in zombies)),
+            _column("i", (each.rect.x for each in humans)),
+            _column("i", (each.rect.y for each in humans)),
+            _column("d", (each.current_dir.x for each in humans)),
+            _column("d", (each.current_dir.y for each in humans)),
+            _column("d", (each.energy for each in humans)),
+            _column("d", (each.full_energy for each in humans)),
+            _column("q", (each.fed_at for each in humans)),
+            _column("i", (each.rect.x for each in food)),
+            _column("i", (each.rect.y for each in food)),
+            _column("i", (each.amount for each in food)),
+        )
+    )
+    human_index = {id(each): i for i, each in enumerate(humans)}
+    zombie_index = {id(each): i for i, each in enumerate(zombies)}
+    chunks.append(_pack_caches([each.humans_seen for each in zombies], human_index))
+    chunks.append(_pack_caches([each.zombies_seen for each in humans], zombie_index))
+    return b"".join(chunks)
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.data: memoryview = memoryview(data)
+        self.offset: int = 0
+
+    def take(self, size: int) -> memoryview:
+        if self.offset + size > len(self.data):
+            raise SnapshotError("snapshot is truncated")
+        chunk = self.data[self.offset : self.offset + size]
+        self.offset += size
+        return chunk
+
+    def column(self, typecode: str, count: int) -> array:
+        values = array(typecode)
+        values.frombytes(self.take(values.itemsize * count))
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values
+
+    def caches(
+        self, caches: Sequence[zutil.VisionCache], others: Sequence[Any]
+    ) -> None:
+        expires = self.column("i", len(caches))
+        lengths = self.column("I", len(caches))
+        indexes = self.column("I", sum(lengths))
+        start = 0
+        for cache, expiry, length in zip(caches, expires, lengths):
+            cache.expires = expiry
+            cache.seen = [others[each] for each in indexes[start : start + length]]
+            start += length
+
+
+def loads(data: bytes) -> Field:
+    # a big world is hundreds of thousands of new objects, none of them garbage
+    with _without_gc():
+        return _loads(data)
+
+
+def _loads(data: bytes) -> Field:
+    reader = _Reader(data)
+    (
+        magic,
+        version,
+        tick,
+        x,
+        y,
+        width,
+        height,
+        max_food,
+        seed,
+        zombie_count,
+        human_count,
+        food_count,
+    ) = HEADER.unpack(reader.take(HEADER.size))
+    if magic != MAGIC:
+        raise SnapshotError("not a zombiesim snapshot")
+    if version != VERSION:
+        raise SnapshotError(f"unsupported snapshot version {version}")
+    streams = zutil.RandomStreams(seed)
+    states = [bytes(reader.take(RANDOM_STATE.size)) for _ in zutil.RandomStreams.NAMES]
+
+    zombies = EntityGroup(ZombieSprite, streams)
+    columns = [
+        reader.column(code, zombie_count)
+        for code in ("i", "i", "d", "d", "d", "d", "i")
+    ]
+    zombie_list = []
+    for zx, zy, dx, dy, angle, energy, attack_wait in zip(*columns):
+        zombie = ZombieSprite(streams, angle, attack_wait, Direction(dx, dy))
+        zombie.rect.topleft = zx, zy
+        zombie.energy = energy
+        zombie_list.append(zombie)
+    zombies.add(*zombie_list)
+
+    humans = EntityGroup(HumanSprite, streams)
+    columns = [
+        reader.column(code, human_count) for code in ("i", "i", "d", "d", "d", "d", "q")
+    ]
+    human_list = []
+    for hx, hy, dx, dy, energy, full_energy, fed_at in zip(*columns):
+        human = HumanSprite(streams, Direction(dx, dy), full_energy, fed_at)
+        human.rect.topleft = hx, hy
+        human.energy = energy
+        human.fade()
+        human_list.append(human)
+    humans.add(*human_list)
+
+    food = EntityGroup(FoodSprite, streams)
+    columns = [reader.column("i", food_count) for _ in range(3)]
+    for fx, fy, amount in zip(*columns):
+        each = food.create_one()
+        each.rect.topleft = fx, fy
+        each.amount = amount
+
+    reader.caches([each.humans_seen for each in zombie_list], human_list)
+    reader.caches([each.zombies_seen for each in human_list], zombie_list)
+
+    # last, in case making the entities above drew from the streams
+    for name, state in zip(zutil.RandomStreams.NAMES, states):
+        _unpack_random(getattr(streams, name), state)
+
+    field = Field(
+        zombies=zombies,
+        humans=humans,
+        food=food,
+        rect=pygame.Rect(x, y, width, height),
+        streams=streams,
+    )
+    field.max_food = max_food
+    field.tick = tick
+    return field
+
+
+def save(field: Field, path: Path) -> None:
+    with open(path, "wb") as out:
+        out.write(dumps(field))
+
+
+def load(path: Path) -> Field:
+    with open(path, "rb") as source:
+        return loads(source.read())
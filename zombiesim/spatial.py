@@ -0,0 +1,365 @@
+"""
+Spatial indexes for "who is near this point" questions.
+
+SpatialGrid is a uniform grid. The field wraps around at its edges (leaving
+on the left brings you back on the right), so cells wrap as well and
+distances are measured the short way around the torus. within() is the
+one query that does not wrap: it is for what is inside a rectangle of the
+world, such as the part on screen.
+
+Reach says where a grid's near() could find anything at all.
+
+NearestTree is a static 2d tree answering "which is closest" the way the
+sprites measure it (Entity.closest_to), for sets that change far less
+often than they are asked about, such as the food.
+"""
+
+import itertools
+import math
+from collections.abc import Callable, Iterable, Iterator
+from typing import Generic, Optional, Tuple, TypeVar
+
+from zombiesim.type_def import Bounds, HasPosition, Point
+
+C = TypeVar("C", bound=HasPosition)
+D = TypeVar("D", bound=HasPosition)
+Entry = Tuple[int, C, float, float]
+CellKey = Tuple[int, int]
+# bounding box (left, top, right, bottom), children (-1 for a leaf) and the
+# slice of NearestTree.order the node covers
+Node = Tuple[float, float, float, float, int, int, int, int]
+LEAF_SIZE: int = 8
+
+
+class SpatialGrid(Generic[C]):
+    def __init__(self, bounds: Bounds, cell_size: float):
+        self.cell_size: float = float(max(1.0, cell_size))
+        self.cells: dict[CellKey, list[Entry[C]]] = {}
+        self.entities: list[C] = []
+        self.reshape(bounds)
+
+    def reshape(self, bounds: Bounds) -> None:
+        self.shape: tuple[Tuple[int, ...], Tuple[int, ...]] = (
+            tuple(bounds.topleft),
+            tuple(bounds.bottomright),
+        )
+        self.left, self.top = bounds.topleft
+        right, bottom = bounds.bottomright
+        self.width: float = float(max(1, right - self.left))
+        self.height: float = float(max(1, bottom - self.top))
+        self.columns: int = max(1, int(self.width // self.cell_size))
+        self.rows: int = max(1, int(self.height // self.cell_size))
+        self.cell_width: float = self.width / self.columns
+        self.cell_height: float = self.height / self.rows
+        self.cells = {}
+        self.entities = []
+
+    def rebuild(self, entities: Iterable[C], bounds: Optional[Bounds] = None) -> None:
+        if bounds is not None and self.shape != (
+            tuple(bounds.topleft),
+            tuple(bounds.bottomright),
+        ):
+            self.reshape(bounds)
+        self.cells = {}
+        self.entities = []
+        for index, entity in enumerate(entities):
+            self.insert(entity, index)
+
+    def insert(self, entity: C, index: Optional[int] = None) -> None:
+        if index is None:
+            index = len(self.entities)
+        pos = entity.position
+        self.entities.append(entity)
+        key = self.cell_for(pos.x, pos.y)
+        self.cells.setdefault(key, []).append((index, entity, pos.x, pos.y))
+
+    def cell_for(self, x: float, y: float) -> CellKey:
+        col = int((x - self.left) // self.cell_width) % self.columns
+        row = int((y - self.top) // self.cell_height) % self.rows
+        return col, row
+
+    def distance(self, x1: float, y1: float, x2: float, y2: float) -> float:
+        dx = abs(x1 - x2) % self.width
+        dy = abs(y1 - y2) % self.height
+        return math.hypot(min(dx, self.width - dx), min(dy, self.height - dy))
+
+    def _span(self, low: float, high: float, size: float, count: int) -> range:
+        first = int(math.floor(low / size))
+        last = int(math.floor(high / size))
+        if last - first + 1 >= count:
+            return range(count)
+        return range(first, last + 1)
+
+    def near(self, point: Point, radius: float) -> list[C]:
+        """Everything within radius of point (inclusive), in insertion order"""
+        x, y = point.x, point.y
+        cols = self._span(
+            x - radius - self.left,
+            x + radius - self.left,
+            self.cell_width,
+            self.columns,
+        )
+        rows = self._span(
+            y - radius - self.top, y + radius - self.top, self.cell_height, self.rows
+        )
+        found: list[Entry[C]] = []
+        for col in cols:
+            for row in rows:
+                cell = self.cells.get((col % self.columns, row % self.rows))
+                if not cell:
+                    continue
+                for entry in cell:
+                    if self.distance(x, y, entry[2], entry[3]) <= radius:
+                        found.append(entry)
+        found.sort(key=lambda entry: entry[0])
+        return [entry[1] for entry in found]
+
+    def within(self, area: Bounds) -> list[C]:
+        """Everything with its position inside area (as Rect.collidepoint
+        has it), in insertion order; area is not wrapped around the edges"""
+        left, top = area.topleft
+        right, bottom = area.bottomright
+        cols = range(
+            max(0, int((left - self.left) // self.cell_width)),
+            min(self.columns, int((right - self.left) // self.cell_width) + 1),
+        )
+        rows = range(
+            max(0, int((top - self.top) // self.cell_height)),
+            min(self.rows, int((bottom - self.top) // self.cell_height) + 1),
+        )
+        if len(cols) * len(rows) > len(self.cells):
+            # fewer occupied cells than cells in the area
+            cells = [
+                cell
+                for (col, row), cell in self.cells.items()
+                if col in cols and row in rows
+            ]
+        else:
+            cells = [
+                self.cells[key]
+                for key in itertools.product(cols, rows)
+                if key in self.cells
+            ]
+        found = [
+            entry
+            for cell in cells
+            for entry in cell
+            if left <= entry[2] < right and top <= entry[3] < bottom
+        ]
+        found.sort(key=lambda entry: entry[0])
+        return [entry[1] for entry in found]
+
+    def pairs(self, others: Iterable[D], radius: float) -> Iterator[tuple[D, C]]:
+        """Every (other, entity) within radius in one sweep over others, in
+        the order of others and then insertion order"""
+        for other in others:
+            for entity in self.near(other.position, radius):
+                yield other, entity
+
+    def closest(
+        self, point: Point, to_include: Callable[[C], bool] = lambda _: True
+    ) -> tuple[Optional[C], float]:
+        """Nearest entity to point by expanding rings of cells around it"""
+        x, y = point.x, point.y
+        center_col = int(math.floor((x - self.left) / self.cell_width))
+        center_row = int(math.floor((y - self.top) / self.cell_height))
+        ring_step = min(self.cell_width, self.cell_height)
+        max_ring = max(self.columns, self.rows) // 2 + 1
+        visited: set[CellKey] = set()
+        best: Optional[Entry[C]] = None
+        best_dist = math.inf
+        for ring in range(max_ring + 1):
+            for key in self._ring(center_col, center_row, ring):
+                if key in visited:
+                    continue
+                visited.add(key)
+                for entry in self.cells.get(key, ()):
+                    dist = self.distance(x, y, entry[2], entry[3])
+                    if dist > best_dist:
+                        continue
+                    if best is not None and dist == best_dist and entry[0] > best[0]:
+                        continue
+                    if not to_include(entry[1]):
+                        continue
+                    best, best_dist = entry, dist
+            if best is not None and best_dist <= ring * ring_step:
+                break
+        if best is None:
+            return (None, 0.0)
+        return (best[1], best_dist)
+
+    def _ring(self, col: int, row: int, ring: int) -> Iterator[CellKey]:
+        if ring == 0:
+            yield col % self.columns, row % self.rows
+            return
+        for delta in range(-ring, ring + 1):
+            yield (col + delta) % self.columns, (row - ring) % self.rows
+            yield (col + delta) % self.columns, (row + ring) % self.rows
+        for delta in range(-ring + 1, ring):
+            yield (col - ring) % self.columns, (row + delta) % self.rows
+            yield (col + ring) % self.columns, (row + delta) % self.rows
+
+    def __iter__(self) -> Iterator[C]:
+        return iter(self.entities)
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+
+class Reach:
+    """
+    Whether a point is in a cell of a SpatialGrid close enough to anything
+    in it to be within radius of it. Anything in any other cell is further
+    than radius from everything in the grid, so a near(point, radius) there
+    finds nothing.
+
+    With few occupied cells it marks their neighbourhoods up front; with
+    many, it looks around each cell the first time it is asked about it.
+    """
+
+    def __init__(self, grid: SpatialGrid, radius: float):
+        self.grid: SpatialGrid = grid
+        # one cell more than the radius needs, so rounding never matters
+        across = int(math.ceil(radius / grid.cell_width)) + 1
+        down = int(math.ceil(radius / grid.cell_height)) + 1
+        self.window: list[CellKey] = [
+            (col, row)
+            for col in range(-across, across + 1)
+            for row in range(-down, down + 1)
+        ]
+        self.everywhere: bool = bool(grid.cells) and (
+            2 * across + 1 >= grid.columns and 2 * down + 1 >= grid.rows
+        )
+        self.answers: dict[CellKey, bool] = {}
+        self.marked: bool = (
+            len(grid.cells) * len(self.window) <= grid.columns * grid.rows
+        )
+        if self.marked and not self.everywhere:
+            for key in grid.cells:
+                for around in self._around(key):
+                    self.answers[around] = True
+
+    def _around(self, key: CellKey) -> Iterator[CellKey]:
+        col, row = key
+        columns, rows = self.grid.columns, self.grid.rows
+        for delta_col, delta_row in self.window:
+            yield (col + delta_col) % columns, (row + delta_row) % rows
+
+    def covers(self, x: float, y: float) -> bool:
+        if self.everywhere:
+            return True
+        grid = self.grid
+        key = (
+            int((x - grid.left) // grid.cell_width) % grid.columns,
+            int((y - grid.top) // grid.cell_height) % grid.rows,
+        )
+        found = self.answers.get(key)
+        if found is None:
+            if self.marked:
+                return False
+            cells = grid.cells
+            found = any(around in cells for around in self._around(key))
+            self.answers[key] = found
+        return found
+
+
+class NearestTree(Generic[C]):
+    """
+    Closest entity to a point, where a distance more than half the span
+    (zutil.span) is folded back to span - distance, exactly as
+    Entity.closest_to and the steering kernels work it out: the same
+    entity, the first of equals in the order given, and the same distance.
+
+    Positions are read once by rebuild and taken to stay put until the next
+    rebuild; queries are then a descent of the tree, pruning every box that
+    cannot hold anything closer, instead of a scan over everything.
+    """
+
+    def __init__(self, entities: Iterable[C] = ()):
+        self.rebuild(entities)
+
+    def rebuild(self, entities: Iterable[C]) -> None:
+        self.entities: list[C] = list(entities)
+        self.xs: list[float] = []
+        self.ys: list[float] = []
+        for entity in self.entities:
+            pos = entity.position
+            self.xs.append(pos.x)
+            self.ys.append(pos.y)
+        self.order: list[int] = list(range(len(self.entities)))
+        self.nodes: list[Node] = []
+        if self.entities:
+            self._build(0, len(self.order))
+
+    def _build(self, start: int, end: int) -> int:
+        xs = [self.xs[each] for each in self.order[start:end]]
+        ys = [self.ys[each] for each in self.order[start:end]]
+        box = (min(xs), min(ys), max(xs), max(ys))
+        node = len(self.nodes)
+        self.nodes.append(box + (-1, -1, start, end))
+        if end - start <= LEAF_SIZE:
+            return node
+        coords = self.xs if box[2] - box[0] >= box[3] - box[1] else self.ys
+        self.order[start:end] = sorted(self.order[start:end], key=coords.__getitem__)
+        mid = (start + end) // 2
+        left = self._build(start, mid)
+        right = self._build(mid, end)
+        self.nodes[node] = box + (left, right, start, end)
+        return node
+
+    def _bound(self, node: Node, x: float, y: float, span: float) -> float:
+        """No entity in the node can be closer than this"""
+        left, top, right, bottom = node[:4]
+        near_x = left - x if x < left else (x - right if x > right else 0.0)
+        near_y = top - y if y < top else (y - bottom if y > bottom else 0.0)
+        far_x = max(abs(x - left), abs(x - right))
+        far_y = max(abs(y - top), abs(y - bottom))
+        nearest = math.sqrt(near_x**2 + near_y**2)
+        farthest = math.sqrt(far_x**2 + far_y**2)
+        return min(nearest, span - farthest)
+
+    def closest(self, point: Point, span: float) -> tuple[Optional[C], float]:
+        """The closest entity and how far, or (None, 0.0) if there are none"""
+        index, dist = self.closest_index(point, span)
+        if index < 0:
+            return (None, 0.0)
+        return (self.entities[index], dist)
+
+    def closest_index(self, point: Point, span: float) -> tuple[int, float]:
+        """As closest, with the index of the entity instead (-1 for none)"""
+        if not self.nodes:
+            return (-1, 0.0)
+        x, y = point.x, point.y
+        span_mid = span / 2.0
+        xs, ys, order, nodes = self.xs, self.ys, self.order, self.nodes
+        best = -1
+        best_dist = math.inf
+        stack = [(0.0, 0)]
+        while stack:
+            bound, at = stack.pop()
+            if bound > best_dist:
+                continue
+            node = nodes[at]
+            left, right, start, end = node[4:]
+            if left < 0:
+                for each in order[start:end]:
+                    dist = math.sqrt((x - xs[each]) ** 2 + (y - ys[each]) ** 2)
+                    if dist > span_mid:
+                        dist = span - dist
+                    if dist < best_dist or (dist == best_dist and each < best):
+                        best, best_dist = each, dist
+                continue
+            children = [
+                (self._bound(nodes[child], x, y, span), child)
+                for child in (left, right)
+            ]
+            # the more promising child goes on top of the stack
+            children.sort(reverse=True)
+            stack.extend(children)
+        return (best, best_dist)
+
+    def __iter__(self) -> Iterator[C]:
+        return iter(self.entities)
+
+    def __len__(self) -> int:
+        return len(self.entities)
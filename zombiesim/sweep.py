@@ -0,0 +1,271 @@
+"""
+Monte Carlo parameter sweeps: every combination of a parameter grid times a
+set of seeds, run headless across all cores, one CSV row per run.
+
+Rows are appended as soon as each run finishes, so a sweep that dies part way
+can be started again with the same arguments and only the missing runs are
+done.
+
+    ./bin/sweep.sh --param INITIAL_ZOMBIES=5,10 \\
+        --param ZOMBIE_VISION=100,150 --seeds 20 --output sweep.csv
+"""
+
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from collections.abc import Iterator, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Optional, Union
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from zombiesim import entities, field as zfield
+from zombiesim.simulation import Observable, Simulation
+from zombiesim.telemetry import TelemetryRecorder, TelemetryWriter
+
+Value = Union[int, float]
+Params = dict[str, Value]
+
+# parameters that are handed to the world instead of patched into a module
+WORLD_PARAMS: dict[str, Value] = {
+    "INITIAL_ZOMBIES": zfield.INITIAL_ZOMBIES,
+    "INITIAL_HUMANS": zfield.INITIAL_HUMANS,
+    "MAX_FOOD": zfield.MAX_FOOD,
+    "WIDTH": 1440,
+    "HEIGHT": 900,
+}
+ENTITY_PARAMS: tuple[str, ...] = (
+    "ZOMBIE_VISION",
+    "ZOMBIE_ATTACK_WAIT_MAX",
+    "ZOMBIE_ENERGY",
+    "RECALCULATE_HUMANS_SEEN",
+    "HUMAN_VISION",
+    "HUMAN_ENERGY_LEVEL",
+    "HUMAN_HUNGRY_LEVEL",
+    "HUMAN_ENERGY_DECAY",
+    "RECALCULATE_ZOMBIES_SEEN",
+    "DEFAULT_FOOD_AMOUNT",
+)
+OUTCOME_COLUMNS: tuple[str, ...] = (
+    "ticks",
+    "sim_seconds",
+    "extinct",
+    "humans_left",
+    "zombies",
+    "wall_seconds",
+)
+DEFAULT_MAX_TICKS: int = 200_000
+
+
+def run_key(params: Mapping[str, Any], seed: Any) -> str:
+    """Identifies a run in the output, independent of column order"""
+    parts = [f"{name}={params[name]}" for name in sorted(params)]
+    return ";".join(parts + [f"seed={seed}"])
+
+
+def apply_entity_params(params: Mapping[str, Value]) -> dict[str, Value]:
+    """Patch entity constants for this process, returns the old values"""
+    previous: dict[str, Value] = {}
+    for name in ENTITY_PARAMS:
+        if name in params:
+            previous[name] = getattr(entities, name)
+            setattr(entities, name, params[name])
+    if "HUMAN_ENERGY_LEVEL" in params and "HUMAN_HUNGRY_LEVEL" not in params:
+        previous["HUMAN_HUNGRY_LEVEL"] = entities.HUMAN_HUNGRY_LEVEL
+        entities.HUMAN_HUNGRY_LEVEL = entities.HUMAN_ENERGY_LEVEL / 2
+    return previous
+
+
+def build_world(params: Mapping[str, Value], seed: int, engine: str) -> Observable:
+    world = {**WORLD_PARAMS, **params}
+    rect = pygame.Rect(0, 0, int(world["WIDTH"]), int(world["HEIGHT"]))
+    zombies = int(world["INITIAL_ZOMBIES"])
+    humans = int(world["INITIAL_HUMANS"])
+    food = int(world["MAX_FOOD"])
+    if engine == "array":
+        from zombiesim.vectorized import array_world_creator
+
+        return array_world_creator(zombies, humans, food, seed)(rect)
+    return zfield.field_creator(zombies, humans, food, seed)(rect)
+
+
+def run_one(
+    params: Params,
+    seed: int,
+    engine: str = "sprite",
+    max_ticks: int = DEFAULT_MAX_TICKS,
+    telemetry: Optional[str] = None,
+) -> dict[str, Any]:
+    """Run one scenario until every human is gone (or max_ticks). With a
+    telemetry folder, every tick is also recorded to a file in it."""
+    key = run_key(params, seed)
+    writer: Optional[TelemetryWriter] = None
+    previous = apply_entity_params(params)
+    try:
+        begin = time.perf_counter()
+        world = build_world(params, seed, engine)
+        simulation = Simulation(world, zfield.ZOMBIE_TICKS, zfield.HUMAN_TICKS)
+        if telemetry is not None:
+            writer = TelemetryWriter(telemetry_path(telemetry, key))
+            TelemetryRecorder(writer, {"key": key}).attach(simulation)
+        ticks = simulation.run(max_ticks)
+        wall = time.perf_counter() - begin
+        census = world.census()
+    finally:
+        if writer is not None:
+            writer.close()
+        for name, value in previous.items():
+            setattr(entities, name, value)
+    return {
+        **params,
+        "seed": seed,
+        "engine": engine,
+        "key": key,
+        "ticks": ticks,
+        "sim_seconds": ticks * zfield.TICK_MS / zfield.SEC,
+        "extinct": world.all_dead(),
+        "humans_left": census.humans,
+        "zombies": census.zombies,
+        "wall_seconds": round(wall, 3),
+    }
+
+
+def telemetry_path(folder: str, key: str) -> str:
+    """One file per run; the key itself is in every record"""
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return os.path.join(folder, f"run-{digest}.jsonl")
+
+
+def grid(space: Mapping[str, Sequence[Value]]) -> Iterator[Params]:
+    names = sorted(space)
+    for values in itertools.product(*(space[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+def completed_keys(path: str) -> set[str]:
+    if not os.path.exists(path):
+        return set()
+    with open(path, newline="") as existing:
+        return {row["key"] for row in csv.DictReader(existing) if row.get("key")}
+
+
+def sweep(
+    space: Mapping[str, Sequence[Value]],
+    seeds: list[int],
+    output: str,
+    engine: str = "sprite",
+    max_ticks: int = DEFAULT_MAX_TICKS,
+    workers: Optional[int] = None,
+    telemetry: Optional[str] = None,
+) -> int:
+    """Run every missing (params, seed) pair, returns how many were run"""
+    done = completed_keys(output)
+    todo = [
+        (params, seed)
+        for params in grid(space)
+        for seed in seeds
+        if run_key(params, seed) not in done
+    ]
+    if not todo:
+        return 0
+    columns = sorted(space) + ["seed", "engine", "key"] + list(OUTCOME_COLUMNS)
+    new_file = not os.path.exists(output) or os.path.getsize(output) == 0
+    if not new_file:
+        with open(output, newline="") as existing:
+            header = next(csv.reader(existing), [])
+        if header != columns:
+            raise ValueError(f"{output} was written by a sweep over other parameters")
+    if telemetry is not None:
+        os.makedirs(telemetry, exist_ok=True)
+    with open(output, "a", newline="") as out, ProcessPoolExecutor(workers) as pool:
+        writer = csv.DictWriter(out, fieldnames=columns, extrasaction="ignore")
+        if new_file:
+            writer.writeheader()
+        futures = [
+            pool.submit(run_one, params, seed, engine, max_ticks, telemetry)
+            for params, seed in todo
+        ]
+        for finished, future in enumerate(as_completed(futures), start=1):
+            row = future.result()
+            writer.writerow(row)
+            out.flush()
+            print(
+                f"[{finished}/{len(todo)}] {row['key']}: "
+                f"{row['sim_seconds']:.1f}s simulated"
+            )
+    return len(todo)
+
+
+def parse_value(text: str) -> Value:
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def parse_seeds(text: str) -> list[int]:
+    """'20' is seeds 0-19, '5-9' is a range, '1,4,7' a list"""
+    if "," in text:
+        return [int(each) for each in text.split(",")]
+    if "-" in text:
+        low, high = text.split("-")
+        return list(range(int(low), int(high) + 1))
+    return list(range(int(text)))
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--param",
+        action="append",
+        default=[],
+        metavar="NAME=V1,V2",
+        help="values to sweep for one parameter: "
+        + ", ".join(list(WORLD_PARAMS) + list(ENTITY_PARAMS)),
+    )
+    parser.add_argument("--grid", help="JSON file of {NAME: [values]}")
+    parser.add_argument("--seeds", default="10")
+    parser.add_argument("--engine", choices=("sprite", "array"), default="sprite")
+    parser.add_argument("--max-ticks", type=int, default=DEFAULT_MAX_TICKS)
+    parser.add_argument("--workers", type=int, help="defaults to every core")
+    parser.add_argument("--output", default="sweep.csv")
+    parser.add_argument(
+        "--telemetry", metavar="DIR", help="also record every tick of every run"
+    )
+    args = parser.parse_args(argv)
+
+    space: dict[str, list[Value]] = {}
+    if args.grid:
+        with open(args.grid) as grid_file:
+            space.update(json.load(grid_file))
+    for each in args.param:
+        name, values = each.split("=", 1)
+        space[name] = [parse_value(value) for value in values.split(",")]
+    unknown = set(space) - set(WORLD_PARAMS) - set(ENTITY_PARAMS)
+    if unknown:
+        parser.error("unknown parameters: " + ", ".join(sorted(unknown)))
+
+    ran = sweep(
+        space,
+        parse_seeds(args.seeds),
+        args.output,
+        engine=args.engine,
+        max_ticks=args.max_ticks,
+        workers=args.workers,
+        telemetry=args.telemetry,
+    )
+    print(f"{ran} runs done, results in {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
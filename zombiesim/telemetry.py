@@ -0,0 +1,186 @@
+"""
+Per-tick telemetry: population, what happened that tick and how long each
+phase took, streamed to an append-only CSV or JSON-lines file.
+
+A TelemetryRecorder hangs off a Simulation and turns each tick into one flat
+record; a TelemetryWriter batches records and hands whole batches to a
+background thread that does the file I/O, so the tick loop only ever
+appends to a list.
+
+    with TelemetryWriter("run.jsonl") as writer:
+        TelemetryRecorder(writer).attach(simulation)
+        simulation.run()
+"""
+
+import csv
+import json
+import os
+import queue
+import threading
+from collections.abc import Iterator, Mapping
+from types import TracebackType
+from typing import Any, Optional, TextIO, cast
+
+from zombiesim.simulation import PHASES, Observable, PhaseTimer, Simulation
+
+Record = dict[str, Any]
+
+DEFAULT_BATCH: int = 256
+FORMATS: tuple[str, ...] = ("jsonl", "csv")
+
+
+def format_for(path: str) -> str:
+    return "csv" if path.endswith(".csv") else "jsonl"
+
+
+class TelemetryWriter:
+    """Appends records to a file from a background thread"""
+
+    def __init__(
+        self, path: str, batch_size: int = DEFAULT_BATCH, fmt: Optional[str] = None
+    ):
+        self.path: str = path
+        self.format: str = fmt or format_for(path)
+        if self.format not in FORMATS:
+            raise ValueError(f"unknown telemetry format {self.format}")
+        self.batch_size: int = batch_size
+        self.written: int = 0
+        self._batch: list[Record] = []
+        self._queue: "queue.Queue[Optional[list[Record]]]" = queue.Queue()
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(
+            target=self._drain, name="telemetry-writer", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, record: Record) -> None:
+        self._check()
+        self._batch.append(record)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Hand the current batch to the writer thread, without waiting"""
+        self._check()
+        if self._batch:
+            self._queue.put(self._batch)
+            self._batch = []
+
+    def close(self) -> None:
+        """Write everything still buffered and stop the thread"""
+        if self._thread.is_alive():
+            self.flush()
+            self._queue.put(None)
+            self._thread.join()
+        self._check()
+
+    def _check(self) -> None:
+        """Raise what stopped the writer thread, if anything has"""
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self) -> "TelemetryWriter":
+        return self
+
+    def __exit__(
+        self,
+        kind: Optional[type[BaseException]],
+        error: Optional[BaseException],
+        trace: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def _drain(self) -> None:
+        out: Optional[TextIO] = None
+        columns: Optional[csv.DictWriter] = None
+        try:
+            while True:
+                batch = self._queue.get()
+                if batch is None:
+                    break
+                if out is None:
+                    new_file = (
+                        not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+                    )
+                    out = open(self.path, "a", newline="")
+                    if self.format == "csv":
+                        columns = self._csv_writer(out, batch[0], new_file)
+                if columns is not None:
+                    columns.writerows(batch)
+                else:
+                    out.writelines(json.dumps(each) + "\n" for each in batch)
+                out.flush()
+                self.written += len(batch)
+        except BaseException as error:
+            self._error = error
+        finally:
+            if out is not None:
+                out.close()
+
+    def _csv_writer(self, out: TextIO, first: Record, new_file: bool) -> csv.DictWriter:
+        fields = list(first)
+        if not new_file:
+            with open(self.path, newline="") as existing:
+                fields = next(csv.reader(existing), fields)
+        writer = csv.DictWriter(out, fieldnames=fields, extrasaction="ignore")
+        if new_file:
+            writer.writeheader()
+        return writer
+
+
+class TelemetryRecorder:
+    """Turns each tick of a Simulation into one record for a writer"""
+
+    def __init__(
+        self, writer: TelemetryWriter, tags: Optional[Mapping[str, Any]] = None
+    ):
+        self.writer: TelemetryWriter = writer
+        # added to every record, e.g. which sweep run it came from
+        self.tags: dict[str, Any] = dict(tags or {})
+        self._counts: dict[str, int] = {}
+        self._phases: dict[str, float] = {}
+
+    def attach(self, simulation: Simulation) -> "TelemetryRecorder":
+        if simulation.timer is None:
+            simulation.timer = PhaseTimer()
+        world = cast(Observable, simulation.world)
+        self._counts = world.counts.as_dict()
+        self._phases = dict(simulation.timer.totals)
+        simulation.observers.append(self)
+        return self
+
+    def __call__(self, simulation: Simulation) -> None:
+        world = cast(Observable, simulation.world)
+        census = world.census()
+        record: Record = dict(self.tags)
+        record["tick"] = simulation.tick
+        record.update(census._asdict())
+        counts = world.counts.as_dict()
+        for name, total in counts.items():
+            record[name] = total - self._counts.get(name, 0)
+        self._counts = counts
+        totals = simulation.timer.totals if simulation.timer else {}
+        for name in PHASES:
+            spent = totals.get(name, 0.0) - self._phases.get(name, 0.0)
+            record[f"ms_{name}"] = round(1000.0 * spent, 4)
+        self._phases = dict(totals)
+        self.writer.write(record)
+
+
+def parse_field(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def read_records(path: str) -> Iterator[Record]:
+    """Records back from either format, numbers as numbers"""
+    with open(path, newline="") as source:
+        if format_for(path) == "csv":
+            for row in csv.DictReader(source):
+                yield {name: parse_field(value) for name, value in row.items()}
+        else:
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
@@ -0,0 +1,461 @@
+"""
+Record where every agent is on every tick of a Field, then play it back
+without simulating anything.
+
+The file is a header, a run of frames and an index footer. Every
+KEYFRAME_EVERY frames is a keyframe holding each agent's id, kind and
+position; the frames between only hold what changed since the previous
+one: agents that went, agents that arrived and a one byte dx/dy per
+survivor (with an overflow list for jumps such as wrapping at the edges).
+The footer holds the offset of every frame, so a reader memory-maps the
+file and can decode any tick after at most one keyframe and a few deltas,
+whatever the size of the recording.
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Iterable, Iterator
+from operator import add
+from types import TracebackType
+from typing import BinaryIO, NamedTuple, Optional
+
+import pygame
+
+from zombiesim.camera import Camera
+from zombiesim.entities import (
+    ATLAS,
+    FOOD_COLOR,
+    HUMAN_COLOR,
+    ZOMBIE_COLOR,
+    ENTITY_HEIGHT,
+    ENTITY_WIDTH,
+    Entity,
+    FoodSprite,
+    HumanSprite,
+    ZombieSprite,
+)
+from zombiesim.field import Field
+from zombiesim.simulation import Simulation
+
+MAGIC: bytes = b"ZTRJ"
+FOOTER_MAGIC: bytes = b"ZIDX"
+VERSION: int = 1
+KEYFRAME_EVERY: int = 32
+
+ZOMBIE: int = 0
+HUMAN: int = 1
+FOOD: int = 2
+# drawn bottom to top, as Field.draw does
+KIND_ORDER: tuple[int, ...] = (FOOD, HUMAN, ZOMBIE)
+
+KEYFRAME: int = 0
+DELTA: int = 1
+# magic, version, width, height, keyframe interval
+HEADER = struct.Struct("<4sHiiI")
+# type, tick, then per type: agents | removed, added, survivors, overflow
+FRAME = struct.Struct("<BqIIII")
+# index offset, frames, magic
+FOOTER = struct.Struct("<QQ4s")
+# a delta this big means "see the overflow list"
+ESCAPE: int = -128
+
+
+class TrajectoryError(ValueError):
+    pass
+
+
+class Frame(NamedTuple):
+    tick: int
+    ids: array
+    kinds: array
+    xs: array
+    ys: array
+
+
+def _packed(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _unpacked(typecode: str, data: memoryview) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _without(values: array, gone: array) -> array:
+    """values minus the (ascending) indexes in gone"""
+    kept = array(values.typecode)
+    start = 0
+    for index in gone:
+        kept += values[start:index]
+        start = index + 1
+    kept += values[start:]
+    return kept
+
+
+def kind_of(entity: Entity) -> int:
+    if isinstance(entity, ZombieSprite):
+        return ZOMBIE
+    if isinstance(entity, HumanSprite):
+        return HUMAN
+    return FOOD
+
+
+class TrajectoryRecorder:
+    """Appends a frame to the file after every tick of a Field"""
+
+    def __init__(
+        self, path: str, bounds: pygame.Rect, keyframe_every: int = KEYFRAME_EVERY
+    ):
+        self.out: BinaryIO = open(path, "wb")
+        self.keyframe_every: int = keyframe_every
+        self.offsets: array = array("Q")
+        self.next_id: int = 0
+        self.ids: dict[Entity, int] = {}
+        # agents in the order the previous frame left them, which is the
+        # order a reader rebuilds from the deltas
+        self.order: list[Entity] = []
+        self.xs: array = array("i")
+        self.ys: array = array("i")
+        self.out.write(
+            HEADER.pack(MAGIC, VERSION, bounds.width, bounds.height, keyframe_every)
+        )
+
+    def attach(self, simulation: Simulation) -> "TrajectoryRecorder":
+        simulation.observers.append(self)
+        return self
+
+    def __call__(self, simulation: Simulation) -> None:
+        field = simulation.world
+        if isinstance(field, Field):
+            self.record(field.tick, field.zombies, field.humans, field.food)
+
+    def record(self, tick: int, *groups: Iterable[Entity]) -> None:
+        current: dict[Entity, None] = {}
+        for group in groups:
+            current.update(dict.fromkeys(group))
+        self.offsets.append(self.out.tell())
+        if (len(self.offsets) - 1) % self.keyframe_every == 0:
+            self._keyframe(tick, current)
+        else:
+            self._delta(tick, current)
+
+    def _id_for(self, entity: Entity) -> int:
+        found = self.ids.get(entity)
+        if found is None:
+            found = self.ids[entity] = self.next_id
+            self.next_id += 1
+        return found
+
+    def _keyframe(self, tick: int, current: dict[Entity, None]) -> None:
+        order = list(current)
+        self.ids = {each: self._id_for(each) for each in order}
+        self.order = order
+        self.xs = array("i", (each.rect.centerx for each in order))
+        self.ys = array("i", (each.rect.centery for each in order))
+        self.out.write(FRAME.pack(KEYFRAME, tick, len(order), 0, 0, 0))
+        self.out.write(_packed(array("I", (self.ids[each] for each in order))))
+        self.out.write(_packed(array("B", (kind_of(each) for each in order))))
+        self.out.write(_packed(self.xs))
+        self.out.write(_packed(self.ys))
+
+    def _delta(self, tick: int, current: dict[Entity, None]) -> None:
+        removed = array("I")
+        survivors: list[Entity] = []
+        old_xs, old_ys = array("i"), array("i")
+        for index, each in enumerate(self.order):
+            if each in current:
+                survivors.append(each)
+                old_xs.append(self.xs[index])
+                old_ys.append(self.ys[index])
+            else:
+                removed.append(index)
+                del self.ids[each]
+        known = self.ids
+        added = [each for each in current if each not in known]
+
+        xs = array("i", (each.rect.centerx for each in survivors))
+        ys = array("i", (each.rect.centery for each in survivors))
+        dxs, dys = array("b"), array("b")
+        overflow = array("i")
+        for index, (x, y, old_x, old_y) in enumerate(zip(xs, ys, old_xs, old_ys)):
+            dx, dy = x - old_x, y - old_y
+            if -127 <= dx <= 127 and -127 <= dy <= 127:
+                dxs.append(dx)
+                dys.append(dy)
+            else:
+                dxs.append(ESCAPE)
+                dys.append(ESCAPE)
+                overflow.extend((index, x, y))
+
+        self.out.write(
+            FRAME.pack(
+                DELTA,
+                tick,
+                len(removed),
+                len(added),
+                len(survivors),
+                len(overflow) // 3,
+            )
+        )
+        self.out.write(_packed(removed))
+        self.out.write(_packed(array("I", (self._id_for(each) for each in added))))
+        self.out.write(_packed(array("B", (kind_of(each) for each in added))))
+        added_xs = array("i", (each.rect.centerx for each in added))
+        added_ys = array("i", (each.rect.centery for each in added))
+        self.out.write(_packed(added_xs))
+        self.out.write(_packed(added_ys))
+        self.out.write(_packed(dxs))
+        self.out.write(_packed(dys))
+        self.out.write(_packed(overflow))
+
+        self.order = survivors + added
+        self.xs = xs + added_xs
+        self.ys = ys + added_ys
+
+    def close(self) -> None:
+        if self.out.closed:
+            return
+        index_at = self.out.tell()
+        self.out.write(_packed(self.offsets))
+        self.out.write(FOOTER.pack(index_at, len(self.offsets), FOOTER_MAGIC))
+        self.out.close()
+
+    def __enter__(self) -> "TrajectoryRecorder":
+        return self
+
+    def __exit__(
+        self,
+        kind: Optional[type[BaseException]],
+        error: Optional[BaseException],
+        trace: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+class TrajectoryReader:
+    """Random access to the frames of a recording, through mmap"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as source:
+            self.map: mmap.mmap = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        self.data: memoryview = memoryview(self.map)
+        if len(self.data) < HEADER.size:
+            raise TrajectoryError("not a trajectory recording")
+        magic, version, self.width, self.height, self.keyframe_every = HEADER.unpack(
+            self.data[: HEADER.size]
+        )
+        if magic != MAGIC:
+            raise TrajectoryError("not a trajectory recording")
+        if version != VERSION:
+            raise TrajectoryError(f"unsupported trajectory version {version}")
+        self.offsets: array = self._read_index()
+        self._segment: dict[int, Frame] = {}
+        self._segment_start: int = -1
+
+    def _read_index(self) -> array:
+        end = len(self.data)
+        if end >= HEADER.size + FOOTER.size:
+            index_at, count, magic = FOOTER.unpack(self.data[end - FOOTER.size :])
+            if magic == FOOTER_MAGIC:
+                return _unpacked("Q", self.data[index_at : index_at + 8 * count])
+        return self._scan()
+
+    def _scan(self) -> array:
+        """No footer (the recorder never closed): walk the frames instead,
+        keeping every frame that is complete"""
+        offsets = array("Q")
+        offset = HEADER.size
+        while offset + FRAME.size <= len(self.data):
+            try:
+                size = self._frame_size(offset)
+            except struct.error:
+                break
+            if offset + size > len(self.data):
+                break
+            offsets.append(offset)
+            offset += size
+        return offsets
+
+    def _frame_size(self, offset: int) -> int:
+        header: tuple[int, ...] = FRAME.unpack_from(self.data, offset)
+        kind, _, first, second, third, fourth = header
+        size = FRAME.size
+        if kind == KEYFRAME:
+            return size + first * 13
+        if kind == DELTA:
+            return size + first * 4 + second * 13 + third * 2 + fourth * 12
+        raise struct.error("bad frame")
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def close(self) -> None:
+        self._segment.clear()
+        self.data.release()
+        self.map.close()
+
+    def tick_of(self, number: int) -> int:
+        tick: int = FRAME.unpack_from(self.data, self.offsets[number])[1]
+        return tick
+
+    def frame(self, number: int) -> Frame:
+        """Frame by position in the recording (0 to len - 1)"""
+        if not 0 <= number < len(self.offsets):
+            raise IndexError(number)
+        start = number - number % self.keyframe_every
+        if start != self._segment_start:
+            self._segment = {}
+            self._segment_start = start
+        found = self._segment.get(number)
+        if found is not None:
+            return found
+        # decode forward from the latest frame we already have in this segment
+        have = max((each for each in self._segment if each < number), default=None)
+        if have is None:
+            frame = self._decode_keyframe(self.offsets[start])
+            self._segment[start] = frame
+            have = start
+        else:
+            frame = self._segment[have]
+        for each in range(have + 1, number + 1):
+            frame = self._decode_delta(self.offsets[each], frame)
+            self._segment[each] = frame
+        return frame
+
+    def __iter__(self) -> Iterator[Frame]:
+        for number in range(len(self)):
+            yield self.frame(number)
+
+    def _decode_keyframe(self, offset: int) -> Frame:
+        kind, tick, count, _, _, _ = FRAME.unpack_from(self.data, offset)
+        if kind != KEYFRAME:
+            raise TrajectoryError(f"expected a keyframe at {offset}")
+        at = offset + FRAME.size
+        ids = _unpacked("I", self.data[at : at + 4 * count])
+        at += 4 * count
+        kinds = _unpacked("B", self.data[at : at + count])
+        at += count
+        xs = _unpacked("i", self.data[at : at + 4 * count])
+        at += 4 * count
+        ys = _unpacked("i", self.data[at : at + 4 * count])
+        return Frame(tick, ids, kinds, xs, ys)
+
+    def _decode_delta(self, offset: int, previous: Frame) -> Frame:
+        kind, tick, removed, added, survivors, overflow = FRAME.unpack_from(
+            self.data, offset
+        )
+        if kind == KEYFRAME:
+            return self._decode_keyframe(offset)
+        at = offset + FRAME.size
+
+        def take(typecode: str, count: int) -> array:
+            nonlocal at
+            size = array(typecode).itemsize * count
+            values = _unpacked(typecode, self.data[at : at + size])
+            at += size
+            return values
+
+        gone = take("I", removed)
+        new_ids, new_kinds = take("I", added), take("B", added)
+        new_xs, new_ys = take("i", added), take("i", added)
+        dxs, dys = take("b", survivors), take("b", survivors)
+        jumps = take("i", overflow * 3)
+
+        # slices and map keep the per-agent work in C: a delta at 10k
+        # agents decodes in a couple of milliseconds
+        xs = array("i", list(map(add, _without(previous.xs, gone), dxs)))
+        ys = array("i", list(map(add, _without(previous.ys, gone), dys)))
+        ids, kinds = _without(previous.ids, gone), _without(previous.kinds, gone)
+        for index in range(0, len(jumps), 3):
+            xs[jumps[index]] = jumps[index + 1]
+            ys[jumps[index]] = jumps[index + 2]
+        return Frame(tick, ids + new_ids, kinds + new_kinds, xs + new_xs, ys + new_ys)
+
+
+class Replay:
+    """Playback state over a reader: position, speed and direction"""
+
+    SPEEDS: tuple[int, ...] = (1, 2, 4, 8, 16, 32, 64)
+
+    def __init__(self, reader: TrajectoryReader):
+        self.reader: TrajectoryReader = reader
+        self.position: int = 0
+        self.speed_index: int = 0
+        self.direction: int = 1
+        self.paused: bool = False
+
+    @property
+    def speed(self) -> int:
+        return self.SPEEDS[self.speed_index]
+
+    def seek(self, number: int) -> None:
+        self.position = max(0, min(number, len(self.reader) - 1))
+
+    def advance(self) -> bool:
+        """Move on by the current speed, returns False at either end"""
+        if not self.paused:
+            self.seek(self.position + self.direction * self.speed)
+        return 0 < self.position < len(self.reader) - 1
+
+    def step(self, frames: int) -> None:
+        self.paused = True
+        self.seek(self.position + frames)
+
+    def faster(self) -> None:
+        self.speed_index = min(self.speed_index + 1, len(self.SPEEDS) - 1)
+
+    def slower(self) -> None:
+        self.speed_index = max(self.speed_index - 1, 0)
+
+    def reverse(self) -> None:
+        self.direction = -self.direction
+
+    def toggle_pause(self) -> None:
+        self.paused = not self.paused
+
+    def draw(
+        self, screen: pygame.surface.Surface, camera: Optional[Camera] = None
+    ) -> None:
+        """Only what camera sees, where and as big as it says; without one,
+        positions in the world are positions on screen"""
+        if not len(self.reader):
+            return
+        frame = self.reader.frame(self.position)
+        images = {
+            ZOMBIE: ATLAS.image(ZombieSprite.shape, ZOMBIE_COLOR),
+            HUMAN: ATLAS.image(HumanSprite.shape, HUMAN_COLOR),
+            FOOD: ATLAS.image(FoodSprite.shape, FOOD_COLOR),
+        }
+        half_w, half_h = ENTITY_WIDTH // 2, ENTITY_HEIGHT // 2
+        for kind in KIND_ORDER:
+            image = images[kind]
+            if camera is None:
+                blits = [
+                    (image, (x - half_w, y - half_h))
+                    for each, x, y in zip(frame.kinds, frame.xs, frame.ys)
+                    if each == kind
+                ]
+            else:
+                image = camera.scaled(image)
+                to_screen = camera.to_screen
+                inside = camera.area().inflate(ENTITY_WIDTH, ENTITY_HEIGHT).collidepoint
+                blits = [
+                    (image, to_screen(x - half_w, y - half_h))
+                    for each, x, y in zip(frame.kinds, frame.xs, frame.ys)
+                    if each == kind and inside(x, y)
+                ]
+            screen.blits(blits, doreturn=False)
+
+    def status(self) -> str:
+        arrow = "<" if self.direction < 0 else ">"
+        state = "paused" if self.paused else f"{arrow} x{self.speed}"
+        tick = self.reader.tick_of(self.position) if len(self.reader) else 0
+        return f"tick {tick} ({self.position + 1}/{len(self.reader)}) {state}"
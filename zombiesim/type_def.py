@@ -2,20 +2,25 @@
 Basic types used for optional type checking (mypy)
 """
 
-from dataclasses import dataclass
 import pygame
 from math import atan2, radians, sin, cos, sqrt
 from collections.abc import Callable, Iterable
-from typing import NamedTuple, Protocol, Tuple
+from typing import NamedTuple, Optional, Protocol, Tuple
 
 EventCallback = Callable[[pygame.event.Event], None]
 Runnable = Callable[[], None]
 
 
-@dataclass(frozen=True)
 class Point:
-    x: float
-    y: float
+    """An immutable position. Slotted rather than a frozen dataclass, as
+    every sprite makes several of these each tick; treat it as a value and
+    use MutablePoint for anything built up a step at a time"""
+
+    __slots__ = ("x", "y")
+
+    def __init__(self, x: float, y: float):
+        self.x: float = x
+        self.y: float = y
 
     def distance(self, dest: "Point") -> float:
         return sqrt(((self.x - dest.x) ** 2) + ((self.y - dest.y) ** 2))
@@ -26,6 +31,38 @@ class Point:
     def __sub__(self, another: "Point") -> "Point":
         return self.__class__(self.x - another.x, self.y - another.y)
 
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.x == other.x and self.y == other.y  # type: ignore
+
+    def __hash__(self) -> int:
+        return hash((self.x, self.y))
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(x={self.x!r}, y={self.y!r})"
+
+
+class MutablePoint:
+    """Scratch position for adding up moves in place"""
+
+    __slots__ = ("x", "y")
+
+    def __init__(self, x: float, y: float):
+        self.x: float = x
+        self.y: float = y
+
+    def move(self, direction: "Direction", factor: float) -> None:
+        """Go factor along direction"""
+        self.x = self.x + (factor * direction.x)
+        self.y = self.y + (factor * direction.y)
+
+    def to_point(self) -> Point:
+        return Point(self.x, self.y)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(x={self.x!r}, y={self.y!r})"
+
 
 PointProducer = Callable[[], Point]
 
@@ -36,33 +73,52 @@ class Bounds(Protocol):
 
 
 class HasPosition(Protocol):
-    position: Point
+    @property
+    def position(self) -> Point: ...
+
 
+class Mortal(Protocol):
+    def alive(self) -> bool: ...
 
-class Zombie(HasPosition):
+
+class Zombie(HasPosition, Mortal, Protocol):
     pass
 
 
-class Human(HasPosition):
-    def eat_food(self, food: "Food") -> None: ...
+class Human(HasPosition, Mortal, Protocol):
+    def eat_food(self, food: "Food", tick: int) -> bool: ...
 
 
-class Food(HasPosition):
+class Food(HasPosition, Protocol):
     def has_more(self) -> bool: ...
     def consume(self) -> None: ...
 
 
 class World(Protocol):
-    zombies: Iterable[Zombie]
-    humans: Iterable[Human]
-    food: Iterable[Food]
-    bounds: Bounds
+    @property
+    def zombies(self) -> Iterable[Zombie]: ...
+    @property
+    def humans(self) -> Iterable[Human]: ...
+    @property
+    def food(self) -> Iterable[Food]: ...
+    @property
+    def bounds(self) -> Bounds: ...
+    @property
+    def tick(self) -> int: ...
+
+    def humans_near(self, point: Point, radius: float) -> Iterable[Human]: ...
+    def zombies_near(self, point: Point, radius: float) -> Iterable[Zombie]: ...
+    def closest_food(self, point: Point) -> tuple[Optional[Food], float]: ...
 
 
-@dataclass(frozen=True)
 class Direction:
-    x: float
-    y: float
+    """An immutable direction, slotted like Point"""
+
+    __slots__ = ("x", "y")
+
+    def __init__(self, x: float, y: float):
+        self.x: float = x
+        self.y: float = y
 
     @classmethod
     def from_angle(cls, angle_radians: float) -> "Direction":
@@ -70,8 +126,16 @@ class Direction:
 
     @classmethod
     def from_points(cls, src: Point, dest: Point) -> "Direction":
-        # TODO FIX
-        return cls(dest.x - src.x, dest.y - src.y).normalize()
+        return direction_and_distance(src, dest)[0]
+
+    @classmethod
+    def towards(cls, x: float, y: float) -> "Direction":
+        """The normalized direction of (x, y), without the intermediate
+        Direction that Direction(x, y).normalize() makes"""
+        dist = sqrt(x**2 + y**2)
+        if dist == 0:
+            return cls(x, y)
+        return cls(x / dist, y / dist)
 
     def normalize(self) -> "Direction":
         dist = sqrt(self.x**2 + self.y**2)
@@ -81,9 +145,9 @@ class Direction:
 
     def add_angle(self, angle_degrees: float):
         angle_radians = radians(angle_degrees)
-        return self.__class__(
+        return self.__class__.towards(
             self.x + cos(angle_radians), self.y + sin(angle_radians)
-        ).normalize()
+        )
 
     def to_angle(self) -> float:
         return atan2(self.y, self.x)
@@ -91,3 +155,49 @@ class Direction:
     def __neg__(self) -> "Direction":
         negative_one = float(-1)
         return self.__class__(self.x * negative_one, self.y * negative_one)
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.x == other.x and self.y == other.y  # type: ignore
+
+    def __hash__(self) -> int:
+        return hash((self.x, self.y))
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(x={self.x!r}, y={self.y!r})"
+
+
+def direction_and_distance(src: Point, dest: Point) -> tuple[Direction, float]:
+    """Direction.from_points and src.distance(dest) in one go, sharing the
+    square root (the results are exactly what the two calls give)"""
+    dx = dest.x - src.x
+    dy = dest.y - src.y
+    dist = sqrt(dx**2 + dy**2)
+    if dist == 0:
+        return Direction(dx, dy), dist
+    return Direction(dx / dist, dy / dist), dist
+
+
+def wrapped_delta(delta: float, size: float) -> float:
+    """delta along an axis that wraps around after size, taken the short
+    way round (as SpatialGrid.distance measures it) and keeping its sign"""
+    delta = delta % size
+    if delta > size / 2.0:
+        delta -= size
+    return delta
+
+
+def wrapped_direction_and_distance(
+    src: Point, dest: Point, bounds: Bounds
+) -> tuple[Direction, float]:
+    """direction_and_distance the short way round a field that wraps at
+    bounds, on each axis separately"""
+    left, top = bounds.topleft
+    right, bottom = bounds.bottomright
+    dx = wrapped_delta(dest.x - src.x, float(max(1, right - left)))
+    dy = wrapped_delta(dest.y - src.y, float(max(1, bottom - top)))
+    dist = sqrt(dx**2 + dy**2)
+    if dist == 0:
+        return Direction(dx, dy), dist
+    return Direction(dx / dist, dy / dist), dist
@@ -6,16 +6,15 @@ Various utility functions that don't fit into objects yet
 @author: bbuxton
 """
 
-from functools import wraps
+import gc
+import hashlib
 import math
 import random
-from threading import RLock
 import time
-import weakref
-from typing import Any, Callable, TypeVar
+from typing import Callable, Generic, Iterable, Optional, TypeVar
 
 import pygame
-from zombiesim.type_def import Bounds, Point, Direction
+from zombiesim.type_def import Bounds, Mortal, Point, Direction
 from collections.abc import Generator
 
 
@@ -30,16 +29,45 @@ def span(rect: Bounds) -> float:
     return Point(*rect.topleft).distance(Point(*rect.bottomright))
 
 
-def random_direction() -> Direction:
-    return Direction.from_angle(random_angle())
+class RandomStreams:
+    """One seed, split into an independent stream per subsystem so that
+    drawing more (or fewer) numbers in one place doesn't shift the others.
 
+    The sprite Field and vectorized.ArrayWorld draw the same numbers in the
+    same order, so a seed gives the same run in either. parallel.TiledWorld
+    draws by (seed, tick, agent id) instead, so its runs only agree with
+    theirs statistically."""
 
-def random_angle() -> float:
-    return math.radians(random.randint(0, 359))
+    NAMES = ("spawn", "movement", "lifetime")
 
+    def __init__(self, seed: Optional[int] = None):
+        if seed is None:
+            seed = random.SystemRandom().randrange(2**32)
+        self.seed: int = seed
+        self.spawn: random.Random = random.Random(self.seed_for("spawn"))
+        self.movement: random.Random = random.Random(self.seed_for("movement"))
+        self.lifetime: random.Random = random.Random(self.seed_for("lifetime"))
 
-def random_angle_change(angle: float, amount: int) -> float:
-    change = math.radians(random.randint(-amount, amount))
+    def seed_for(self, name: str) -> int:
+        digest = hashlib.sha256(f"{self.seed}:{name}".encode()).digest()
+        return int.from_bytes(digest[:8], "big")
+
+
+DEFAULT_STREAMS = RandomStreams()
+
+
+def random_direction(rng: random.Random = DEFAULT_STREAMS.movement) -> Direction:
+    return Direction.from_angle(random_angle(rng))
+
+
+def random_angle(rng: random.Random = DEFAULT_STREAMS.movement) -> float:
+    return math.radians(rng.randint(0, 359))
+
+
+def random_angle_change(
+    angle: float, amount: int, rng: random.Random = DEFAULT_STREAMS.movement
+) -> float:
+    change = math.radians(rng.randint(-amount, amount))
     return angle + change
 
 
@@ -50,6 +78,17 @@ def xfrange(start: float, stop: float, step: float) -> Generator[float, None, No
         current = current + step
 
 
+def steps_until_empty(start: float, decay: float) -> int:
+    """How many of start, start - decay, start - 2 * decay... (each worked
+    out in one go, not by repeated subtraction) are above 0"""
+    steps = max(0, math.ceil(start / decay))
+    while steps > 0 and start - decay * (steps - 1) <= 0:
+        steps -= 1
+    while start - decay * steps > 0:
+        steps += 1
+    return steps
+
+
 def make_full_screen() -> None:
     display_info = pygame.display.Info()
     flags = pygame.display.get_surface().get_flags()
@@ -59,35 +98,180 @@ def make_full_screen() -> None:
         )
 
 
-ReturnT = TypeVar("ReturnT", bound=Any)
-CacheableFunc = Callable[..., ReturnT]
+M = TypeVar("M", bound=Mortal)
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits: int = 0
+        self.misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def reset(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    def __str__(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses ({self.hit_rate:.0%})"
+
+
+class PoolStats:
+    """Where the entities an EntityGroup handed out came from"""
+
+    def __init__(self):
+        self.created: int = 0
+        self.reused: int = 0
+        self.released: int = 0
+
+    def reset(self) -> None:
+        self.created = 0
+        self.reused = 0
+        self.released = 0
+
+    def __str__(self) -> str:
+        return f"{self.created} created, {self.reused} reused, {self.released} released"
+
+
+class DispatchStats:
+    """Events EventLookup has handed out, and the timer backlog it merged:
+    timer events that queued up more than once between two frames"""
+
+    def __init__(self):
+        self.dispatched: int = 0
+        self.merged: int = 0
+        self.backlogged_frames: int = 0
+        self.worst_backlog: int = 0
+
+    def reset(self) -> None:
+        self.dispatched = 0
+        self.merged = 0
+        self.backlogged_frames = 0
+        self.worst_backlog = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.dispatched} dispatched, {self.merged} timer events merged"
+            f" in {self.backlogged_frames} frames (worst {self.worst_backlog})"
+        )
+
+
+class ExportStats:
+    """Frames handed to an export writer, those left out because every
+    buffer was still waiting to be written (only when asked to drop them)
+    and how long was spent waiting for a buffer instead"""
+
+    def __init__(self):
+        self.exported: int = 0
+        self.dropped: int = 0
+        self.waited: float = 0.0
+
+    def reset(self) -> None:
+        self.exported = 0
+        self.dropped = 0
+        self.waited = 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.exported} exported, {self.dropped} dropped, "
+            f"{self.waited:.1f}s waiting to export"
+        )
+
+
+class ActivityStats:
+    """How many agent updates took the full steering calculation and how
+    many had nothing near enough to need it"""
+
+    def __init__(self):
+        self.active: int = 0
+        self.idle: int = 0
+
+    def reset(self) -> None:
+        self.active = 0
+        self.idle = 0
+
+    def __str__(self) -> str:
+        total = self.active + self.idle
+        share = self.idle / total if total else 0.0
+        return f"{self.active} active, {self.idle} idle ({share:.0%})"
+
+
+class GcStats:
+    """Garbage collections, per generation, and the time spent in them
+    while installed (through gc.callbacks)"""
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock: Callable[[], float] = clock
+        self.collections: list[int] = [0] * len(gc.get_count())
+        self.seconds: float = 0.0
+        self._began: Optional[float] = None
+
+    def install(self) -> "GcStats":
+        if self._callback not in gc.callbacks:
+            gc.callbacks.append(self._callback)
+        return self
+
+    def uninstall(self) -> None:
+        if self._callback in gc.callbacks:
+            gc.callbacks.remove(self._callback)
+
+    def _callback(self, phase: str, info: dict[str, int]) -> None:
+        if phase == "start":
+            self._began = self.clock()
+        elif self._began is not None:
+            self.collections[info["generation"]] += 1
+            self.seconds += self.clock() - self._began
+            self._began = None
+
+    def __str__(self) -> str:
+        counts = "/".join(str(each) for each in self.collections)
+        return f"{counts} collections, {self.seconds * 1000:.1f}ms"
+
 
+class VisionCache(Generic[M]):
+    """What one entity saw, kept for a number of ticks. Anything that has
+    died since is dropped before the list is handed back."""
 
-def cache_for(times: int = 1) -> Callable[[CacheableFunc], CacheableFunc]:
-    lock: RLock = RLock()
-    inst_cache: dict[int, Any] = dict()
+    __slots__ = ("lifetime", "stats", "expires", "seen")
 
-    def decorator(method: CacheableFunc) -> CacheableFunc:
-        @wraps(method)
-        def wrapper(ref, *args, **kargs) -> ReturnT:
-            id_ref: int = id(ref)
-            with lock:
-                called: int
-                value: ReturnT
-                called, value = inst_cache.get(id_ref, (0, None))
-                if called % times == 0:
-                    value = method(ref, *args, **kargs)
-                called += 1
-                inst_cache[id_ref] = called, value
-                if called == 1:
+    def __init__(self, lifetime: int, stats: CacheStats):
+        self.lifetime: int = lifetime
+        self.stats: CacheStats = stats
+        self.expires: int = -1
+        self.seen: list[M] = []
 
-                    def finalizer() -> None:
-                        with lock:
-                            del inst_cache[id_ref]
+    def lookup(self, tick: int, compute: Callable[[], Iterable[M]]) -> list[M]:
+        if tick < self.expires:
+            self.stats.hits += 1
+            if not all(each.alive() for each in self.seen):
+                self.seen = [each for each in self.seen if each.alive()]
+            return self.seen
+        self.stats.misses += 1
+        self.seen = list(compute())
+        self.expires = tick + self.lifetime
+        return self.seen
 
-                    weakref.finalize(ref, finalizer)
-                return value
+    def fresh(self, tick: int) -> bool:
+        """Whether lookup would return the list kept from before"""
+        return tick < self.expires
 
-        return wrapper
+    def lookup_nothing(self, tick: int) -> bool:
+        """lookup for when compute is known to find no one, without calling
+        it; returns False, changing nothing, if the list kept from before is
+        still fresh and has someone alive in it"""
+        if tick < self.expires:
+            if any(each.alive() for each in self.seen):
+                return False
+            self.stats.hits += 1
+        else:
+            self.stats.misses += 1
+            self.expires = tick + self.lifetime
+        self.seen = []
+        return True
 
-    return decorator
+    def clear(self) -> None:
+        self.expires = -1
+        self.seen = []
@@ -0,0 +1,640 @@
+"""
+Array-backed world: every agent's state lives in flat NumPy arrays and each
+tick is a handful of vectorized passes over the whole population.
+
+This follows the sprite rules in entities and field step by step (the same
+steering, vision caches, edge wrapping, bites and eating) and draws from
+the same RandomStreams in the same order, so it can stand in for a Field
+anywhere a Simulation world is expected and a seed plays out the same run
+in both: the same positions, zombie angles and counts every tick. Only
+human directions can be off in the last bit, where NumPy squares a float
+that the sprites raise to the power 2. NumPy is optional; only import this
+module when it is installed.
+"""
+
+import math
+from collections.abc import Callable
+from typing import Optional
+
+import numpy as np
+
+from zombiesim import entities
+import zombiesim.util as zutil
+from zombiesim.simulation import Census, EventCounts
+from zombiesim.type_def import Bounds, Direction
+
+ENTITY_SIZE: float = float(entities.ENTITY_WIDTH)
+BITE_RADIUS: float = math.hypot(entities.ENTITY_WIDTH, entities.ENTITY_HEIGHT)
+HALF_WIDTH: int = entities.ENTITY_WIDTH // 2
+HALF_HEIGHT: int = entities.ENTITY_HEIGHT // 2
+
+
+def wrapped(delta: np.ndarray, size: float) -> np.ndarray:
+    delta = np.abs(delta) % size
+    shortest: np.ndarray = np.minimum(delta, size - delta)
+    return shortest
+
+
+def normalized(vectors: np.ndarray) -> np.ndarray:
+    """Row-wise Direction.normalize: zero length rows are left alone"""
+    length = np.sqrt(vectors[:, 0] ** 2 + vectors[:, 1] ** 2)
+    length = np.where(length == 0, 1.0, length)
+    return vectors / length[:, None]
+
+
+def shortest(
+    delta: np.ndarray, size: tuple[float, float]
+) -> tuple[np.ndarray, np.ndarray]:
+    """Direction and distance for each delta row, taken the short way round
+    the wrapping field on each axis (as wrapped and the vision grids
+    measure it)"""
+    extent = np.asarray(size)
+    delta = np.mod(delta, extent)
+    delta = np.where(delta > extent / 2.0, delta - extent, delta)
+    return normalized(delta), np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+
+
+def fold(delta: np.ndarray, span: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Direction, distance and "went the other way" for each delta row,
+    using the diagonal-span fold the sprites measure food with"""
+    dist = np.hypot(delta[:, 0], delta[:, 1])
+    direc = normalized(delta)
+    reverse = dist > (span / 2.0)
+    dist = np.where(reverse, span - dist, dist)
+    return direc, dist, reverse
+
+
+class CellIndex:
+    """Uniform grid over a set of points, answers radius queries in bulk"""
+
+    def __init__(
+        self,
+        positions: np.ndarray,
+        origin: tuple[float, float],
+        size: tuple[float, float],
+        cell_size: float,
+    ):
+        self.positions = positions
+        self.left, self.top = origin
+        self.width, self.height = size
+        self.columns = max(1, int(self.width // max(1.0, cell_size)))
+        self.rows = max(1, int(self.height // max(1.0, cell_size)))
+        self.cell_width = self.width / self.columns
+        self.cell_height = self.height / self.rows
+        cols, rows = self.cells_for(positions)
+        cells = cols * self.rows + rows
+        # what a stable argsort gives, but sorting one key is much quicker
+        count = max(1, len(cells))
+        self.order = np.sort(cells * count + np.arange(len(cells))) % count
+        self.counts = np.bincount(cells, minlength=self.columns * self.rows)
+        self.starts = np.cumsum(self.counts) - self.counts
+
+    def cells_for(self, points: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        cols = np.floor((points[:, 0] - self.left) / self.cell_width).astype(np.int64)
+        rows = np.floor((points[:, 1] - self.top) / self.cell_height).astype(np.int64)
+        return cols % self.columns, rows % self.rows
+
+    def _offsets(self, radius: float, cell: float, count: int) -> list[int]:
+        reach = int(math.ceil(radius / cell))
+        if 2 * reach + 1 >= count:
+            return list(range(count))
+        return list(range(-reach, reach + 1))
+
+    def pairs(
+        self, points: np.ndarray, radius: float
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(query index, point index, distance) for everything within radius
+
+        Distances go the short way around the wrapping field. Pairs for any
+        one query come out in a fixed order that does not depend on which
+        other queries are asked alongside it.
+        """
+        found_query: list[np.ndarray] = []
+        found_index: list[np.ndarray] = []
+        if len(points) and len(self.positions):
+            cols, rows = self.cells_for(points)
+            queries = np.arange(len(points))
+            for dcol in self._offsets(radius, self.cell_width, self.columns):
+                for drow in self._offsets(radius, self.cell_height, self.rows):
+                    cells = ((cols + dcol) % self.columns) * self.rows + (
+                        (rows + drow) % self.rows
+                    )
+                    counts = self.counts[cells]
+                    total = int(counts.sum())
+                    if total == 0:
+                        continue
+                    firsts = np.cumsum(counts) - counts
+                    slots = np.arange(total) + np.repeat(
+                        self.starts[cells] - firsts, counts
+                    )
+                    found_query.append(np.repeat(queries, counts))
+                    found_index.append(self.order[slots])
+        if not found_query:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0)
+        query = np.concatenate(found_query)
+        index = np.concatenate(found_index)
+        delta = self.positions[index] - points[query]
+        dist = np.hypot(
+            wrapped(delta[:, 0], self.width), wrapped(delta[:, 1], self.height)
+        )
+        keep = dist <= radius
+        return query[keep], index[keep], dist[keep]
+
+    def closest(
+        self, points: np.ndarray, radius: float, ties: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Index of the nearest point within radius for each query, or -1;
+        equally near points go to the lowest index, or lowest ties value"""
+        result = np.full(len(points), -1, dtype=np.int64)
+        query, index, dist = self.pairs(points, radius)
+        if len(query):
+            order = np.lexsort((index if ties is None else ties[index], dist, query))
+            query, index = query[order], index[order]
+            first = np.ones(len(query), dtype=bool)
+            first[1:] = query[1:] != query[:-1]
+            result[query[first]] = index[first]
+        return result
+
+
+class ArrayWorld:
+    def __init__(
+        self,
+        rect: Bounds,
+        start_zombies: int,
+        start_humans: int,
+        max_food: int,
+        streams: Optional[zutil.RandomStreams] = None,
+    ):
+        self.streams: zutil.RandomStreams = streams or zutil.RandomStreams()
+        self.left, self.top = rect.topleft
+        self.right, self.bottom = rect.bottomright
+        # what the vision grids wrap at, as SpatialGrid has it
+        self.width = float(max(1, self.right - self.left))
+        self.height = float(max(1, self.bottom - self.top))
+        self.span = zutil.span(rect)
+        self.max_food = max_food
+        self.tick: int = 0
+        self.counts: EventCounts = EventCounts()
+        # see contacts: (tick, index, human id of each row)
+        self.contact_index: Optional[tuple[int, CellIndex, np.ndarray]] = None
+
+        self.zombie_pos = np.zeros((0, 2))
+        self.zombie_dir = np.zeros((0, 2))
+        self.zombie_angle = np.zeros(0)
+        self.attack_wait = np.zeros(0, dtype=np.int64)
+        # each zombie's VisionCache: when it runs out and, as (zombie, human
+        # id) rows in the order seen, who is in it
+        self.zombie_expires = np.zeros(0, dtype=np.int64)
+        self.humans_seen = np.zeros((0, 2), dtype=np.int64)
+        self.add_zombies(start_zombies)
+
+        self.add_humans(start_humans)
+        # the same for humans, as (human id, zombie) rows
+        self.zombies_seen = np.zeros((0, 2), dtype=np.int64)
+
+        points = [self.random_point() for _ in range(max_food)]
+        self.food_pos = np.array(points, dtype=np.float64).reshape(-1, 2)
+        self.food_amount = np.full(max_food, entities.DEFAULT_FOOD_AMOUNT)
+
+    @property
+    def origin(self) -> tuple[float, float]:
+        return float(self.left), float(self.top)
+
+    @property
+    def size(self) -> tuple[float, float]:
+        return self.width, self.height
+
+    def random_point(self) -> tuple[int, int]:
+        # field.random_point
+        spawn = self.streams.spawn
+        return spawn.randrange(self.left, self.right), spawn.randrange(
+            self.top, self.bottom
+        )
+
+    def add_zombies(self, count: int, positions: Optional[np.ndarray] = None) -> None:
+        """Make count zombies, drawing what a new ZombieSprite draws; each
+        goes where positions says or, without, to a random point drawn
+        straight after it (as Entity.create_group does)"""
+        spawn, movement = self.streams.spawn, self.streams.movement
+        low = int(entities.ZOMBIE_ATTACK_WAIT_MAX / 2)
+        angles: list[float] = []
+        directions: list[tuple[float, float]] = []
+        waits: list[int] = []
+        points: list[tuple[int, int]] = []
+        for _ in range(count):
+            angle = zutil.random_angle(spawn)
+            angle = zutil.random_angle_change(angle, 45, movement)
+            angles.append(angle)
+            directions.append((math.cos(angle), math.sin(angle)))
+            waits.append(spawn.randint(low, entities.ZOMBIE_ATTACK_WAIT_MAX))
+            if positions is None:
+                points.append(self.random_point())
+        if positions is None:
+            positions = np.array(points, dtype=np.float64).reshape(-1, 2)
+        self.zombie_pos = np.concatenate((self.zombie_pos, positions))
+        self.zombie_dir = np.concatenate(
+            (self.zombie_dir, np.array(directions).reshape(-1, 2))
+        )
+        self.zombie_angle = np.concatenate((self.zombie_angle, angles))
+        self.attack_wait = np.concatenate(
+            (self.attack_wait, np.array(waits, dtype=np.int64))
+        )
+        self.zombie_expires = np.concatenate(
+            (self.zombie_expires, np.full(count, -1, dtype=np.int64))
+        )
+
+    def add_humans(self, count: int) -> None:
+        """The humans a new field starts with, drawn as HumanSprite and
+        Entity.create_group draw them"""
+        directions: list[tuple[float, float]] = []
+        lifetimes: list[float] = []
+        points: list[tuple[int, int]] = []
+        for _ in range(count):
+            direction = zutil.random_direction(self.streams.movement)
+            directions.append((direction.x, direction.y))
+            lifetimes.append(self.new_lifetime())
+            points.append(self.random_point())
+        self.human_pos = np.array(points, dtype=np.float64).reshape(-1, 2)
+        self.human_dir = np.array(directions).reshape(-1, 2)
+        # only worked out from the first human tick on, as for the sprites
+        self.human_energy = np.zeros(count)
+        self.full_energy = np.array(lifetimes)
+        self.fed_at = np.zeros(count, dtype=np.int64)
+        self.starves_at = np.array(
+            [self.starves_after(lifetime, 0) for lifetime in lifetimes],
+            dtype=np.int64,
+        )
+        # humans are never added later, so ids stay in group order
+        self.human_id = np.arange(count)
+        self.human_expires = np.full(count, -1, dtype=np.int64)
+
+    def new_lifetime(self) -> float:
+        # HumanSprite.new_lifetime
+        spread = entities.HUMAN_ENERGY_LEVEL - entities.HUMAN_HUNGRY_LEVEL
+        return entities.HUMAN_HUNGRY_LEVEL + (self.streams.lifetime.random() * spread)
+
+    def starves_after(self, full_energy: float, tick: int) -> int:
+        # HumanSprite.feed
+        decay = entities.HUMAN_ENERGY_DECAY
+        return tick + 1 + zutil.steps_until_empty(full_energy, decay)
+
+    def feed(self, human: int) -> None:
+        """HumanSprite.eat_food for the human in row human, once it has
+        taken a bite"""
+        full_energy = self.new_lifetime()
+        self.full_energy[human] = full_energy
+        self.fed_at[human] = self.tick
+        self.starves_at[human] = self.starves_after(full_energy, self.tick)
+        direction = zutil.random_direction(self.streams.movement)
+        self.human_dir[human] = direction.x, direction.y
+
+    def keep_humans(self, keep: np.ndarray) -> None:
+        self.human_pos = self.human_pos[keep]
+        self.human_dir = self.human_dir[keep]
+        self.human_energy = self.human_energy[keep]
+        self.full_energy = self.full_energy[keep]
+        self.fed_at = self.fed_at[keep]
+        self.starves_at = self.starves_at[keep]
+        self.human_id = self.human_id[keep]
+        self.human_expires = self.human_expires[keep]
+
+    def rows_of(self, ids: np.ndarray) -> np.ndarray:
+        """Where the humans with these ids are now, -1 for the dead"""
+        if not len(self.human_id):
+            return np.full(len(ids), -1, dtype=np.int64)
+        rows = np.minimum(np.searchsorted(self.human_id, ids), len(self.human_id) - 1)
+        return np.where(self.human_id[rows] == ids, rows, -1)
+
+    def index_of(self, positions: np.ndarray, cell_size: float) -> CellIndex:
+        # cells no smaller than one per point, as empty cells cost as much
+        # to set up as full ones
+        spacing = math.sqrt(self.width * self.height / max(1, len(positions)))
+        return CellIndex(positions, self.origin, self.size, max(cell_size, spacing))
+
+    def near(
+        self, points: np.ndarray, targets: np.ndarray, radius: float
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """(point, target) for every target within radius of each point,
+        indexing the larger of the two and asking from the smaller"""
+        if len(points) > len(targets):
+            target, point, _ = self.index_of(points, radius).pairs(targets, radius)
+        else:
+            point, target, _ = self.index_of(targets, radius).pairs(points, radius)
+        return point, target
+
+    def shortest(self, delta: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        return shortest(delta, self.size)
+
+    def move(self, positions: np.ndarray, directions: np.ndarray, energy) -> None:
+        """Actor.update_pos: it is the top left that moves and is rounded"""
+        self.contact_index = None
+        half = np.array([HALF_WIDTH, HALF_HEIGHT])
+        moved = (positions - half) + directions * np.reshape(energy, (-1, 1))
+        positions[:] = np.round(moved) + half
+
+    def update_zombies(self) -> None:
+        waiting = self.attack_wait > 0
+        self.attack_wait[waiting] -= 1
+        active = np.flatnonzero(~waiting)
+        if not len(active):
+            return
+        self.look_for_humans(active)
+        goto = self.zombie_pos[active]
+        zombie, victim = self.closest_humans(active)
+        if len(zombie):
+            start = self.zombie_pos[zombie]
+            direc, dist = self.shortest(self.human_pos[victim] - start)
+            factor = float(entities.ZOMBIE_VISION) - dist
+            goto[np.searchsorted(active, zombie)] = np.trunc(
+                start + factor[:, None] * direc
+            )
+        angles = self.turn_towards(
+            self.zombie_pos[active], goto, self.zombie_dir[active], active
+        )
+        direction = np.column_stack((np.cos(angles), np.sin(angles)))
+        self.zombie_angle[active] = angles
+        self.zombie_dir[active] = direction
+        positions = self.zombie_pos[active]
+        self.move(positions, direction, entities.ZOMBIE_ENERGY)
+        self.zombie_pos[active] = positions
+
+    def look_for_humans(self, active: np.ndarray) -> None:
+        """VisionCache.lookup of the humans near each active zombie"""
+        seen = self.humans_seen
+        seen = seen[self.rows_of(seen[:, 1]) >= 0]
+        due = active[self.tick >= self.zombie_expires[active]]
+        if len(due):
+            vision = float(entities.ZOMBIE_VISION)
+            zombie, human = self.near(self.zombie_pos[due], self.human_pos, vision)
+            found = np.column_stack((due[zombie], self.human_id[human]))
+            seen = np.concatenate((seen[~np.isin(seen[:, 0], due)], found))
+            seen = seen[np.lexsort((seen[:, 1], seen[:, 0]))]
+            self.zombie_expires[due] = self.tick + entities.RECALCULATE_HUMANS_SEEN
+        self.humans_seen = seen
+
+    def closest_humans(self, active: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """(zombie, human row) for each active zombie that sees anyone: the
+        first of the nearest it saw, as ZombieSprite.run_to_humans picks"""
+        seen = self.humans_seen
+        seen = seen[np.isin(seen[:, 0], active)]
+        if not len(seen):
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        zombie, human = seen[:, 0], self.rows_of(seen[:, 1])
+        _, dist = self.shortest(self.human_pos[human] - self.zombie_pos[zombie])
+        order = np.lexsort((human, dist, zombie))
+        zombie, human = zombie[order], human[order]
+        first = np.ones(len(zombie), dtype=bool)
+        first[1:] = zombie[1:] != zombie[:-1]
+        return zombie[first], human[first]
+
+    def turn_towards(
+        self,
+        positions: np.ndarray,
+        goto: np.ndarray,
+        directions: np.ndarray,
+        zombies: np.ndarray,
+    ) -> list[float]:
+        """New angle of each zombie, turned as ZombieSprite.turn_towards does.
+        This is one zombie at a time in plain floats: the headings are
+        compared, and NumPy's arctan2 can be a bit off from math.atan2"""
+        movement = self.streams.movement
+        angles: list[float] = self.zombie_angle[zombies].tolist()
+        for each, ((x, y), (goto_x, goto_y), (dir_x, dir_y)) in enumerate(
+            zip(positions.tolist(), goto.tolist(), directions.tolist())
+        ):
+            heading = Direction.towards(
+                (goto_x + dir_x) - x, (goto_y + dir_y) - y
+            ).to_angle()
+            angle = angles[each]
+            if heading > angle:
+                angles[each] = angle + math.radians(movement.random() * 45)
+            elif heading < angle:
+                angles[each] = angle - math.radians(movement.random() * 45)
+        return angles
+
+    def update_humans(self) -> None:
+        self.starve()
+        tick = self.tick
+        energy = self.full_energy - entities.HUMAN_ENERGY_DECAY * (
+            tick - self.fed_at - 1
+        )
+        self.human_energy = energy
+        if not len(energy):
+            return
+        self.look_for_zombies()
+        pos = self.human_pos
+        goto = pos.copy()
+        self.run_from_zombies(goto)
+        self.run_to_food(goto, energy)
+        self.human_dir = normalized((goto + self.human_dir) - pos)
+        self.move(self.human_pos, self.human_dir, energy)
+
+    def starve(self) -> None:
+        """Field.starve: everyone whose energy has run out by this tick"""
+        alive = self.tick < self.starves_at
+        if not alive.all():
+            self.counts.starved += int(len(alive) - np.count_nonzero(alive))
+            self.keep_humans(alive)
+
+    def look_for_zombies(self) -> None:
+        """VisionCache.lookup of the zombies near each human"""
+        seen = self.zombies_seen
+        seen = seen[self.rows_of(seen[:, 0]) >= 0]
+        due = np.flatnonzero(self.tick >= self.human_expires)
+        if len(due):
+            vision = float(entities.HUMAN_VISION)
+            human, zombie = self.near(self.human_pos[due], self.zombie_pos, vision)
+            found = np.column_stack((self.human_id[due[human]], zombie))
+            ids = self.human_id[due]
+            seen = np.concatenate((seen[~np.isin(seen[:, 0], ids)], found))
+            seen = seen[np.lexsort((seen[:, 1], seen[:, 0]))]
+            self.human_expires[due] = self.tick + entities.RECALCULATE_ZOMBIES_SEEN
+        self.zombies_seen = seen
+
+    def run_from_zombies(self, goto: np.ndarray) -> None:
+        """Move goto away from every zombie each human saw, one zombie at a
+        time in the order seen, as HumanSprite.run_from_zombies adds them up"""
+        seen = self.zombies_seen
+        if not len(seen):
+            return
+        human = self.rows_of(seen[:, 0])
+        direc, dist = self.shortest(self.zombie_pos[seen[:, 1]] - self.human_pos[human])
+        push = ((float(entities.HUMAN_VISION) - dist) ** 2)[:, None] * -direc
+        first = np.ones(len(human), dtype=bool)
+        first[1:] = human[1:] != human[:-1]
+        starts = np.flatnonzero(first)
+        rank = np.arange(len(human)) - np.repeat(
+            starts, np.diff(starts, append=len(human))
+        )
+        for each in range(int(rank.max()) + 1):
+            now = rank == each
+            goto[human[now]] += push[now]
+
+    def run_to_food(self, goto: np.ndarray, energy: np.ndarray) -> None:
+        """Move goto towards the closest food, for the hungry"""
+        hungry = np.flatnonzero(energy < entities.HUMAN_HUNGRY_LEVEL)
+        if not len(hungry) or not len(self.food_pos):
+            return
+        start = self.human_pos[hungry]
+        delta = self.food_pos[self.closest_food(start)] - start
+        direc, dist = normalized(delta), np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+        factor = (energy[hungry] / 4 * entities.HUMAN_VISION) ** 2
+        factor = np.where(dist > self.span / 2.0, -factor, factor)
+        goto[hungry] += factor[:, None] * direc
+
+    def closest_food(self, points: np.ndarray) -> np.ndarray:
+        """Index of the food closest to each point, as Field.closest_food
+        measures it (the diagonal-span fold, the first of equals).
+
+        That is the nearest food straight across, found in the food's grid
+        within a radius doubled until there is some, unless the point is so
+        far from some food that the fold could make it nearer: those few
+        are measured against all the food."""
+        food = self.food_pos
+        nearest = np.full(len(points), -1, dtype=np.int64)
+        best = np.zeros(len(points))
+        radius = math.sqrt(self.width * self.height / len(food))
+        index = self.index_of(food, radius)
+        todo = np.arange(len(points))
+        while len(todo):
+            query, found, _ = index.pairs(points[todo], radius)
+            delta = food[found] - points[todo[query]]
+            dist = np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+            # pairs measures around the edges, the sprites straight across
+            inside = dist <= radius
+            query, found, dist = query[inside], found[inside], dist[inside]
+            order = np.lexsort((found, dist, query))
+            query, found, dist = query[order], found[order], dist[order]
+            first = np.ones(len(query), dtype=bool)
+            first[1:] = query[1:] != query[:-1]
+            nearest[todo[query[first]]] = found[first]
+            best[todo[query[first]]] = dist[first]
+            todo = todo[nearest[todo] < 0]
+            radius *= 2
+        low, high = food.min(axis=0), food.max(axis=0)
+        reach = np.maximum(np.abs(points - low), np.abs(points - high))
+        furthest = np.sqrt(reach[:, 0] ** 2 + reach[:, 1] ** 2)
+        folds = np.flatnonzero(
+            (furthest > self.span / 2.0) & (self.span - furthest <= best)
+        )
+        if len(folds):
+            delta = food[None, :, :] - points[folds][:, None, :]
+            dist = np.sqrt(delta[..., 0] ** 2 + delta[..., 1] ** 2)
+            dist = np.where(dist > self.span / 2.0, self.span - dist, dist)
+            nearest[folds] = np.argmin(dist, axis=1)
+        return nearest
+
+    def resolve(self) -> None:
+        self.update_humans_to_zombies()
+        self.update_eaten_food()
+        self.check_and_fix_edges()
+        self.check_food()
+
+    def contacts(self, others: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """(other, human row) for the humans that could be touching each of
+        others; the humans are indexed once a tick, after they have moved,
+        for both bites and meals"""
+        if self.contact_index is None or self.contact_index[0] != self.tick:
+            index = self.index_of(self.human_pos, BITE_RADIUS)
+            self.contact_index = (self.tick, index, self.human_id)
+        _, index, ids = self.contact_index
+        other, human, _ = index.pairs(others, BITE_RADIUS)
+        # rows as they are now, without those bitten since
+        human = self.rows_of(ids[human])
+        return other[human >= 0], human[human >= 0]
+
+    def update_humans_to_zombies(self) -> None:
+        if not len(self.zombie_pos) or not len(self.human_pos):
+            return
+        zombie, human = self.contacts(self.zombie_pos)
+        delta = self.human_pos[human] - self.zombie_pos[zombie]
+        biten = (delta[:, 0] ** 2 + delta[:, 1] ** 2) <= BITE_RADIUS**2
+        zombie, human = zombie[biten], human[biten]
+        if not len(human):
+            return
+        self.counts.bites += len(human)
+        order = np.lexsort((human, zombie))
+        human = human[order]
+        _, firsts = np.unique(human, return_index=True)
+        turned = human[np.sort(firsts)]
+        self.counts.turns += len(turned)
+        positions = self.human_pos[turned]
+        keep = np.ones(len(self.human_pos), dtype=bool)
+        keep[turned] = False
+        self.keep_humans(keep)
+        self.add_zombies(len(turned), positions)
+
+    def update_eaten_food(self) -> None:
+        if not len(self.food_pos) or not len(self.human_pos):
+            return
+        food, human = self.contacts(self.food_pos)
+        delta = np.abs(self.human_pos[human] - self.food_pos[food])
+        touching = (delta[:, 0] < ENTITY_SIZE) & (delta[:, 1] < ENTITY_SIZE)
+        # hungry by this tick's energy, which eating does not change
+        hungry = self.human_energy[human] < entities.HUMAN_HUNGRY_LEVEL
+        food, human = food[touching & hungry], human[touching & hungry]
+        if not len(food):
+            return
+        order = np.lexsort((human, food))
+        for each, eater in zip(food[order].tolist(), human[order].tolist()):
+            if self.food_amount[each] > 0:
+                self.food_amount[each] -= 1
+                self.feed(eater)
+                self.counts.eaten += 1
+        remaining = self.food_amount > 0
+        self.food_pos = self.food_pos[remaining]
+        self.food_amount = self.food_amount[remaining]
+
+    def check_and_fix_edges(self) -> None:
+        self.contact_index = None
+        for positions in (self.zombie_pos, self.human_pos):
+            for axis, low, high, half in (
+                (0, self.left, self.right, HALF_WIDTH),
+                (1, self.top, self.bottom, HALF_HEIGHT),
+            ):
+                values = positions[:, axis]
+                values[values - half < low] = high - half
+                values[values + half > high] = low + half
+
+    def check_food(self) -> None:
+        missing = self.max_food - len(self.food_pos)
+        if missing > 0:
+            points = [self.random_point() for _ in range(missing)]
+            self.food_pos = np.concatenate(
+                (self.food_pos, np.array(points, dtype=np.float64))
+            )
+            self.food_amount = np.concatenate(
+                (self.food_amount, np.full(missing, entities.DEFAULT_FOOD_AMOUNT))
+            )
+
+    def census(self) -> Census:
+        humans = len(self.human_pos)
+        return Census(
+            humans,
+            len(self.zombie_pos),
+            len(self.food_pos),
+            float(self.human_energy.mean()) if humans else 0.0,
+        )
+
+    def all_dead(self) -> bool:
+        return not len(self.human_pos)
+
+
+CallableArrayWorldCreator = Callable[[Bounds], ArrayWorld]
+
+
+def array_world_creator(
+    start_zombies: int, start_humans: int, max_food: int, seed: Optional[int] = None
+) -> CallableArrayWorldCreator:
+    def creator(rect: Bounds) -> ArrayWorld:
+        return ArrayWorld(
+            rect,
+            start_zombies,
+            start_humans,
+            max_food,
+            streams=zutil.RandomStreams(seed),
+        )
+
+    return creator